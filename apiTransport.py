@@ -0,0 +1,133 @@
+
+# This module is part of the SoundCloud social network generator; it holds the transports that
+# PooledClient sends its requests through. Besides the live one, there's a transport that records
+# every API response into a local store, and one that replays them, so a crawl can be re-run offline
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import json, random, sqlite3, threading, time, zlib
+import requests
+
+# These are the request parameters that are left out of a response's key in the store
+unkeyedParams = {"client_id"}
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the key that a request is stored under: its path, and its parameters in sorted order
+def requestKey(path, params):
+	return path + "?" + "&".join("%s=%s" % (name, params[name]) for name in sorted(params) if name not in unkeyedParams)
+
+# This class is a stand-in for requests.Response, for the responses that are served from the store
+class StoredResponse:
+
+	def __init__(self, status_code, body, url=""):
+		self.status_code = status_code
+		self.body = body
+		self.url = url
+		self.headers = {}
+
+	def json(self):
+		return json.loads(self.body)
+
+	def raise_for_status(self):
+		if (self.status_code >= 400):
+			raise requests.HTTPError("%d error for %s" % (self.status_code, self.url), response=self)
+
+# This class is the store of recorded responses. It's a SQLite file w/ one row per request key, holding
+# the response's status code and its zlib-compressed body (next_href cursors and all), so a recorded
+# crawl takes up a fraction of the space its JSON would. It's safe to use from several threads
+class ResponseStore:
+
+	def __init__(self, path):
+		self.lock = threading.Lock()
+		self.connection = sqlite3.connect(str(path), timeout=60, check_same_thread=False)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, status INTEGER, body BLOB)")
+		self.connection.commit()
+
+	def get(self, key):
+		with self.lock:
+			row = self.connection.execute("SELECT status, body FROM responses WHERE key = ?", (key,)).fetchone()
+		if (row is None):
+			return None
+		return (row[0], zlib.decompress(row[1]))
+
+	def put(self, key, status, body):
+		with self.lock:
+			self.connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, status, zlib.compress(body)))
+			self.connection.commit()
+
+	def __len__(self):
+		with self.lock:
+			return self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+	def close(self):
+		with self.lock:
+			self.connection.commit()
+			self.connection.close()
+
+# This class is the live transport: it sends each request to the API over a shared requests.Session
+class LiveTransport:
+
+	def __init__(self, session, baseURL, timeout=30):
+		self.session = session
+		self.baseURL = baseURL
+		self.timeout = timeout
+
+	def send(self, path, params):
+		return self.session.get(self.baseURL + path, params=params, timeout=self.timeout)
+
+# This class wraps another transport, and saves every response it gets (except for the ones worth
+# retrying, like 429s and 5xx errors) into a ResponseStore
+class RecordingTransport:
+
+	def __init__(self, transport, store):
+		self.transport = transport
+		self.store = store
+
+	def send(self, path, params):
+		response = self.transport.send(path, params)
+		if (response.status_code < 500 and response.status_code != 429):
+			self.store.put(requestKey(path, params), response.status_code, response.content)
+		return response
+
+# This class serves the responses in a ResponseStore instead of calling the API; requests that were
+# never recorded get a 404. To see how the crawler copes w/ a slower or flakier API, each response can
+# be delayed by latency seconds (plus up to latencyJitter more), and a fraction of the requests
+# (errorRate) can fail w/ a 503 (or w/ a dropped connection, if errorKind is "connection"). Giving it
+# a randomSeed makes the injected delays and errors the same from one replay to the next
+class ReplayTransport:
+
+	def __init__(self, store, latency=0.0, latencyJitter=0.0, errorRate=0.0, errorKind="status", randomSeed=None):
+		self.store = store
+		self.latency = latency
+		self.latencyJitter = latencyJitter
+		self.errorRate = errorRate
+		self.errorKind = errorKind
+		self.random = random.Random(randomSeed)
+		self.lock = threading.Lock()
+		self.missCt = 0
+
+	def send(self, path, params):
+		with self.lock:
+			delay = self.latency + self.random.uniform(0, self.latencyJitter)
+			failed = self.random.random() < self.errorRate
+		if (delay > 0):
+			time.sleep(delay)
+		if (failed):
+			if (self.errorKind == "connection"):
+				raise requests.ConnectionError("injected connection error for %s" % path)
+			return StoredResponse(503, b"{}", path)
+
+		stored = self.store.get(requestKey(path, params))
+		if (stored is None):
+			with self.lock:
+				self.missCt += 1
+			return StoredResponse(404, b"{}", path)
+		return StoredResponse(stored[0], stored[1], path)
@@ -0,0 +1,239 @@
+
+# This script is part of the SoundCloud social network generator; it crawls the neighborhoods of several
+# starting artists in one process, and writes them all into a single graph. The crawls share one
+# following-list cache, one profile store and one set of explored artists, so an artist that's in more
+# than one neighborhood is only requested (and explored) once, rather than once per crawl
+#
+# Example: python batchCrawl.py --client-id YOUR_ID --seed https://soundcloud.com/someartist --seed 123456 --graph Group.graphml
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import argparse, time
+import networkGenerator as ng
+from crawlWorkers import exploreSeed, setupClient
+from frontier import IndexedHeap
+from graphJournal import GraphJournal
+from graphStore import CompactGraph
+from crawlMetrics import SeedProfiler, metricsPathFor
+from crawlLog import log, progress, recentEvents, configureLogging, logPathFor
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is the frontier of a batch crawl. Each starting seed has its own priority queue of encounter
+# counts (so a popular neighborhood can't crowd out the others), and seeds are taken from the queues in
+# turn; the set of explored artists is shared, so an artist explored from one neighborhood is skipped by
+# the rest. As in the shared frontier, artists only become seeds once they're "connected" (i.e., they
+# mutually follow an artist explored from the same starting seed)
+class BatchFrontier:
+
+	def __init__(self, seedList):
+		self.queues = [IndexedHeap() for seed in seedList]
+		self.encounters = [{} for seed in seedList]
+		self.connected = [set() for seed in seedList]
+		self.exploredCts = [0 for seed in seedList]
+		self.names = {}
+		self.explored = set()
+		self.shuffled = set()
+		self.turn = 0
+		for seedIdx, (seedName, seedID) in enumerate(seedList):
+			self.names[seedID] = seedName
+			self.addEncounters([seedIdx], [(seedID, seedName, 1, 1)])
+
+	# This method adds encounters to the queues of the given starting seeds; it takes a list of (ID, name,
+	# encounter count, connected) tuples, like the ones exploreSeed() returns
+	def addEncounters(self, seedIdxs, encounterList):
+		for artistID, artistName, count, connected in encounterList:
+			if (artistName is not None):
+				self.names.setdefault(artistID, artistName)
+			if (artistID in self.explored):
+				continue
+			for seedIdx in seedIdxs:
+				encounters = self.encounters[seedIdx]
+				encounters[artistID] = encounters.get(artistID, 0) + count
+				if (connected):
+					self.connected[seedIdx].add(artistID)
+				if (artistID in self.connected[seedIdx]):
+					self.queues[seedIdx].push(artistID, -encounters[artistID])
+
+	# This method returns the starting seeds whose neighborhoods the given artist is connected to
+	def neighborhoodsOf(self, artistID):
+		return [seedIdx for seedIdx in range(len(self.queues)) if artistID in self.connected[seedIdx]]
+
+	# This method takes the next seed from the next starting seed's queue (skipping artists that another
+	# neighborhood has explored already, and starting seeds that have explored maxSeeds artists), marks
+	# them as claimed, and returns (starting seed index, ID, name, shuffled); if every queue is empty,
+	# it returns None
+	def claim(self, maxSeeds=None):
+		for offset in range(len(self.queues)):
+			seedIdx = (self.turn + offset) % len(self.queues)
+			if (maxSeeds is not None and self.exploredCts[seedIdx] >= maxSeeds):
+				continue
+			popped = self.queues[seedIdx].pop()
+			while (popped is not None and popped[0] in self.explored):
+				popped = self.queues[seedIdx].pop()
+			if (popped is None):
+				continue
+			artistID = popped[0]
+			self.explored.add(artistID)
+			self.turn = seedIdx + 1
+			return (seedIdx, artistID, self.names.get(artistID), (seedIdx, artistID) in self.shuffled)
+		return None
+
+	# This method puts a claimed artist back into a starting seed's queue, multiplying their encounter count
+	# by the given factor; if shuffle is True, they're also marked as having been passed over once already
+	def release(self, seedIdx, artistID, factor=1.0, shuffle=False):
+		self.explored.discard(artistID)
+		self.encounters[seedIdx][artistID] = self.encounters[seedIdx].get(artistID, 1) * factor
+		self.queues[seedIdx].push(artistID, -self.encounters[seedIdx][artistID])
+		if (shuffle):
+			self.shuffled.add((seedIdx, artistID))
+
+	# This method marks a claimed artist as fully explored, and adds their encounters to every neighborhood
+	# they're a part of; the artist counts as explored in each of those neighborhoods, the same as if each
+	# one had been crawled on its own (so maxSeeds limits the batch to about the union of separate crawls)
+	def markDone(self, artistID, encounterList):
+		seedIdxs = self.neighborhoodsOf(artistID)
+		for seedIdx in seedIdxs:
+			self.exploredCts[seedIdx] += 1
+		self.addEncounters(seedIdxs, encounterList)
+
+	# This method returns the subset of the given IDs that have been explored (or claimed) already
+	def exploredAmong(self, artistIDs):
+		return set(artistID for artistID in artistIDs if artistID in self.explored)
+
+	def __len__(self):
+		return sum(len(queue) for queue in self.queues)
+
+	def tombstoneRatio(self):
+		return max([queue.tombstoneRatio() for queue in self.queues] or [0.0])
+
+# This method looks up a starting seed, which can be either a SoundCloud URL or an ID; it returns
+# (username, ID), or None if there's no such artist
+def lookupSeed(seed):
+	seed = seed.strip()
+	if (not seed.isdigit()):
+		return ng.getArtistID(seed)
+	fields = ng.client.get('/users/' + seed).fields()
+	ng.metrics.countCall("users", 1)
+	ng.profileStore.remember([fields])
+	return (fields["username"], fields["id"])
+
+# This method crawls the neighborhoods of a BatchFrontier's starting seeds (a list of (username, ID) pairs)
+# into graph, until every neighborhood runs out of seeds or has explored maxSeeds artists. An artist above
+# the followerThreshold of the neighborhood they came up in (their starting seed's follower count) is
+# passed over the first time, like in networkGenerator.py. Seeds' profiles are read from the profile store;
+# if a seed's isn't there, it's requested along w/ those of the next few seeds in its neighborhood's queue
+def crawlBatch(batchFrontier, seedList, graph, journal, maxSeeds=None, metricsPath=None, seedProfiler=None):
+
+	followerThresholds = []
+	for seedName, seedID in seedList:
+		seedInfo = ng.getCachedInfo(seedID)
+		followerThresholds.append(seedInfo[1] if isinstance(seedInfo[1], int) else 0)
+	lastMetricsExport = time.time()
+	leftTillCacheClear = 3
+
+	while (True):
+
+		# Take the next seed, from the next neighborhood in line
+		claimed = batchFrontier.claim(maxSeeds)
+		if (claimed is None):
+			break
+		seedIdx, curSeed, seedName, shuffled = claimed
+
+		# Surrounding the API calls with a try/except in case they fail
+		try:
+			if (curSeed not in ng.profileStore):
+				ng.prefetchProfiles([curSeed] + [artistID for artistID, priority in batchFrontier.queues[seedIdx].topK(ng.profileBatchSize - 1)])
+			seedInfo = ng.getCachedInfo(curSeed)
+
+			# Pass over artists above the followerThreshold (the first time they come up)
+			if (not shuffled and isinstance(seedInfo[1], int) and seedInfo[1] > followerThresholds[seedIdx]):
+				log.debug("%s is above %s's followerThreshold, so moving onto a new seed", seedName, seedList[seedIdx][0])
+				batchFrontier.release(seedIdx, curSeed, factor=0.2, shuffle=True)
+				continue
+			following = ng.getFollowingFromID(curSeed)
+		except Exception as e:
+			log.error("*** ERROR: FAILED TO GRAB %s'S INFO ***", seedName)
+
+			# A dropped seed stays claimed (so no neighborhood claims them again), but doesn't count as explored
+			if (not ng.dropFailedSeed(curSeed, e, seedName)):
+				batchFrontier.release(seedIdx, curSeed, factor=ng.failedSeedFactor)
+			continue
+
+		# Explore the seed; their encounters count toward every neighborhood they're a part of
+		log.debug("Exploring %s (ID: %s) from %s's neighborhood", seedName, curSeed, seedList[seedIdx][0])
+		progress.update("Explored %d artists (%d left in the queues); exploring %s from %s's neighborhood", sum(batchFrontier.exploredCts), len(batchFrontier), seedName, seedList[seedIdx][0])
+		if (seedProfiler is not None):
+			seedProfiler.start()
+		encounterList = exploreSeed(curSeed, seedName, seedInfo, following, batchFrontier, graph, journal)
+		with ng.metrics.timer("journalFlush"):
+			ng.metrics.increment("nodesAndEdgesJournaled", journal.flush())
+		batchFrontier.markDone(curSeed, encounterList)
+		if (seedProfiler is not None):
+			seedProfiler.stop()
+		ng.metrics.increment("seedsExplored")
+
+		# Clear the cache every 3 seeds
+		leftTillCacheClear -= 1
+		if (leftTillCacheClear == 0):
+			ng.clearCache()
+			leftTillCacheClear = 3
+
+		if (metricsPath is not None and ng.metricsInterval and time.time() - lastMetricsExport >= ng.metricsInterval):
+			ng.exportMetrics(metricsPath, graph, len(batchFrontier), batchFrontier.tombstoneRatio())
+			lastMetricsExport = time.time()
+
+# =========================
+#           MAIN
+# =========================
+
+if (__name__ == "__main__"):
+
+	parser = argparse.ArgumentParser(description="Crawl the neighborhoods of several SoundCloud artists in one process, into one graph.")
+	parser.add_argument("--client-id", required=True, help="your SoundCloud client ID")
+	parser.add_argument("--seed", action="append", required=True, help="the SoundCloud URL or ID of a starting artist (give it once per artist)")
+	parser.add_argument("--graph", help="the .graphml file to write (defaults to [first seed artist].graphml)")
+	parser.add_argument("--max-seeds", type=int, default=None, help="the most artists explored from each starting artist's neighborhood")
+	args = parser.parse_args()
+
+	# Look up the starting seeds
+	configureLogging(ng.logLevel, ng.recentLogSize, ng.progressUpdatesPerSecond)
+	setupClient(args.client_id)
+	seedList = []
+	for seed in args.seed:
+		found = lookupSeed(seed)
+		if (found is None):
+			parser.error("couldn't find the artist %s" % seed)
+		if (found[1] not in [seedID for seedName, seedID in seedList]):
+			seedList.append(found)
+	graphPath = args.graph or (seedList[0][0] + ".graphml")
+
+	# Crawl into a fresh graph; whatever's been crawled gets written out when the crawl finishes (or on CTRL+C)
+	graph = CompactGraph()
+	journal = GraphJournal(graphPath, fresh=True, snapshotFormat=ng.snapshotFormat, exportGraphml=ng.exportGraphml)
+	metricsPath = metricsPathFor(graphPath, ng.metricsFormat)
+	batchFrontier = BatchFrontier(seedList)
+	try:
+		crawlBatch(batchFrontier, seedList, graph, journal, args.max_seeds, metricsPath, SeedProfiler(graphPath, every=ng.profileEverySeeds))
+	except KeyboardInterrupt:
+		log.info("\nStopping the crawl...")
+	finally:
+		progress.finish()
+		log.info("Writing the full graph to %s...", graphPath)
+		curTime = time.time()
+		with ng.metrics.timer("graphCompact"):
+			journal.compact(graph)
+		log.info("Wrote %d nodes and %d edges in %.3f seconds", graph.number_of_nodes(), graph.number_of_edges(), time.time() - curTime)
+		if (ng.metricsInterval):
+			ng.exportMetrics(metricsPath, graph, len(batchFrontier), batchFrontier.tombstoneRatio())
+		recentEvents.dump(logPathFor(graphPath))
+
+	# Print how many artists each neighborhood explored, and what that cost
+	for (seedName, seedID), exploredCt in zip(seedList, batchFrontier.exploredCts):
+		log.info("- %s: explored %d artists", seedName, exploredCt)
+	log.info("Sent %d API requests in total", ng.client.scheduler.stats()["requests"])
@@ -0,0 +1,85 @@
+
+# This module is part of the SoundCloud social network generator's benchmarks; it holds an in-process
+# fake of the SoundCloud API, which serves a SyntheticNetwork through PooledClient's transport interface
+# (w/ the same pagination as the real API), so a crawl can be benchmarked w/o touching the network
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import json, re, sys, threading, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from apiTransport import StoredResponse
+
+# These are the paths the fake API knows about
+userPattern = re.compile(r"^/users/(\d+)$")
+listPattern = re.compile(r"^/users/(\d+)/(followings|followers|favorites)$")
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is the fake API. Paginated endpoints return `limit` items per page, and a next_href w/ a
+# cursor (the offset of the next page) until the list runs out, like the real API does when it's given
+# linked_partitioning=1; profiles can be requested one at a time, or several at once w/ /users?ids=...
+# Each request can be slowed down by latency seconds, to stand in for the network
+class FakeApiTransport:
+
+	def __init__(self, network, latency=0.0):
+		self.network = network
+		self.latency = latency
+		self.lock = threading.Lock()
+		self.requestCt = 0
+
+	def send(self, path, params):
+		with self.lock:
+			self.requestCt += 1
+		if (self.latency > 0):
+			time.sleep(self.latency)
+
+		match = userPattern.match(path)
+		if (match):
+			return self.respond(self.network.profiles.get(int(match.group(1))), path)
+		match = listPattern.match(path)
+		if (match):
+			return self.respondWithPage(int(match.group(1)), match.group(2), path, params)
+		if (path == "/users" and "ids" in params):
+			userIDs = [int(userID) for userID in str(params["ids"]).split(",") if userID]
+			return self.respond([self.network.profiles[userID] for userID in userIDs if userID in self.network.profiles], path)
+		if (path == "/users/"):
+			query = params.get("q", "")
+			return self.respond([profile for profile in self.network.profiles.values() if profile["username"] == query], path)
+		return self.respond(None, path)
+
+	# This helper method returns one page of a user's followings, followers or favorites
+	def respondWithPage(self, userID, listName, path, params):
+		if (userID not in self.network.profiles):
+			return self.respond(None, path)
+		limit = int(params.get("limit", 50))
+		cursor = int(params.get("cursor", 0))
+		if (listName == "followings"):
+			items = self.network.following[userID]
+		elif (listName == "followers"):
+			items = self.network.followers[userID]
+		else:
+			items = self.network.favorites[userID]
+		pageItems = items[cursor:cursor+limit]
+
+		# Followings and followers are lists of users; favorites are lists of tracks (w/ their artist)
+		if (listName == "favorites"):
+			collection = [{"user_id": artistID, "user": {"id": artistID, "username": self.network.profiles[artistID]["username"]}} for artistID in pageItems]
+		else:
+			collection = [self.network.profiles[itemID] for itemID in pageItems]
+		nextHref = None
+		if (cursor + limit < len(items)):
+			nextHref = "https://api.soundcloud.com%s?limit=%d&linked_partitioning=1&cursor=%d" % (path, limit, cursor + limit)
+		return self.respond({"collection": collection, "next_href": nextHref}, path)
+
+	# This helper method encodes a response like the real API would (i.e., as JSON); None is a 404
+	def respond(self, obj, path):
+		if (obj is None):
+			return StoredResponse(404, b"{}", path)
+		return StoredResponse(200, json.dumps(obj).encode(), path)
@@ -0,0 +1,114 @@
+
+# This script is part of the SoundCloud social network generator's benchmarks; it compares the
+# crawler's old priority queue (heapq + entry_finder + "removed" placeholders) against the
+# IndexedHeap in frontier.py, measuring memory use and per-operation latency
+#
+# Run it from the repo's root directory w/: python benchmarks/frontierBenchmark.py [# of entries]
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import gc, heapq, itertools, random, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from frontier import IndexedHeap
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is the priority queue networkGenerator.py used to use, from the Python
+# docs @ https://docs.python.org/3.5/library/heapq.html#priority-queue-implementation-notes
+class LegacyHeap:
+
+	REMOVED = '<removed-item>'
+
+	def __init__(self):
+		self.pq = []
+		self.entry_finder = {}
+		self.counter = itertools.count()
+
+	def push(self, item, priority):
+		if item in self.entry_finder:
+			entry = self.entry_finder.pop(item)
+			entry[-1] = self.REMOVED
+		entry = [priority, next(self.counter), item]
+		self.entry_finder[item] = entry
+		heapq.heappush(self.pq, entry)
+
+	def pop(self):
+		while self.pq:
+			priority, count, item = heapq.heappop(self.pq)
+			if item is not self.REMOVED:
+				del self.entry_finder[item]
+				return (item, priority)
+		return None
+
+	def topK(self, k):
+		return heapq.nsmallest(k, [entry for entry in self.pq if entry[-1] is not self.REMOVED])
+
+	def __len__(self):
+		return len(self.entry_finder)
+
+# This method times fn(arg) for each arg, and returns the mean latency in microseconds
+def timeEach(fn, args):
+	startTime = time.perf_counter()
+	for arg in args:
+		fn(*arg)
+	return (time.perf_counter() - startTime) / max(1, len(args)) * 1e6
+
+# This method fills a heap w/ entryCt artists, and then re-adds random artists w/ new
+# priorities (like the crawler does); it returns the heap and the latencies of both steps
+def fillHeap(heapClass, pushArgs, updateArgs):
+	heap = heapClass()
+	pushLatency = timeEach(heap.push, pushArgs)
+	updateLatency = timeEach(heap.push, updateArgs)
+	return heap, pushLatency, updateLatency
+
+# This method runs the benchmark against one heap class, and returns a dict of results
+def benchmarkHeap(heapClass, entryCt, updateCt, popCt, seed=0):
+	rng = random.Random(seed)
+	pushArgs = [(itemID, -rng.randint(1, 50)) for itemID in range(entryCt)]
+	updateArgs = [(rng.randrange(entryCt), -rng.randint(1, 500)) for _ in range(updateCt)]
+
+	# Measure the memory held by the heap (tracing slows everything down, so nothing is timed here)
+	gc.collect()
+	tracemalloc.start()
+	heap = fillHeap(heapClass, pushArgs, updateArgs)[0]
+	currentMemory, peakMemory = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	storedEntries = len(heap.pq) if isinstance(heap, LegacyHeap) else len(heap.heap)
+	del heap
+	gc.collect()
+
+	# Then, time each operation: pushing, updating, the top-k view (what pqPrintTop() prints) and popping
+	heap, pushLatency, updateLatency = fillHeap(heapClass, pushArgs, updateArgs)
+	topLatency = timeEach(heap.topK, [(50,)] * 20)
+	popLatency = timeEach(heap.pop, [()] * popCt)
+
+	return {
+		"entries": entryCt,
+		"storedEntries": storedEntries,
+		"memoryMB": currentMemory / 1e6,
+		"peakMemoryMB": peakMemory / 1e6,
+		"pushMicros": pushLatency,
+		"updateMicros": updateLatency,
+		"popMicros": popLatency,
+		"top50Micros": topLatency,
+	}
+
+# =========================
+#           MAIN
+# =========================
+
+if (__name__ == "__main__"):
+	entryCt = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+	for heapClass in [LegacyHeap, IndexedHeap]:
+		results = benchmarkHeap(heapClass, entryCt, updateCt=entryCt, popCt=entryCt // 10)
+		print("%s:" % heapClass.__name__)
+		print("  %d live entries, %d stored in the heap" % (entryCt, results["storedEntries"]))
+		print("  memory: %.1f MB (peak %.1f MB)" % (results["memoryMB"], results["peakMemoryMB"]))
+		print("  push: %.2f us, update: %.2f us, pop: %.2f us, top 50: %.1f us" % (results["pushMicros"], results["updateMicros"], results["popMicros"], results["top50Micros"]))
@@ -0,0 +1,316 @@
+
+# This script is part of the SoundCloud social network generator's benchmarks; it runs the crawler's hot
+# paths against a synthetic network (served by an in-process fake API), and writes the results as JSON,
+# so runs from different versions can be compared. The scenarios are:
+# - worker: a crawlWorkers.py worker crawling a number of seeds off a shared frontier (artists/second, API calls
+#   per artist)
+# - batch: crawling several overlapping neighborhoods w/ batchCrawl.py, vs. crawling each one on its own
+# - frontier: pqAdd / pqPop on a large priority queue
+# - graphml: writing (and reading back) a large graph as .graphml, and as Parquet / Feather snapshots
+# - merge: loading and merging k .graphml files w/ mergeGraphs.py
+#
+# Run it from the repo's root directory w/: python benchmarks/runBenchmarks.py --output results.json
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import argparse, contextlib, json, os, platform, random, subprocess, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import networkx as nx
+import networkGenerator as ng
+import batchCrawl
+from crawlWorkers import exploreSeed
+from followingCache import FollowingCache
+from frontier import IndexedHeap
+from graphJournal import GraphJournal
+from graphStore import CompactGraph
+from graphmlStream import loadCompactGraph, writeCompactGraph
+from graphSnapshot import loadSnapshot, writeSnapshot, snapshotFormats, snapshotPathsFor
+from mergeGraphs import loadGraphArray, mergeGraphArray
+from pooledClient import PooledClient
+from requestScheduler import RequestScheduler
+from sharedFrontier import SharedFrontier
+from fakeApi import FakeApiTransport
+from syntheticGraph import SyntheticNetwork
+
+scenarioNames = ["worker", "batch", "frontier", "graphml", "merge"]
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the git commit the benchmarks were run at (or None, outside of a git checkout)
+def gitCommit():
+	try:
+		return subprocess.run(["git", "rev-parse", "HEAD"], cwd=str(Path(__file__).resolve().parent), capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+# This method builds a compact graph out of the synthetic network: the given users are explored,
+# and everyone they follow is added as an unexplored node
+def networkToGraph(network, exploredIDs):
+	graph = CompactGraph()
+	for userID in exploredIDs:
+		profile = network.profiles[userID]
+		graph.add_node(userID, username=profile["username"], trackCt=profile["track_count"], followerCt=profile["followers_count"], favoriteCt=profile["public_favorites_count"], url=profile["permalink_url"], city=profile["city"] or "n/a", country=profile["country"] or "n/a", explored=1)
+	for userID in exploredIDs:
+		for targetID in network.following[userID]:
+			if (targetID not in graph):
+				profile = network.profiles[targetID]
+				graph.add_node(targetID, username=profile["username"], trackCt=profile["track_count"], followerCt=profile["followers_count"], favoriteCt=profile["public_favorites_count"], url=profile["permalink_url"], city=profile["city"] or "n/a", country=profile["country"] or "n/a", explored=0)
+			graph.add_edge(userID, targetID)
+	return graph
+
+# This scenario crawls seedCt seeds from the most-followed synthetic artist the way a crawlWorkers.py worker
+# does: each seed is claimed from a SharedFrontier and explored w/ crawlWorkers.exploreSeed() (which uses
+# networkGenerator's follow-back checks, favorites boosts and following cache, but not its main loop)
+def benchmarkWorker(network, seedCt, apiLatency, workDir):
+	transport = FakeApiTransport(network, latency=apiLatency)
+	ng.client = PooledClient(client_id="benchmark", poolSize=ng.followBackWorkers, scheduler=RequestScheduler(rate=1e6, maxRate=1e6), metrics=ng.metrics, transport=transport)
+	ng.followingCache = FollowingCache(workDir / "followingCache.sqlite")
+	ng.profileStore.clear()
+	sharedFrontier = SharedFrontier(workDir / "frontier.sqlite")
+	startID = network.mostFollowed()
+	sharedFrontier.addEncounters([(startID, network.profiles[startID]["username"], 1, 1)])
+	graph = CompactGraph()
+	journal = GraphJournal(workDir / "crawl.graphml", fresh=True)
+
+	# Crawl (w/ the crawler's printouts going nowhere, so they don't flood the results)
+	exploredCt = 0
+	startTime = time.perf_counter()
+	with open(os.devnull, "w") as devNull, contextlib.redirect_stdout(devNull):
+		while (exploredCt < seedCt):
+			claimed = sharedFrontier.claim(0)
+			if (claimed is None):
+				break
+			seedID, seedName, shuffled = claimed
+			seedInfo = ng.getCachedInfo(seedID)
+			following = ng.getFollowingFromID(seedID)
+			encounterList = exploreSeed(seedID, seedName, seedInfo, following, sharedFrontier, graph, journal)
+			journal.flush()
+			sharedFrontier.addEncounters(encounterList)
+			sharedFrontier.markDone(seedID)
+			exploredCt += 1
+	elapsed = time.perf_counter() - startTime
+	journal.close()
+	sharedFrontier.close()
+	ng.followingCache.close()
+
+	return {
+		"seeds": exploredCt,
+		"apiLatency": apiLatency,
+		"seconds": elapsed,
+		"artistsPerSecond": exploredCt / elapsed if elapsed else 0.0,
+		"apiCalls": transport.requestCt,
+		"apiCallsPerArtist": transport.requestCt / exploredCt if exploredCt else 0.0,
+		"nodes": graph.number_of_nodes(),
+		"edges": graph.number_of_edges(),
+	}
+
+# This scenario crawls the neighborhoods of the startCt most-followed synthetic artists (seedCt seeds from
+# each) w/ batchCrawl.py: first each one on its own (w/ an empty cache, like separate networkGenerator.py
+# runs), and then all of them in one batch, so the API calls of the two can be compared
+def benchmarkBatch(network, startCt, seedCt, apiLatency, workDir):
+	startIDs = sorted(network.userIDs, key=lambda userID: -len(network.followers[userID]))[:startCt]
+	seedList = [(network.profiles[startID]["username"], startID) for startID in startIDs]
+
+	def crawl(crawlSeeds, crawlIdx):
+		transport = FakeApiTransport(network, latency=apiLatency)
+		ng.client = PooledClient(client_id="benchmark", poolSize=ng.followBackWorkers, scheduler=RequestScheduler(rate=1e6, maxRate=1e6), metrics=ng.metrics, transport=transport)
+		ng.followingCache = FollowingCache(workDir / ("followingCache%d.sqlite" % crawlIdx))
+		ng.partialFollowing.clear()
+		ng.profileStore.clear()
+		graph = CompactGraph()
+		journal = GraphJournal(workDir / ("batch%d.graphml" % crawlIdx), fresh=True)
+		startTime = time.perf_counter()
+		with open(os.devnull, "w") as devNull, contextlib.redirect_stdout(devNull):
+			batchCrawl.crawlBatch(batchCrawl.BatchFrontier(crawlSeeds), crawlSeeds, graph, journal, seedCt)
+		elapsed = time.perf_counter() - startTime
+		journal.close()
+		ng.followingCache.close()
+		return transport.requestCt, elapsed, graph
+
+	separateList = [crawl([seed], seedIdx) for seedIdx, seed in enumerate(seedList)]
+	with contextlib.redirect_stdout(sys.stderr):
+		unionGraph = mergeGraphArray([graph for requestCt, elapsed, graph in separateList])
+	batchRequestCt, batchElapsed, batchGraph = crawl(seedList, len(seedList))
+
+	return {
+		"startingArtists": startCt,
+		"seedsPerArtist": seedCt,
+		"separateApiCalls": sum(requestCt for requestCt, elapsed, graph in separateList),
+		"largestSeparateApiCalls": max(requestCt for requestCt, elapsed, graph in separateList),
+		"separateSeconds": sum(elapsed for requestCt, elapsed, graph in separateList),
+		"separateMergedNodes": unionGraph.number_of_nodes(),
+		"separateMergedEdges": unionGraph.number_of_edges(),
+		"batchApiCalls": batchRequestCt,
+		"batchSeconds": batchElapsed,
+		"batchNodes": batchGraph.number_of_nodes(),
+		"batchEdges": batchGraph.number_of_edges(),
+	}
+
+# This scenario times networkGenerator's priority queue methods: adding entryCt artists, re-adding
+# as many random artists w/ new encounter counts (like the crawler does), and then popping a tenth of them
+def benchmarkFrontier(entryCt, seed):
+	rng = random.Random(seed)
+	addArgs = [(itemID, rng.randint(1, 50)) for itemID in range(entryCt)]
+	updateArgs = [(rng.randrange(entryCt), rng.randint(1, 500)) for _ in range(entryCt)]
+	ng.frontier = IndexedHeap()
+
+	startTime = time.perf_counter()
+	for item, priority in addArgs:
+		ng.pqAdd(item, priority)
+	addTime = time.perf_counter() - startTime
+	startTime = time.perf_counter()
+	for item, priority in updateArgs:
+		ng.pqAdd(item, priority)
+	updateTime = time.perf_counter() - startTime
+	startTime = time.perf_counter()
+	for _ in range(entryCt // 10):
+		ng.pqPop()
+	popTime = time.perf_counter() - startTime
+
+	return {
+		"entries": entryCt,
+		"addMicros": addTime / entryCt * 1e6,
+		"updateMicros": updateTime / entryCt * 1e6,
+		"popMicros": popTime / max(1, entryCt // 10) * 1e6,
+	}
+
+# This scenario times saving and loading a graph where every synthetic artist has been explored: as .graphml
+# (w/ the streaming reader / writer, and w/ networkx's), and as each kind of columnar snapshot
+def benchmarkGraphml(network, workDir):
+	graph = networkToGraph(network, network.userIDs)
+	graphPath = workDir / "snapshot.graphml"
+
+	startTime = time.perf_counter()
+	writeCompactGraph(graph, graphPath)
+	writeTime = time.perf_counter() - startTime
+	startTime = time.perf_counter()
+	loadCompactGraph(graphPath)
+	readTime = time.perf_counter() - startTime
+	startTime = time.perf_counter()
+	nx.write_graphml(graph.toNetworkx(), str(workDir / "snapshotNetworkx.graphml"))
+	networkxWriteTime = time.perf_counter() - startTime
+	startTime = time.perf_counter()
+	nx.read_graphml(str(workDir / "snapshotNetworkx.graphml"))
+	networkxReadTime = time.perf_counter() - startTime
+
+	results = {
+		"nodes": graph.number_of_nodes(),
+		"edges": graph.number_of_edges(),
+		"fileMB": graphPath.stat().st_size / 1e6,
+		"writeSeconds": writeTime,
+		"readSeconds": readTime,
+		"networkxWriteSeconds": networkxWriteTime,
+		"networkxReadSeconds": networkxReadTime,
+	}
+	for snapshotFormat in snapshotFormats:
+		startTime = time.perf_counter()
+		writeSnapshot(graph, graphPath, snapshotFormat)
+		results[snapshotFormat + "WriteSeconds"] = time.perf_counter() - startTime
+		startTime = time.perf_counter()
+		loadSnapshot(graphPath, snapshotFormat)
+		results[snapshotFormat + "ReadSeconds"] = time.perf_counter() - startTime
+		results[snapshotFormat + "FileMB"] = sum(path.stat().st_size for path in snapshotPathsFor(graphPath, snapshotFormat)) / 1e6
+	return results
+
+# This scenario times mergeGraphs.py on k graphs, each of which explored a different (random) slice
+# of the synthetic network, so they overlap wherever their explored artists follow the same people
+def benchmarkMerge(network, inputCt, workDir, seed):
+	rng = random.Random(seed)
+	graphPathArray = []
+	for inputIdx in range(inputCt):
+		exploredIDs = rng.sample(network.userIDs, max(1, len(network.userIDs) // (2 * inputCt)))
+		graphPath = workDir / ("input%d.graphml" % inputIdx)
+		writeCompactGraph(networkToGraph(network, exploredIDs), graphPath)
+		graphPathArray.append(graphPath)
+
+	# Load them twice: the first time, they're parsed (and saved to the parsed-graph cache), and the second
+	# time, they come from the cache
+	startTime = time.perf_counter()
+	graphArray = loadGraphArray(graphPathArray, workDir / "parsedGraphCache")
+	loadTime = time.perf_counter() - startTime
+	startTime = time.perf_counter()
+	loadGraphArray(graphPathArray, workDir / "parsedGraphCache")
+	cachedLoadTime = time.perf_counter() - startTime
+	startTime = time.perf_counter()
+	with contextlib.redirect_stdout(sys.stderr):
+		mergedGraph = mergeGraphArray(graphArray)
+	mergeTime = time.perf_counter() - startTime
+	startTime = time.perf_counter()
+	writeCompactGraph(mergedGraph, workDir / "merged.graphml")
+	writeTime = time.perf_counter() - startTime
+
+	return {
+		"inputs": inputCt,
+		"inputEdges": sum(graph.number_of_edges() for graph in graphArray),
+		"mergedNodes": mergedGraph.number_of_nodes(),
+		"mergedEdges": mergedGraph.number_of_edges(),
+		"loadSeconds": loadTime,
+		"cachedLoadSeconds": cachedLoadTime,
+		"mergeSeconds": mergeTime,
+		"writeSeconds": writeTime,
+	}
+
+# =========================
+#           MAIN
+# =========================
+
+if (__name__ == "__main__"):
+
+	parser = argparse.ArgumentParser(description="Benchmark the crawler's hot paths against a synthetic SoundCloud network.")
+	parser.add_argument("--scenario", action="append", choices=scenarioNames, help="a scenario to run (can be given more than once; defaults to all of them)")
+	parser.add_argument("--users", type=int, default=20000, help="the number of users in the synthetic network")
+	parser.add_argument("--seeds", type=int, default=50, help="the number of seeds to crawl")
+	parser.add_argument("--batch-artists", type=int, default=3, help="the number of starting artists in the batch scenario (each gets --seeds / this many seeds)")
+	parser.add_argument("--api-latency", type=float, default=0.0, help="the delay (in seconds) the fake API adds to each request")
+	parser.add_argument("--frontier-entries", type=int, default=1000000, help="the number of artists to put in the priority queue")
+	parser.add_argument("--merge-inputs", type=int, default=8, help="the number of graphs to merge")
+	parser.add_argument("--random-seed", type=int, default=0, help="the seed for the synthetic network (and everything else that's random)")
+	parser.add_argument("--output", help="the .json file to write the results to (they're printed either way)")
+	args = parser.parse_args()
+	scenarios = args.scenario or scenarioNames
+
+	results = {
+		"commit": gitCommit(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"time": time.time(),
+		"parameters": vars(args),
+		"scenarios": {},
+	}
+
+	# Generate the synthetic network (unless only the frontier scenario is being run)
+	network = None
+	if (set(scenarios) - {"frontier"}):
+		startTime = time.perf_counter()
+		network = SyntheticNetwork(userCt=args.users, seed=args.random_seed)
+		results["network"] = {"users": args.users, "edges": network.edgeCount(), "seconds": time.perf_counter() - startTime}
+		print("Generated a synthetic network w/ %d users and %d follows" % (args.users, network.edgeCount()), file=sys.stderr)
+
+	# Run each scenario in its own temporary directory
+	for scenario in scenarios:
+		print("Running the %s scenario..." % scenario, file=sys.stderr)
+		with tempfile.TemporaryDirectory() as workDir:
+			workDir = Path(workDir)
+			if (scenario == "worker"):
+				results["scenarios"][scenario] = benchmarkWorker(network, args.seeds, args.api_latency, workDir)
+			elif (scenario == "batch"):
+				results["scenarios"][scenario] = benchmarkBatch(network, args.batch_artists, max(1, args.seeds // args.batch_artists), args.api_latency, workDir)
+			elif (scenario == "frontier"):
+				results["scenarios"][scenario] = benchmarkFrontier(args.frontier_entries, args.random_seed)
+			elif (scenario == "graphml"):
+				results["scenarios"][scenario] = benchmarkGraphml(network, workDir)
+			elif (scenario == "merge"):
+				results["scenarios"][scenario] = benchmarkMerge(network, args.merge_inputs, workDir, args.random_seed)
+
+	resultText = json.dumps(results, indent=1)
+	print(resultText)
+	if (args.output):
+		with open(args.output, "w") as outputFile:
+			outputFile.write(resultText + "\n")
@@ -0,0 +1,86 @@
+
+# This module is part of the SoundCloud social network generator's benchmarks; it generates a
+# synthetic SoundCloud-like network to crawl, where a few artists have most of the followers (like
+# the real thing), some follows are returned, and each artist favorites tracks by artists they follow
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import random
+from itertools import accumulate
+
+# The first synthetic user ID (so IDs look like real SoundCloud IDs, rather than starting at 0)
+firstUserID = 1000
+
+# A few cities / countries to hand out to the synthetic artists
+cityList = [("Brooklyn", "United States"), ("London", "United Kingdom"), ("Berlin", "Germany"), ("Los Angeles", "United States"), ("Toronto", "Canada"), (None, None)]
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is the synthetic network. Each user's following count is drawn from a Pareto distribution
+# (w/ the given mean and exponent, capped at maxFollowing), and who they follow is drawn by popularity,
+# which is a power law too (so a handful of artists end up w/ a large share of the followers). Each follow
+# is returned w/ probability reciprocity. Everything is derived from the seed, so the same arguments
+# always give the same network
+class SyntheticNetwork:
+
+	def __init__(self, userCt=20000, meanFollowing=40, maxFollowing=2000, followingExponent=1.5, popularityExponent=1.1, reciprocity=0.3, meanFavorites=20, seed=0):
+		rng = random.Random(seed)
+		self.userIDs = list(range(firstUserID, firstUserID + userCt))
+
+		# Popularity follows a Zipf distribution over a shuffled order of the users
+		popularityOrder = self.userIDs[:]
+		rng.shuffle(popularityOrder)
+		cumWeights = list(accumulate((rank + 1) ** -popularityExponent for rank in range(userCt)))
+
+		# Draw each user's following list, and return some of the follows
+		self.following = {userID: set() for userID in self.userIDs}
+		minFollowing = meanFollowing * (followingExponent - 1) / followingExponent
+		for userID in self.userIDs:
+			followingCt = min(maxFollowing, userCt - 1, int(minFollowing * rng.paretovariate(followingExponent)))
+			for targetID in rng.choices(popularityOrder, cum_weights=cumWeights, k=followingCt):
+				if (targetID == userID):
+					continue
+				self.following[userID].add(targetID)
+				if (rng.random() < reciprocity):
+					self.following[targetID].add(userID)
+
+		# Sort the lists (the API returns them in a fixed order), and build the followers lists from them
+		self.following = {userID: sorted(targets) for userID, targets in self.following.items()}
+		self.followers = {userID: [] for userID in self.userIDs}
+		for userID, targets in self.following.items():
+			for targetID in targets:
+				self.followers[targetID].append(userID)
+
+		# Each user favorites tracks by artists they follow (or, for users who don't follow anyone, by popular artists)
+		self.favorites = {}
+		for userID in self.userIDs:
+			favoriteCt = int(rng.expovariate(1 / meanFavorites)) if meanFavorites else 0
+			pool = self.following[userID] or popularityOrder[:100]
+			self.favorites[userID] = [rng.choice(pool) for _ in range(favoriteCt)]
+
+		# Finally, the rest of each user's profile
+		self.profiles = {}
+		for userID in self.userIDs:
+			city, country = rng.choice(cityList)
+			self.profiles[userID] = {
+				"id": userID,
+				"username": "artist%d" % userID,
+				"permalink_url": "https://soundcloud.com/artist%d" % userID,
+				"track_count": rng.randint(0, 200),
+				"followers_count": len(self.followers[userID]),
+				"public_favorites_count": len(self.favorites[userID]),
+				"city": city,
+				"country": country,
+			}
+
+	# This method returns the most-followed user; it makes a good starting seed
+	def mostFollowed(self):
+		return max(self.userIDs, key=lambda userID: len(self.followers[userID]))
+
+	def edgeCount(self):
+		return sum(len(targets) for targets in self.following.values())
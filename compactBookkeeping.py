@@ -0,0 +1,279 @@
+
+# This module is part of the SoundCloud social network generator; it holds compact stand-ins for the
+# crawler's encounter-count and name dicts, which can otherwise grow to hold every artist the crawler
+# has ever seen in a following or favorites list. They keep the crawl within a fixed memory budget,
+# at the cost of some accuracy once the budget is used up (see CompactCounter and NameStore below)
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import os, pickle, sqlite3, tempfile, weakref
+from array import array
+from collections import OrderedDict
+
+# This marks an empty slot in CompactCounter's hash table (SoundCloud IDs are never negative)
+emptySlot = -1
+
+# =========================
+#          METHODS
+# =========================
+
+# This method scrambles a 64-bit int (w/ the splitmix64 finalizer), so consecutive IDs don't land
+# in consecutive slots; the hash tables and filters below derive all of their hashes from it
+def mixID(ID):
+	ID = (ID + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+	ID = ((ID ^ (ID >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+	ID = ((ID ^ (ID >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+	return ID ^ (ID >> 31)
+
+# This class is a Bloom filter of IDs: a bit array w/ hashCt bits set per ID. It never forgets an ID
+# it's seen, but it can claim to have seen one it hasn't; w/ n IDs in m bits, that happens w/ a
+# probability of about (1 - e^(-hashCt * n / m)) ^ hashCt (i.e., ~2% for 2^24 bits, 4 hashes, 2M IDs)
+class BloomFilter:
+
+	def __init__(self, bitCt=2**24, hashCt=4):
+		self.bitCt = bitCt
+		self.hashCt = hashCt
+		self.bits = bytearray((bitCt + 7) // 8)
+
+	def bitIndices(self, ID):
+		mixed = mixID(ID)
+		first, second = mixed & 0xFFFFFFFF, (mixed >> 32) | 1
+		return [(first + hashIdx * second) % self.bitCt for hashIdx in range(self.hashCt)]
+
+	def add(self, ID):
+		for bitIdx in self.bitIndices(ID):
+			self.bits[bitIdx >> 3] |= 1 << (bitIdx & 7)
+
+	def __contains__(self, ID):
+		return all(self.bits[bitIdx >> 3] & (1 << (bitIdx & 7)) for bitIdx in self.bitIndices(ID))
+
+# This class is a count-min sketch: depth rows of width counters, where each ID adds to one counter per
+# row, and its count is read as the smallest of them. Counts are never underestimated; after N total
+# encounters, an ID's count is overestimated by more than e * N / width w/ a probability of about e^(-depth)
+class CountMinSketch:
+
+	def __init__(self, width=2**20, depth=4):
+		self.width = width
+		self.depth = depth
+		self.counts = array('I', bytes(4 * width * depth))
+
+	def counterIndices(self, ID):
+		mixed = mixID(ID)
+		first, second = mixed & 0xFFFFFFFF, (mixed >> 32) | 1
+		return [rowIdx * self.width + (first + rowIdx * second) % self.width for rowIdx in range(self.depth)]
+
+	def estimate(self, ID):
+		return min(self.counts[counterIdx] for counterIdx in self.counterIndices(ID))
+
+	# This method raises an ID's count to at least newCount, only touching the counters that are below it
+	# (a "conservative update", which keeps the overestimates smaller than adding to every counter would)
+	def raiseTo(self, ID, newCount):
+		for counterIdx in self.counterIndices(ID):
+			if (self.counts[counterIdx] < newCount):
+				self.counts[counterIdx] = min(newCount, 0xFFFFFFFF)
+
+# This class stands in for the artistEncounterDict. The first exactLimit artists are counted exactly, in an
+# open-addressing hash table of two typed arrays (~23 bytes per artist, rather than the ~150 a dict entry and
+# its int objects take); everyone after that is counted in a count-min sketch, and remembered in a Bloom
+# filter. So, the memory it uses is capped, and past exactLimit artists:
+# - counts for the newer artists can be a little too high (never too low; see CountMinSketch)
+# - "artistID in counter" can be True for an artist that hasn't been seen (see BloomFilter)
+# - keys() / items() only list the exactly-counted artists
+class CompactCounter:
+
+	def __init__(self, exactLimit=1000000, sketchWidth=2**20, sketchDepth=4, bloomBits=2**24, bloomHashes=4):
+		self.exactLimit = exactLimit
+		self.sketchWidth = sketchWidth
+		self.sketchDepth = sketchDepth
+		self.bloomBits = bloomBits
+		self.bloomHashes = bloomHashes
+		self.clear()
+
+	def clear(self):
+		self.keyArray = array('q', [emptySlot]) * 8
+		self.countArray = array('q', [0]) * 8
+		self.exactCt = 0
+		self.sketch = None
+		self.seen = None
+
+	# This helper method returns the slot that holds the given ID, or the empty slot it would go in
+	def slotFor(self, ID):
+		mask = len(self.keyArray) - 1
+		slotIdx = mixID(ID) & mask
+		while (self.keyArray[slotIdx] != emptySlot and self.keyArray[slotIdx] != ID):
+			slotIdx = (slotIdx + 1) & mask
+		return slotIdx
+
+	# This helper method doubles the size of the hash table, re-inserting every ID
+	def grow(self):
+		oldKeys, oldCounts = self.keyArray, self.countArray
+		self.keyArray = array('q', [emptySlot]) * (2 * len(oldKeys))
+		self.countArray = array('q', [0]) * (2 * len(oldKeys))
+		for ID, count in zip(oldKeys, oldCounts):
+			if (ID != emptySlot):
+				slotIdx = self.slotFor(ID)
+				self.keyArray[slotIdx] = ID
+				self.countArray[slotIdx] = count
+
+	def __contains__(self, ID):
+		if (self.keyArray[self.slotFor(ID)] == ID):
+			return True
+		return self.seen is not None and ID in self.seen
+
+	def __getitem__(self, ID):
+		slotIdx = self.slotFor(ID)
+		if (self.keyArray[slotIdx] == ID):
+			return self.countArray[slotIdx]
+		if (self.seen is not None and ID in self.seen):
+			return self.sketch.estimate(ID)
+		raise KeyError(ID)
+
+	def get(self, ID, default=None):
+		try:
+			return self[ID]
+		except KeyError:
+			return default
+
+	def __setitem__(self, ID, count):
+		slotIdx = self.slotFor(ID)
+		if (self.keyArray[slotIdx] == ID):
+			self.countArray[slotIdx] = count
+			return
+
+		# Count a new artist exactly if there's still room (keeping the table at most 70% full)
+		if (self.exactCt < self.exactLimit):
+			self.keyArray[slotIdx] = ID
+			self.countArray[slotIdx] = count
+			self.exactCt += 1
+			if (self.exactCt * 10 > len(self.keyArray) * 7):
+				self.grow()
+			return
+
+		# Otherwise, count them in the sketch
+		if (self.sketch is None):
+			self.sketch = CountMinSketch(self.sketchWidth, self.sketchDepth)
+			self.seen = BloomFilter(self.bloomBits, self.bloomHashes)
+		self.seen.add(ID)
+		self.sketch.raiseTo(ID, int(count))
+
+	def keys(self):
+		return [ID for ID in self.keyArray if ID != emptySlot]
+
+	def items(self):
+		return [(ID, count) for ID, count in zip(self.keyArray, self.countArray) if ID != emptySlot]
+
+	def __iter__(self):
+		return iter(self.keys())
+
+	# The length is the number of exactly-counted artists (the sketch doesn't know how many it holds)
+	def __len__(self):
+		return self.exactCt
+
+	def __repr__(self):
+		return "CompactCounter(%d exact counts%s)" % (self.exactCt, ", plus a count-min sketch" if self.sketch is not None else "")
+
+# This method closes a NameStore's SQLite connection, and deletes its file if it was a temporary one
+def closeNameFile(connection, path, temporary):
+	connection.close()
+	if (temporary):
+		for suffix in ["", "-wal", "-shm"]:
+			if (os.path.exists(path + suffix)):
+				os.remove(path + suffix)
+
+# This class stands in for the artistNameDict. The memoryEntries most recently used names are kept in memory,
+# and the rest are spilled to a SQLite file (a temporary one, unless a path is given); so, looking up an old
+# artist's name costs a disk read, but every name is kept exactly. A temporary file is deleted when the store
+# is closed, garbage collected, or when the script exits, whichever comes first
+class NameStore:
+
+	def __init__(self, memoryEntries=100000, path=None, backupPath=None):
+		self.memoryEntries = memoryEntries
+		self.memory = OrderedDict()
+		self.backupPath = backupPath
+		self.temporary = path is None
+		if (self.temporary):
+			fileHandle, path = tempfile.mkstemp(prefix="artistNames", suffix=".sqlite")
+			os.close(fileHandle)
+		self.path = str(path)
+		self.connection = sqlite3.connect(self.path, check_same_thread=False)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=OFF")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS names (id INTEGER PRIMARY KEY, name TEXT)")
+		self.finalizer = weakref.finalize(self, closeNameFile, self.connection, self.path, self.temporary)
+
+	def __setitem__(self, ID, name):
+		self.memory[ID] = name
+		self.memory.move_to_end(ID)
+
+		# Once memory is full, spill the least recently used tenth of it to disk in one go
+		if (len(self.memory) > self.memoryEntries):
+			spillList = [self.memory.popitem(last=False) for _ in range(max(1, self.memoryEntries // 10))]
+			self.connection.executemany("INSERT OR REPLACE INTO names VALUES (?, ?)", spillList)
+			self.connection.commit()
+
+	def __getitem__(self, ID):
+		if (ID in self.memory):
+			self.memory.move_to_end(ID)
+			return self.memory[ID]
+		row = self.connection.execute("SELECT name FROM names WHERE id = ?", (ID,)).fetchone()
+		if (row is None):
+			raise KeyError(ID)
+		return row[0]
+
+	def get(self, ID, default=None):
+		try:
+			return self[ID]
+		except KeyError:
+			return default
+
+	def __contains__(self, ID):
+		return self.get(ID) is not None
+
+	def items(self):
+		spilled = [(ID, name) for ID, name in self.connection.execute("SELECT id, name FROM names") if ID not in self.memory]
+		return spilled + list(self.memory.items())
+
+	def keys(self):
+		return [ID for ID, name in self.items()]
+
+	# The length is the number of names on disk, plus the ones in memory that haven't been spilled yet
+	def __len__(self):
+		memoryIDs = list(self.memory)
+		spilledCt = 0
+		for startIdx in range(0, len(memoryIDs), 500):
+			batch = memoryIDs[startIdx:startIdx+500]
+			spilledCt += self.connection.execute("SELECT COUNT(*) FROM names WHERE id IN (%s)" % ",".join("?" * len(batch)), batch).fetchone()[0]
+		return self.connection.execute("SELECT COUNT(*) FROM names").fetchone()[0] + len(memoryIDs) - spilledCt
+
+	def clear(self):
+		self.memory.clear()
+		self.connection.execute("DELETE FROM names")
+		self.connection.commit()
+
+	def close(self):
+		self.finalizer()
+
+	# These methods let the store be pickled (i.e., into a crawl checkpoint). Only the names in memory go into
+	# the pickle; the spilled ones are copied (w/ SQLite's backup API) to backupPath, which has to be set
+	# first, and the unpickled store copies them from there into a new temporary file. The copy is written
+	# to a file of its own and then moved into place, so a crash mid-copy leaves the last one intact
+	def __getstate__(self):
+		if (self.backupPath is None):
+			raise pickle.PicklingError("A NameStore needs a backupPath to be pickled")
+		tempPath = self.backupPath + ".tmp"
+		backupConnection = sqlite3.connect(tempPath)
+		self.connection.backup(backupConnection)
+		backupConnection.close()
+		os.replace(tempPath, self.backupPath)
+		return {"memoryEntries": self.memoryEntries, "memory": list(self.memory.items()), "backupPath": self.backupPath}
+
+	def __setstate__(self, state):
+		self.__init__(memoryEntries=state["memoryEntries"], backupPath=state["backupPath"])
+		if (os.path.exists(self.backupPath)):
+			backupConnection = sqlite3.connect(self.backupPath)
+			backupConnection.backup(self.connection)
+			backupConnection.close()
+		self.memory.update(state["memory"])
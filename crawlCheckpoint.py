@@ -0,0 +1,46 @@
+
+# This module is part of the SoundCloud social network generator; it saves and loads checkpoints
+# of the crawler's full state, so that a stopped crawl can pick up exactly where it left off
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import os, pickle
+from pathlib import Path
+from crawlLog import log
+
+# Every checkpoint file starts with these bytes; the last one is the format version
+checkpointHeader = b"SCCRAWL\x02"
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the path of the checkpoint that belongs to a given .graphml file
+def checkpointPathFor(graphPath):
+	return Path(str(graphPath) + ".checkpoint")
+
+# This method writes a dict of crawler state to the checkpoint file. The state is written
+# to a temporary file that's synced and then renamed over the old checkpoint, so a crash
+# mid-write always leaves the previous checkpoint intact
+def saveCheckpoint(checkpointPath, state):
+	tempPath = str(checkpointPath) + ".tmp"
+	with open(tempPath, "wb") as checkpointFile:
+		checkpointFile.write(checkpointHeader)
+		pickle.dump(state, checkpointFile, protocol=pickle.HIGHEST_PROTOCOL)
+		checkpointFile.flush()
+		os.fsync(checkpointFile.fileno())
+	os.replace(tempPath, checkpointPath)
+
+# This method loads the dict of crawler state from a checkpoint file; it returns None if
+# there's no checkpoint, or if the file isn't a checkpoint this version can read
+def loadCheckpoint(checkpointPath):
+	if (not Path(checkpointPath).exists()):
+		return None
+	with open(checkpointPath, "rb") as checkpointFile:
+		if (checkpointFile.read(len(checkpointHeader)) != checkpointHeader):
+			log.error("*** ERROR: %s ISN'T A CHECKPOINT THIS VERSION CAN READ; IGNORING IT ***", checkpointPath)
+			return None
+		return pickle.load(checkpointFile)
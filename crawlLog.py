@@ -0,0 +1,137 @@
+
+# This module is part of the SoundCloud social network generator; it holds the crawl's logging. Messages go
+# through a standard logging.Logger, so they have levels, and their arguments are only formatted if a
+# message is actually shown (the per-artist messages are at the debug level, which is off by default, so
+# they cost next to nothing). On top of that, the most recent messages are kept in a ring buffer in memory,
+# and the crawl's progress is shown on a single line that's redrawn at most a few times per second
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import logging, shutil, sys, threading, time
+from collections import deque
+from pathlib import Path
+
+# These are the log levels, by the names used in the settings
+levelNames = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+
+# This is the logger that every part of the crawler logs to
+log = logging.getLogger("soundcloudCrawl")
+log.propagate = False
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the path that a crawl's recent log messages are written to
+def logPathFor(graphPath):
+	return Path(str(graphPath) + ".log")
+
+# This class is a logging handler that keeps the size most recent messages (as their unformatted records;
+# they're only formatted if they're written out), so there's a record of what led up to a crash
+class RecentEvents(logging.Handler):
+
+	def __init__(self, size=1000):
+		super().__init__()
+		self.records = deque(maxlen=size)
+		self.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+
+	def emit(self, record):
+		self.records.append(record)
+
+	def lines(self):
+		return [self.format(record) for record in list(self.records)]
+
+	# This method writes the recent messages to a file
+	def dump(self, path):
+		with open(path, "w", encoding="utf-8") as logFile:
+			for line in self.lines():
+				logFile.write(line + "\n")
+
+# This class is the progress line: a single line at the bottom of the terminal that update() redraws, at
+# most maxUpdatesPerSecond times per second; the text is only formatted when it's actually redrawn.
+# It's written to the given stream (or, by default, to whatever sys.stdout is at the time), and only
+# if that's a terminal (so it doesn't end up in output that's redirected to a file)
+class ProgressLine:
+
+	def __init__(self, stream=None, maxUpdatesPerSecond=4):
+		self.lock = threading.Lock()
+		self.configure(stream, maxUpdatesPerSecond)
+
+	def configure(self, stream, maxUpdatesPerSecond):
+		self.fixedStream = stream
+		self.enabled = maxUpdatesPerSecond > 0
+		self.minInterval = 1.0 / maxUpdatesPerSecond if maxUpdatesPerSecond > 0 else 0.0
+		self.lastDrawn = 0.0
+		self.text = ""
+
+	@property
+	def stream(self):
+		return self.fixedStream or sys.stdout
+
+	def update(self, message, *args):
+		if (not self.enabled):
+			return
+		now = time.monotonic()
+		if (now - self.lastDrawn < self.minInterval):
+			return
+		self.lastDrawn = now
+		if (not self.stream.isatty()):
+			return
+		with self.lock:
+			self.text = (message % args if args else message)[:shutil.get_terminal_size().columns - 1]
+			self.stream.write("\r\033[K" + self.text)
+			self.stream.flush()
+
+	# These methods take the line off the screen (while a log message is written above it), and put it back
+	def clear(self):
+		if (self.text):
+			self.stream.write("\r\033[K")
+
+	def redraw(self):
+		if (self.text):
+			self.stream.write(self.text)
+			self.stream.flush()
+
+	# This method leaves the line on the screen, and moves past it
+	def finish(self):
+		with self.lock:
+			if (self.text):
+				self.stream.write("\n")
+				self.stream.flush()
+			self.text = ""
+
+# This class is a logging handler that writes messages to the terminal, above the progress line; like the
+# progress line, it writes to whatever sys.stdout is at the time, unless it's given a stream
+class ConsoleHandler(logging.StreamHandler):
+
+	def __init__(self, progress, stream=None):
+		super().__init__(stream or sys.stdout)
+		self.fixedStream = stream
+		self.progress = progress
+
+	def emit(self, record):
+		self.stream = self.fixedStream or sys.stdout
+		with self.progress.lock:
+			self.progress.clear()
+			super().emit(record)
+			self.progress.redraw()
+
+# These are the ring buffer and the progress line that the logger uses
+recentEvents = RecentEvents()
+progress = ProgressLine()
+consoleHandler = ConsoleHandler(progress)
+log.addHandler(consoleHandler)
+log.addHandler(recentEvents)
+log.setLevel(logging.INFO)
+
+# This method (re)configures the logger: messages at the given level (or above) are written to the terminal
+# and kept in a ring buffer of the recentSize most recent ones, and the progress line is redrawn at most
+# progressRate times per second (0 turns it off)
+def configureLogging(level="info", recentSize=1000, progressRate=4, stream=None):
+	log.setLevel(levelNames[level])
+	recentEvents.records = deque(recentEvents.records, maxlen=recentSize)
+	progress.configure(stream, progressRate)
+	consoleHandler.fixedStream = stream
@@ -0,0 +1,197 @@
+
+# This module is part of the SoundCloud social network generator; it collects metrics about a crawl
+# (API latencies, pages per call, time spent writing the graph, etc.), and periodically writes them
+# to disk as JSON or in the Prometheus text format. It can also profile every Nth seed w/ cProfile
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import cProfile, json, os, threading, time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+
+# These are the upper bounds (in seconds) of the buckets in each latency histogram
+latencyBuckets = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Every metric name gets this prefix in the Prometheus output
+prometheusPrefix = "soundcloud_crawl_"
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the endpoint that an API path belongs to, so requests can be grouped
+# by it: "/users/123/followings" is "followings", "/users/123" is "users", "/resolve" is "resolve"
+def endpointFor(path):
+	parts = [part for part in path.split("/") if part]
+	if (not parts):
+		return "other"
+	if (parts[0] == "users" and len(parts) >= 3):
+		return parts[2]
+	return parts[0]
+
+# These methods return the paths that a crawl's metrics and profiles are written to
+def metricsPathFor(graphPath, metricsFormat="json"):
+	return Path("%s.metrics.%s" % (graphPath, "prom" if metricsFormat == "prometheus" else "json"))
+
+def profilePathFor(graphPath, seedIdx):
+	return Path("%s.seed%d.prof" % (graphPath, seedIdx))
+
+# This class is a histogram w/ fixed buckets; counts[idx] is how many observations fell at or
+# below buckets[idx] (and above the bucket before it), and the last count is everything slower
+class LatencyHistogram:
+
+	def __init__(self, buckets=latencyBuckets):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)
+		self.count = 0
+		self.total = 0.0
+
+	def observe(self, seconds):
+		self.counts[bisect_left(self.buckets, seconds)] += 1
+		self.count += 1
+		self.total += seconds
+
+	# This method estimates a quantile (i.e., 0.95) as the upper bound of the bucket it falls in; if
+	# it's slower than the last bucket, it returns None
+	def quantile(self, q):
+		if (not self.count):
+			return 0.0
+		seen = 0
+		for bound, count in zip(self.buckets, self.counts):
+			seen += count
+			if (seen >= q * self.count):
+				return bound
+		return None
+
+	def toDict(self):
+		return {"count": self.count, "sum": self.total, "mean": (self.total / self.count) if self.count else 0.0, "p50": self.quantile(0.5), "p95": self.quantile(0.95), "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts))}
+
+# This class holds every metric for a crawl. It's thread-safe, so the follow-back worker threads
+# can record their requests in it. There are four kinds of metrics:
+# - latency histograms, one per API endpoint (recorded for each HTTP request, retries included)
+# - calls and pages, per endpoint (one "call" is a paginated lookup, which may take several pages)
+# - counters (which only go up) and gauges (which are set to their current value)
+# - timers, which add up the time spent in a block of code (i.e., writing the graph to disk)
+class CrawlMetrics:
+
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.started = time.time()
+		self.latency = {}
+		self.calls = {}
+		self.pages = {}
+		self.counters = {}
+		self.gauges = {}
+		self.timings = {}
+
+	def observeRequest(self, endpoint, seconds):
+		with self.lock:
+			if (endpoint not in self.latency):
+				self.latency[endpoint] = LatencyHistogram()
+			self.latency[endpoint].observe(seconds)
+
+	def countCall(self, endpoint, pageCt):
+		with self.lock:
+			self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+			self.pages[endpoint] = self.pages.get(endpoint, 0) + pageCt
+
+	def increment(self, name, amount=1):
+		with self.lock:
+			self.counters[name] = self.counters.get(name, 0) + amount
+
+	def setGauge(self, name, value):
+		with self.lock:
+			self.gauges[name] = value
+
+	# This method is a context manager that adds the time spent in its block to the named timer
+	@contextmanager
+	def timer(self, name):
+		startTime = time.perf_counter()
+		try:
+			yield
+		finally:
+			elapsed = time.perf_counter() - startTime
+			with self.lock:
+				count, total = self.timings.get(name, (0, 0.0))
+				self.timings[name] = (count + 1, total + elapsed)
+
+	# This method returns every metric as a dict that can be dumped to JSON
+	def snapshot(self):
+		with self.lock:
+			return {
+				"time": time.time(),
+				"uptime": time.time() - self.started,
+				"latency": {endpoint: histogram.toDict() for endpoint, histogram in self.latency.items()},
+				"calls": dict(self.calls),
+				"pages": dict(self.pages),
+				"pagesPerCall": {endpoint: self.pages[endpoint] / self.calls[endpoint] for endpoint in self.calls if self.calls[endpoint]},
+				"counters": dict(self.counters),
+				"gauges": dict(self.gauges),
+				"timings": {name: {"count": count, "seconds": total} for name, (count, total) in self.timings.items()},
+			}
+
+	# This method returns every metric in the Prometheus text exposition format
+	def toPrometheus(self):
+		lineList = []
+		with self.lock:
+			lineList.append("# TYPE %srequest_seconds histogram" % prometheusPrefix)
+			for endpoint, histogram in sorted(self.latency.items()):
+				cumulative = 0
+				for bound, count in zip([str(bound) for bound in histogram.buckets] + ["+Inf"], histogram.counts):
+					cumulative += count
+					lineList.append('%srequest_seconds_bucket{endpoint="%s",le="%s"} %d' % (prometheusPrefix, endpoint, bound, cumulative))
+				lineList.append('%srequest_seconds_sum{endpoint="%s"} %f' % (prometheusPrefix, endpoint, histogram.total))
+				lineList.append('%srequest_seconds_count{endpoint="%s"} %d' % (prometheusPrefix, endpoint, histogram.count))
+			lineList.append("# TYPE %scalls_total counter" % prometheusPrefix)
+			lineList += ['%scalls_total{endpoint="%s"} %d' % (prometheusPrefix, endpoint, count) for endpoint, count in sorted(self.calls.items())]
+			lineList.append("# TYPE %spages_total counter" % prometheusPrefix)
+			lineList += ['%spages_total{endpoint="%s"} %d' % (prometheusPrefix, endpoint, count) for endpoint, count in sorted(self.pages.items())]
+			for name, value in sorted(self.counters.items()):
+				lineList.append("# TYPE %s%s_total counter" % (prometheusPrefix, name))
+				lineList.append("%s%s_total %s" % (prometheusPrefix, name, value))
+			for name, value in sorted(self.gauges.items()):
+				lineList.append("# TYPE %s%s gauge" % (prometheusPrefix, name))
+				lineList.append("%s%s %s" % (prometheusPrefix, name, value))
+			lineList.append("# TYPE %stime_seconds_total counter" % prometheusPrefix)
+			for name, (count, total) in sorted(self.timings.items()):
+				lineList.append('%stime_seconds_total{block="%s"} %f' % (prometheusPrefix, name, total))
+		return "\n".join(lineList) + "\n"
+
+	# This method writes the metrics to the given path (in the Prometheus format if it ends in .prom, and
+	# as JSON otherwise); it writes a temporary file and renames it, so readers never see half a file
+	def export(self, path):
+		path = Path(path)
+		text = self.toPrometheus() if path.suffix == ".prom" else json.dumps(self.snapshot(), indent=1)
+		tempPath = path.with_name(path.name + ".tmp")
+		with open(tempPath, "w") as metricsFile:
+			metricsFile.write(text)
+		os.replace(tempPath, path)
+
+# This class profiles every Nth seed of a crawl w/ cProfile, and dumps each profile to its own
+# file (which can be read w/ pstats, or a viewer like snakeviz); every=0 turns it off
+class SeedProfiler:
+
+	def __init__(self, graphPath, every=0):
+		self.graphPath = graphPath
+		self.every = every
+		self.seedIdx = 0
+		self.profile = None
+
+	def start(self):
+		self.seedIdx += 1
+		if (self.every and self.seedIdx % self.every == 0):
+			self.profile = cProfile.Profile()
+			self.profile.enable()
+
+	def stop(self):
+		if (self.profile is None):
+			return None
+		self.profile.disable()
+		profilePath = profilePathFor(self.graphPath, self.seedIdx)
+		self.profile.dump_stats(str(profilePath))
+		self.profile = None
+		return profilePath
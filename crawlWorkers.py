@@ -0,0 +1,232 @@
+
+# This script is part of the SoundCloud social network generator; it runs a crawl w/ several worker
+# processes that pull seeds from a shared frontier, and then combines their graphs into one
+#
+# Example: python crawlWorkers.py --client-id YOUR_ID --seed https://soundcloud.com/someartist --workers 4
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import argparse, multiprocessing, time
+from pathlib import Path
+import networkGenerator as ng
+from followBackPool import fetchMany
+from sharedFrontier import SharedFrontier
+from graphStore import CompactGraph
+from graphJournal import GraphJournal, replayJournal, journalPathFor
+from graphmlStream import writeCompactGraph
+from graphSnapshot import loadGraph, graphExists, writeSnapshot
+from mergeGraphs import mergeGraphArray
+from crawlMetrics import SeedProfiler, metricsPathFor
+from crawlLog import log, recentEvents, configureLogging, logPathFor
+
+# This is how long (in seconds) an idle worker waits before checking the frontier again
+idleWait = 2.0
+
+# =========================
+#          METHODS
+# =========================
+
+# These methods return the paths of the shared frontier, and of each worker's own graph
+def frontierPathFor(graphPath):
+	return Path(str(graphPath) + ".frontier.sqlite")
+
+def workerGraphPathFor(graphPath, workerIdx):
+	return Path("%s.worker%d.graphml" % (graphPath, workerIdx))
+
+# This method sets up the API client for the current process; each worker has its own request scheduler,
+# so the workers' request rates add up (and each one backs off on its own when the API pushes back)
+def setupClient(clientID):
+	ng.client = ng.makeClient(clientID)
+
+# This method explores one seed: it adds the seed and their mutual follows to the worker's graph, and
+# returns a list of (ID, name, encounter count, connected) tuples for the shared frontier
+def exploreSeed(seedID, seedName, seedInfo, following, sharedFrontier, graph, journal):
+
+	def addNode(nodeID, **attributes):
+		graph.add_node(nodeID, **attributes)
+		journal.recordNode(nodeID, attributes)
+
+	def addEdge(sourceID, targetID):
+		graph.add_edge(sourceID, targetID)
+		journal.recordEdge(sourceID, targetID)
+
+	# networkGenerator's methods count encounters in its dicts, so start them off empty for this seed
+	ng.artistEncounterDict.clear()
+	ng.artistNameDict.clear()
+	addNode(seedID, username=seedName, trackCt=seedInfo[0], followerCt=seedInfo[1], favoriteCt=seedInfo[2], url=seedInfo[3], city=seedInfo[4], country=seedInfo[5], explored=1)
+
+	# Find the seed's mutual follows in bulk if we can; otherwise, prefetch the follow-back checks
+	exploredIDs = sharedFrontier.exploredAmong(newID for newArtist, newID, newInfo in following)
+	targetIDs = [newID for newArtist, newID, newInfo in following if newID not in exploredIDs]
+	seedMutuals = ng.getMutualsFromID(seedID, targetIDs, seedInfo[1])
+	if (seedMutuals is not None):
+		ng.prefetchedFavorites.update(fetchMany(list(seedMutuals), ng.getFavoritesFromID, ng.followBackWorkers))
+	elif (ng.followBackWorkers > 1):
+		ng.prefetchFollowBack(seedID, targetIDs)
+
+	mutualIDs = set()
+	for newArtist, newID, newInfo in following:
+
+		# Add an edge back to the artist if someone's already explored them
+		if (newID in exploredIDs):
+			addEdge(seedID, newID)
+			continue
+
+		# Skip an artist if they don't follow the seed artist back
+		if (seedMutuals is not None):
+			if (newID not in seedMutuals):
+				continue
+			try:
+				ng.updateFavoritesFromID(newID, 3)
+			except Exception:
+				log.exception("*** ERROR: SOMETHING FAILED WHEN UPDATING PRIORITY RE: FAVORITES ***")
+		elif (not ng.followBack((seedID, seedName), (newID, newArtist))):
+			continue
+
+		ng.artistNameDict[newID] = newArtist
+		ng.artistEncounterDict[newID] = ng.artistEncounterDict.get(newID, 0) + 1
+		mutualIDs.add(newID)
+		addNode(newID, username=newArtist, trackCt=newInfo[0], followerCt=newInfo[1], favoriteCt=newInfo[2], url=newInfo[3], city=newInfo[4], country=newInfo[5], explored=0)
+		addEdge(seedID, newID)
+
+	ng.prefetchedFollowing.clear()
+	ng.prefetchedFavorites.clear()
+	return [(artistID, ng.artistNameDict.get(artistID), count, int(artistID in mutualIDs)) for artistID, count in ng.artistEncounterDict.items()]
+
+# This method is the main loop of a worker process: it claims seeds from the shared frontier until
+# there are none left (or it's explored maxSeeds of them), and keeps its own graph + journal (and metrics,
+# and log). The workers share one terminal, so they don't draw a progress line
+def runWorker(workerIdx, clientID, graphPath, maxSeeds):
+
+	configureLogging(ng.logLevel, ng.recentLogSize, 0)
+	setupClient(clientID)
+	sharedFrontier = SharedFrontier(frontierPathFor(graphPath))
+	workerPath = workerGraphPathFor(graphPath, workerIdx)
+	graph = loadGraph(workerPath) if graphExists(workerPath) else CompactGraph()
+	replayJournal(journalPathFor(workerPath), graph)
+	journal = GraphJournal(workerPath, snapshotFormat=ng.snapshotFormat, exportGraphml=False)
+	metricsPath = metricsPathFor(workerPath, ng.metricsFormat)
+	lastMetricsExport = time.time()
+	seedProfiler = SeedProfiler(workerPath, every=ng.profileEverySeeds)
+	exploredCt = 0
+
+	try:
+		while (maxSeeds is None or exploredCt < maxSeeds):
+
+			# Claim the next seed; if there isn't one, wait for the other workers (unless they're all done too)
+			claimed = sharedFrontier.claim(workerIdx)
+			if (claimed is None):
+				if (sharedFrontier.counts()["claimed"] == 0):
+					break
+				time.sleep(idleWait)
+				continue
+			seedID, seedName, shuffled = claimed
+
+			# Surrounding the API calls with a try/except in case they fail
+			try:
+				seedInfo = ng.getCachedInfo(seedID)
+
+				# Pass over artists above the followerThreshold (the first time they come up)
+				followerThreshold = sharedFrontier.setDefault("followerThreshold", seedInfo[1] if isinstance(seedInfo[1], int) else 0)
+				if (not shuffled and isinstance(seedInfo[1], int) and seedInfo[1] > followerThreshold):
+					log.info("[worker %d] %s is above the followerThreshold, so moving onto a new seed", workerIdx, seedName)
+					sharedFrontier.release(seedID, factor=0.2, shuffle=True)
+					continue
+				following = ng.getFollowingFromID(seedID)
+			except Exception as e:
+				log.error("*** ERROR: [worker %d] FAILED TO GRAB %s'S INFO ***", workerIdx, seedName)
+
+				# A dropped seed is marked done, so no worker claims them again
+				if (ng.dropFailedSeed(seedID, e, seedName)):
+					sharedFrontier.markDone(seedID)
+				else:
+					sharedFrontier.release(seedID, factor=ng.failedSeedFactor)
+				continue
+
+			log.info("[worker %d] Exploring %s (ID: %s)", workerIdx, seedName, seedID)
+			seedProfiler.start()
+			encounterList = exploreSeed(seedID, seedName, seedInfo, following, sharedFrontier, graph, journal)
+			with ng.metrics.timer("journalFlush"):
+				ng.metrics.increment("nodesAndEdgesJournaled", journal.flush())
+			sharedFrontier.addEncounters(encounterList)
+			sharedFrontier.markDone(seedID)
+			seedProfiler.stop()
+			ng.metrics.increment("seedsExplored")
+			exploredCt += 1
+
+			if (ng.metricsInterval and time.time() - lastMetricsExport >= ng.metricsInterval):
+				exportWorkerMetrics(metricsPath, graph, sharedFrontier)
+				lastMetricsExport = time.time()
+
+	finally:
+		with ng.metrics.timer("graphCompact"):
+			journal.compact(graph)
+		if (ng.metricsInterval):
+			exportWorkerMetrics(metricsPath, graph, sharedFrontier)
+		recentEvents.dump(logPathFor(workerPath))
+		sharedFrontier.close()
+
+# This method writes a worker's metrics; for the shared frontier, the explored artists (whose rows stay
+# in the table) count as its tombstones
+def exportWorkerMetrics(metricsPath, graph, sharedFrontier):
+	stateCounts = sharedFrontier.counts()
+	totalCt = sum(stateCounts.values())
+	ng.exportMetrics(metricsPath, graph, stateCounts["open"], stateCounts["done"] / totalCt if totalCt else 0.0)
+
+# This method combines the graph at graphPath (if there is one) w/ every worker's graph, and writes the result
+def combineWorkerGraphs(graphPath, workerCt):
+	graphPathArray = [Path(graphPath)] if graphExists(graphPath) else []
+	graphPathArray += [workerGraphPathFor(graphPath, workerIdx) for workerIdx in range(workerCt) if graphExists(workerGraphPathFor(graphPath, workerIdx))]
+	mergedGraph = mergeGraphArray([loadGraph(curPath) for curPath in graphPathArray])
+	if (ng.exportGraphml):
+		writeCompactGraph(mergedGraph, graphPath)
+	writeSnapshot(mergedGraph, graphPath, ng.snapshotFormat)
+	return mergedGraph
+
+# =========================
+#           MAIN
+# =========================
+
+if (__name__ == "__main__"):
+
+	parser = argparse.ArgumentParser(description="Crawl SoundCloud w/ several worker processes that share one frontier.")
+	parser.add_argument("--client-id", required=True, help="your SoundCloud client ID")
+	parser.add_argument("--seed", action="append", default=[], help="the SoundCloud URL of a starting artist (can be given more than once)")
+	parser.add_argument("--graph", help="the .graphml file to write (defaults to [first seed artist].graphml)")
+	parser.add_argument("--workers", type=int, default=4, help="the number of worker processes")
+	parser.add_argument("--max-seeds", type=int, default=None, help="the most seeds each worker will explore")
+	args = parser.parse_args()
+
+	# Look up the starting seeds
+	setupClient(args.client_id)
+	seeds = [ng.getArtistID(url.strip()) for url in args.seed]
+	if (args.graph is None and not seeds):
+		parser.error("either --graph (to resume a crawl) or at least one --seed is needed")
+	graphPath = args.graph or (seeds[0][0] + ".graphml")
+
+	# Set up the shared frontier; any claims left over from a crawl that was stopped are released
+	sharedFrontier = SharedFrontier(frontierPathFor(graphPath))
+	sharedFrontier.releaseAllClaims()
+	sharedFrontier.addEncounters([(seedID, seedName, 1, 1) for seedName, seedID in seeds])
+	sharedFrontier.close()
+
+	# Start the workers in fresh processes, and wait for them to finish (or for CTRL+C)
+	context = multiprocessing.get_context("spawn")
+	workerList = [context.Process(target=runWorker, args=(workerIdx, args.client_id, graphPath, args.max_seeds)) for workerIdx in range(args.workers)]
+	for worker in workerList:
+		worker.start()
+	try:
+		for worker in workerList:
+			worker.join()
+	except KeyboardInterrupt:
+		log.info("\nStopping the workers...")
+		for worker in workerList:
+			worker.join()
+
+	# Combine the workers' graphs
+	curTime = time.time()
+	mergedGraph = combineWorkerGraphs(graphPath, args.workers)
+	log.info("Wrote %d nodes and %d edges to %s in %.3f seconds", mergedGraph.number_of_nodes(), mergedGraph.number_of_edges(), graphPath, time.time() - curTime)
@@ -0,0 +1,145 @@
+
+# This script is part of the SoundCloud social network generator; it cuts a crawl graph (or a merged one)
+# down to a subgraph that's small enough to open in Gephi. The graph is streamed in from its snapshot
+# (or .graphml) into the compact store, and the filters work on arrays of row indices w/ numpy, so nothing
+# is ever loaded into networkx. These filters can be combined, and are applied in this order:
+# - explored-only: only the artists the crawl explored
+# - ego: the artists within N hops of one or more given artists (following edges in either direction)
+# - k-core: the largest subgraph in which every artist has at least k edges (in + out)
+# - top-N: the N artists w/ the most edges (or the most followers)
+#
+# Example: python exportSubgraph.py "Big Merge.graphml" --output "Big Merge core.graphml" --k-core 10 --top 3000
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import argparse, time
+import numpy as np
+import pandas as pd
+from graphSnapshot import graphExists, writeSnapshot, nodeFrameOf, graphFromFrames
+from graphJournal import loadJournaledGraph
+from graphmlStream import writeCompactGraph
+
+# These are the ways artists can be ranked by the top-N filter
+rankings = ["degree", "followerCt"]
+
+# =========================
+#          METHODS
+# =========================
+
+# This class holds a crawl graph as arrays: the node table, and the (source row, target row) of each distinct
+# edge. Each filter narrows down keep, the mask of rows still in the subgraph; an edge is in the subgraph
+# if both of its ends are
+class SubgraphFilter:
+
+	def __init__(self, graph):
+		self.graph = graph
+		self.nodeFrame = nodeFrameOf(graph)
+		self.nodeIDs = self.nodeFrame["id"].to_numpy()
+		self.sources, self.targets = graph.distinctEdgeRows()
+		self.keep = np.ones(len(self.nodeIDs), dtype=bool)
+
+	# This method returns the mask of the edges still in the subgraph
+	def keptEdges(self):
+		return self.keep[self.sources] & self.keep[self.targets]
+
+	# This method returns the degree (in + out) of every row, counting only the edges still in the subgraph
+	def degrees(self):
+		edgeMask = self.keptEdges()
+		return np.bincount(self.sources[edgeMask], minlength=len(self.nodeIDs)) + np.bincount(self.targets[edgeMask], minlength=len(self.nodeIDs))
+
+	# This method drops the artists the crawl didn't explore
+	def keepExplored(self):
+		self.keep &= self.nodeFrame["explored"].to_numpy() == 1
+
+	# This method drops every artist more than hops edges away from the given artists; each hop follows the
+	# edges in either direction, and only goes through artists still in the subgraph
+	def keepEgo(self, artists, hops=1):
+		reached = np.zeros(len(self.nodeIDs), dtype=bool)
+		reached[[self.graph.rowOf(artist) for artist in artists]] = True
+		reached &= self.keep
+		edgeMask = self.keptEdges()
+		sources, targets = self.sources[edgeMask], self.targets[edgeMask]
+		for hop in range(hops):
+			newlyReached = np.zeros(len(self.nodeIDs), dtype=bool)
+			newlyReached[targets[reached[sources]]] = True
+			newlyReached[sources[reached[targets]]] = True
+			newlyReached &= ~reached
+			if (not newlyReached.any()):
+				break
+			reached |= newlyReached
+		self.keep &= reached
+
+	# This method drops artists until every one that's left has at least k edges (in + out) to the others,
+	# i.e. it keeps the k-core. All of the artists below k are dropped at once, and the degrees are counted
+	# again, until there are none left to drop
+	def keepKCore(self, k):
+		while (True):
+			below = self.keep & (self.degrees() < k)
+			if (not below.any()):
+				break
+			self.keep &= ~below
+
+	# This method keeps the n artists w/ the highest degree (or follower count); ties go to the artist w/ the
+	# lower row, i.e. the one that was added to the graph first
+	def keepTop(self, n, rankBy="degree"):
+		keptRows = np.flatnonzero(self.keep)
+		if (len(keptRows) <= n):
+			return
+		values = self.degrees() if rankBy == "degree" else self.graph.counts["followerCt"].values()
+		topRows = keptRows[np.argsort(-values[keptRows], kind="stable")[:n]]
+		self.keep[:] = False
+		self.keep[topRows] = True
+
+	# This method builds the subgraph as a compact graph
+	def subgraph(self):
+		edgeMask = self.keptEdges()
+		edgeFrame = pd.DataFrame({"source": self.nodeIDs[self.sources[edgeMask]], "target": self.nodeIDs[self.targets[edgeMask]]})
+		return graphFromFrames(self.nodeFrame[self.keep].reset_index(drop=True), edgeFrame)
+
+# =========================
+#           MAIN
+# =========================
+
+if (__name__ == "__main__"):
+
+	parser = argparse.ArgumentParser(description="Cut a crawl graph down to a subgraph that's small enough for Gephi.")
+	parser.add_argument("graph", help="the .graphml file of the graph (its snapshot is used if it has one)")
+	parser.add_argument("--output", required=True, help="the .graphml file to write the subgraph to")
+	parser.add_argument("--explored-only", action="store_true", help="only keep the artists the crawl explored")
+	parser.add_argument("--ego", action="append", default=[], help="only keep the artists near this artist, given by SoundCloud ID or username (can be given more than once)")
+	parser.add_argument("--hops", type=int, default=1, help="how many edges away from the --ego artists to go")
+	parser.add_argument("--k-core", type=int, default=None, help="only keep the k-core, i.e. the artists w/ at least this many edges to the others")
+	parser.add_argument("--top", type=int, default=None, help="only keep this many artists, ranked by --rank-by")
+	parser.add_argument("--rank-by", choices=rankings, default="degree", help="how --top ranks the artists")
+	args = parser.parse_args()
+	if (not graphExists(args.graph)):
+		parser.error("there's no graph at %s" % args.graph)
+	if (not (args.explored_only or args.ego or args.k_core is not None or args.top is not None)):
+		parser.error("at least one of --explored-only, --ego, --k-core or --top is needed")
+
+	curTime = time.time()
+	subgraphFilter = SubgraphFilter(loadJournaledGraph(args.graph))
+	print("Loaded %d artists and %d edges in %.3f seconds" % (len(subgraphFilter.nodeIDs), len(subgraphFilter.sources), time.time() - curTime))
+
+	# Apply the filters, in order
+	curTime = time.time()
+	if (args.explored_only):
+		subgraphFilter.keepExplored()
+	if (args.ego):
+		try:
+			subgraphFilter.keepEgo(args.ego, args.hops)
+		except KeyError as e:
+			parser.error(e.args[0])
+	if (args.k_core is not None):
+		subgraphFilter.keepKCore(args.k_core)
+	if (args.top is not None):
+		subgraphFilter.keepTop(args.top, args.rank_by)
+	subgraph = subgraphFilter.subgraph()
+	print("Cut it down to %d artists and %d edges in %.3f seconds" % (subgraph.number_of_nodes(), subgraph.number_of_edges(), time.time() - curTime))
+
+	writeCompactGraph(subgraph, args.output)
+	writeSnapshot(subgraph, args.output)
+	print("Wrote the subgraph to %s" % args.output)
@@ -0,0 +1,36 @@
+
+# This module is part of the SoundCloud social network generator; it fetches the data needed
+# for follow-back checks for many artists at once, using a bounded pool of threads
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from crawlLog import log
+
+# =========================
+#          METHODS
+# =========================
+
+# This method calls fetchMethod(ID) for each ID in the list, running at most maxWorkers
+# calls at the same time. It returns a dict of {ID: result}; IDs whose fetch raised an
+# exception are left out, so the caller can fall back to fetching them one at a time.
+# Nothing is applied to the graph here - the caller consumes the results in its own order.
+def fetchMany(IDs, fetchMethod, maxWorkers):
+
+	results = {}
+	if (not IDs):
+		return results
+
+	with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+		futureDict = {executor.submit(fetchMethod, curID): curID for curID in IDs}
+		for future in as_completed(futureDict):
+			curID = futureDict[future]
+			try:
+				results[curID] = future.result()
+			except Exception:
+				log.error("*** ERROR: FAILED TO PREFETCH DATA FOR ID %s; IT'LL BE FETCHED LATER ***", curID)
+
+	return results
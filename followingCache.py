@@ -0,0 +1,159 @@
+
+# This module is part of the SoundCloud social network generator; it holds the on-disk cache
+# of following lists, which lets the crawler skip re-fetching them within a run and between runs
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import sqlite3, threading, time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is a compact, read-only set of SoundCloud IDs. It keeps the IDs in a sorted
+# array of 64-bit ints (8 bytes per ID, rather than ~100 bytes for a dict entry), and
+# answers "is this ID in the set?" w/ a binary search
+class SortedIDs:
+
+	def __init__(self, IDs=()):
+		self.IDs = array('q', sorted(set(IDs)))
+
+	# This method rebuilds a SortedIDs object from the bytes written by toBytes()
+	@classmethod
+	def fromBytes(cls, blob):
+		newSet = cls()
+		newSet.IDs.frombytes(blob)
+		return newSet
+
+	def toBytes(self):
+		return self.IDs.tobytes()
+
+	def __contains__(self, ID):
+		idx = bisect_left(self.IDs, ID)
+		return idx < len(self.IDs) and self.IDs[idx] == ID
+
+	def __iter__(self):
+		return iter(self.IDs)
+
+	def __len__(self):
+		return len(self.IDs)
+
+# This class is the following-list cache. Entries live in a SQLite file (keyed by SoundCloud user ID),
+# and the most recently used ones are also held in memory. Entries older than ttl seconds are treated
+# as misses, and once the file holds more than maxEntries lists, the least recently used ones are evicted.
+# It's safe to use from the follow-back worker threads, and from several crawl processes at once.
+class FollowingCache:
+
+	def __init__(self, path, ttl=7*24*60*60, maxEntries=50000, memoryEntries=2000):
+		self.ttl = ttl
+		self.maxEntries = maxEntries
+		self.memoryEntries = memoryEntries
+		self.memory = OrderedDict()
+		self.accessed = {}
+		self.lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.connection = sqlite3.connect(str(path), timeout=60, check_same_thread=False)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS following (userID INTEGER PRIMARY KEY, fetched REAL, accessed REAL, IDs BLOB)")
+		self.connection.execute("CREATE INDEX IF NOT EXISTS followingAccessed ON following (accessed)")
+		self.connection.commit()
+
+	# This method returns the cached following list (as a SortedIDs) for the given user, or None. Hits on the
+	# in-memory entries don't write to the file right away; the time they were used is written back in
+	# one batch before evict() picks the least recently used entries (and when the cache is closed)
+	def get(self, userID):
+		with self.lock:
+			now = time.time()
+
+			# First, check the in-memory entries
+			if (userID in self.memory):
+				fetched, IDs = self.memory[userID]
+				if (now - fetched <= self.ttl):
+					self.memory.move_to_end(userID)
+					self.accessed[userID] = now
+					self.hits += 1
+					return IDs
+				del self.memory[userID]
+
+			# Then, check the SQLite file
+			row = self.connection.execute("SELECT fetched, IDs FROM following WHERE userID = ?", (userID,)).fetchone()
+			if (row is None or now - row[0] > self.ttl):
+				self.misses += 1
+				return None
+			self.connection.execute("UPDATE following SET accessed = ? WHERE userID = ?", (now, userID))
+			self.connection.commit()
+			IDs = SortedIDs.fromBytes(row[1])
+			self.rememberInMemory(userID, row[0], IDs)
+			self.hits += 1
+			return IDs
+
+	# This method checks whether a fresh entry exists for the given user, without counting a hit or miss
+	def __contains__(self, userID):
+		with self.lock:
+			cutoff = time.time() - self.ttl
+			if (userID in self.memory):
+				return self.memory[userID][0] >= cutoff
+			row = self.connection.execute("SELECT fetched FROM following WHERE userID = ?", (userID,)).fetchone()
+			return row is not None and row[0] >= cutoff
+
+	# This method adds a following list to the cache, and returns it as a SortedIDs
+	def put(self, userID, followingIDs):
+		IDs = followingIDs if isinstance(followingIDs, SortedIDs) else SortedIDs(followingIDs)
+		with self.lock:
+			now = time.time()
+			self.connection.execute("INSERT OR REPLACE INTO following VALUES (?, ?, ?, ?)", (userID, now, now, IDs.toBytes()))
+			self.connection.commit()
+			self.accessed.pop(userID, None)
+			self.rememberInMemory(userID, now, IDs)
+		return IDs
+
+	# This helper method adds an entry to the in-memory LRU (the lock is already held by the caller)
+	def rememberInMemory(self, userID, fetched, IDs):
+		self.memory[userID] = (fetched, IDs)
+		self.memory.move_to_end(userID)
+		while (len(self.memory) > self.memoryEntries):
+			self.memory.popitem(last=False)
+
+	# This helper method writes the times the in-memory entries were last used back to the file (the lock is
+	# already held by the caller)
+	def writeAccessed(self):
+		if (self.accessed):
+			self.connection.executemany("UPDATE following SET accessed = ? WHERE userID = ?", ((accessed, userID) for userID, accessed in self.accessed.items()))
+			self.accessed = {}
+
+	# This method drops expired entries, and trims the file down to maxEntries (least recently used go first);
+	# the entries it drops are taken out of memory too, so they aren't served from there afterwards
+	def evict(self):
+		with self.lock:
+			cutoff = time.time() - self.ttl
+			self.writeAccessed()
+			self.connection.execute("DELETE FROM following WHERE fetched < ?", (cutoff,))
+			entryCt = self.connection.execute("SELECT COUNT(*) FROM following").fetchone()[0]
+			evictedIDs = []
+			if (entryCt > self.maxEntries):
+				evictedIDs = [row[0] for row in self.connection.execute("SELECT userID FROM following ORDER BY accessed LIMIT ?", (entryCt - self.maxEntries,))]
+				self.connection.executemany("DELETE FROM following WHERE userID = ?", ((userID,) for userID in evictedIDs))
+			self.connection.commit()
+			for userID in evictedIDs:
+				self.memory.pop(userID, None)
+			for userID in [key for key, value in self.memory.items() if value[0] < cutoff]:
+				del self.memory[userID]
+
+	# This method returns the hit / miss counters, and the fraction of lookups that were hits
+	def stats(self):
+		lookups = self.hits + self.misses
+		return {"hits": self.hits, "misses": self.misses, "hitRatio": (self.hits / lookups) if lookups else 0.0}
+
+	def close(self):
+		with self.lock:
+			self.writeAccessed()
+			self.connection.commit()
+			self.connection.close()
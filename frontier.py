@@ -0,0 +1,156 @@
+
+# This module is part of the SoundCloud social network generator; it holds the priority queue
+# that the crawler uses as its frontier (the artists it could explore next)
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import heapq, itertools
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is an indexed binary min-heap. Each item appears in the heap at most once, and a dict keeps
+# track of where it is, so changing an item's priority (or removing it) happens in place in O(log n),
+# rather than leaving a "removed" placeholder behind in the heap. Items w/ equal priorities come out in
+# the order they were last pushed. Since Python dicts never shrink on their own, the index is rebuilt
+# once enough items have been removed from it
+class IndexedHeap:
+
+	def __init__(self):
+		self.heap = []
+		self.position = {}
+		self.counter = itertools.count()
+		self.removedCt = 0
+
+	def __len__(self):
+		return len(self.heap)
+
+	def __contains__(self, item):
+		return item in self.position
+
+	# This method adds an item to the heap, or changes its priority if it's already in there
+	def push(self, item, priority):
+		entry = (priority, next(self.counter), item)
+		if (item in self.position):
+			idx = self.position[item]
+			oldEntry = self.heap[idx]
+			self.heap[idx] = entry
+			if (entry < oldEntry):
+				self.siftUp(idx)
+			else:
+				self.siftDown(idx)
+		else:
+			self.heap.append(entry)
+			self.position[item] = len(self.heap) - 1
+			self.siftUp(len(self.heap) - 1)
+
+	# This method removes the item w/ the lowest priority, and returns (item, priority); if
+	# the heap is empty, it returns None
+	def pop(self):
+		if (not self.heap):
+			return None
+		priority, count, item = self.heap[0]
+		self.removeAt(0)
+		return (item, priority)
+
+	# This method removes an item from the heap
+	def remove(self, item):
+		self.removeAt(self.position[item])
+
+	# This method returns the priority of an item in the heap
+	def priority(self, item):
+		return self.heap[self.position[item]][0]
+
+	# This method returns the k lowest-priority (item, priority) pairs, in order, without changing the
+	# heap; it only looks at the parts of the heap that could hold them, so it takes O(k log k) time
+	def topK(self, k):
+		topList = []
+		if (not self.heap):
+			return topList
+		candidates = [(self.heap[0], 0)]
+		while (candidates and len(topList) < k):
+			entry, idx = heapq.heappop(candidates)
+			topList.append((entry[2], entry[0]))
+			for childIdx in (2 * idx + 1, 2 * idx + 2):
+				if (childIdx < len(self.heap)):
+					heapq.heappush(candidates, (self.heap[childIdx], childIdx))
+		return topList
+
+	# This method returns every (item, priority) pair in the heap, in no particular order
+	def items(self):
+		return [(entry[2], entry[0]) for entry in self.heap]
+
+	# This method returns the fraction of the item index that's taken up by removed items (which
+	# the index still holds memory for, until the next compact())
+	def tombstoneRatio(self):
+		return self.removedCt / (len(self.heap) + self.removedCt) if self.removedCt else 0.0
+
+	# This method rebuilds the item index, which releases the memory held by removed items
+	def compact(self):
+		self.position = dict(self.position)
+		self.removedCt = 0
+
+	# This helper method removes the entry at the given index, filling the hole w/ the last entry
+	def removeAt(self, idx):
+		lastEntry = self.heap.pop()
+		if (idx < len(self.heap)):
+			del self.position[self.heap[idx][2]]
+			self.heap[idx] = lastEntry
+			self.position[lastEntry[2]] = idx
+			self.siftUp(idx)
+			self.siftDown(self.position[lastEntry[2]])
+		else:
+			del self.position[lastEntry[2]]
+		self.removedCt += 1
+		if (self.removedCt > max(1024, len(self.heap))):
+			self.compact()
+
+	# This helper method moves the entry at idx up the heap until its parent is smaller
+	def siftUp(self, idx):
+		heap = self.heap
+		entry = heap[idx]
+		while (idx > 0):
+			parentIdx = (idx - 1) >> 1
+			parent = heap[parentIdx]
+			if (not entry < parent):
+				break
+			heap[idx] = parent
+			self.position[parent[2]] = idx
+			idx = parentIdx
+		heap[idx] = entry
+		self.position[entry[2]] = idx
+
+	# This helper method moves the entry at idx down the heap until its children are larger
+	def siftDown(self, idx):
+		heap = self.heap
+		size = len(heap)
+		entry = heap[idx]
+		while (True):
+			childIdx = 2 * idx + 1
+			if (childIdx >= size):
+				break
+			if (childIdx + 1 < size and heap[childIdx + 1] < heap[childIdx]):
+				childIdx += 1
+			child = heap[childIdx]
+			if (not child < entry):
+				break
+			heap[idx] = child
+			self.position[child[2]] = idx
+			idx = childIdx
+		heap[idx] = entry
+		self.position[entry[2]] = idx
+
+	# These methods let the heap be pickled (i.e., into a crawl checkpoint); itertools.count
+	# objects can't always be pickled, so the counter is saved as its next value
+	def __getstate__(self):
+		return {"heap": self.heap, "counter": next(self.counter)}
+
+	def __setstate__(self, state):
+		self.heap = state["heap"]
+		self.position = {entry[2]: idx for idx, entry in enumerate(self.heap)}
+		self.counter = itertools.count(state["counter"])
+		self.removedCt = 0
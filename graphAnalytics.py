@@ -0,0 +1,230 @@
+
+# This script is part of the SoundCloud social network generator; it finds related artists in a crawl
+# graph. The graph is loaded into a sparse adjacency matrix (w/ scipy.sparse), and everything is computed
+# w/ matrix operations, rather than Python loops over networkx nodes:
+# - co-follower similarity: the Jaccard or cosine similarity of two artists' sets of followers (or of
+#   the sets of artists they follow)
+# - personalized PageRank: where random walks along follows that restart at one or more seeds end up
+# - top-N recommendations for an artist (or for every artist, written to a .csv)
+#
+# Example: python graphAnalytics.py "Some Artist.graphml" --artist "Some Artist" --method jaccard --top 20
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import argparse, sys, time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+from graphSnapshot import graphExists
+from graphJournal import loadJournaledGraph
+from graphStore import missingCount
+
+# These are the ways artists can be compared; "pagerank" ranks them by personalized PageRank from the artist
+similarityMethods = ["jaccard", "cosine"]
+recommendMethods = similarityMethods + ["pagerank"]
+
+# These settings control personalized PageRank: the chance a walk keeps going at each step (rather than
+# restarting at a seed), and when the power iteration stops (once the scores change by less than
+# pagerankTolerance in total, or after pagerankMaxIterations steps)
+pagerankDamping = 0.85
+pagerankTolerance = 1e-10
+pagerankMaxIterations = 200
+
+# Similarities for every artist are computed this many artists at a time, which bounds the memory it takes
+similarityBlockRows = 1024
+
+# =========================
+#          METHODS
+# =========================
+
+# This class holds a crawl graph as sparse matrices. Row i of follows has a 1 in column j if artist i
+# follows artist j (i.e., there's an edge from i to j); followers is its transpose, so row j holds the
+# artists who follow j. Artists are referred to by row index internally, and by SoundCloud ID outside
+class GraphAnalytics:
+
+	def __init__(self, graph):
+		self.graph = graph
+		nodeCt = len(graph.nodeIDs)
+		self.nodeIDs = graph.nodeIDs.values().copy()
+		self.usernameArray = np.array(graph.strings.strings, dtype=object)[graph.stringRows["username"].values()]
+		sources, targets = graph.distinctEdgeRows()
+		self.follows = sparse.csr_matrix((np.ones(len(sources)), (sources, targets)), shape=(nodeCt, nodeCt))
+		self.followers = self.follows.T.tocsr()
+		self.transition = None
+
+	# This method returns the matrix whose rows are the sets that similarities are computed over: each
+	# artist's followers (co-follower similarity), or the artists each one follows
+	def setMatrix(self, basis="followers"):
+		return self.followers if basis == "followers" else self.follows
+
+	# This method computes the similarity of the artists in the given rows to every other artist, and returns
+	# it as three arrays (index into rows, row of the other artist, similarity); pairs w/ no overlap are left out
+	def similarityBlock(self, rows, method="jaccard", basis="followers"):
+		setMatrix = self.setMatrix(basis)
+		setSizes = np.diff(setMatrix.indptr).astype(np.float64)
+		overlap = (setMatrix[rows] @ setMatrix.T).tocoo()
+		leftSizes = setSizes[np.asarray(rows)[overlap.row]]
+		rightSizes = setSizes[overlap.col]
+		if (method == "cosine"):
+			scores = overlap.data / np.sqrt(leftSizes * rightSizes)
+		else:
+			scores = overlap.data / (leftSizes + rightSizes - overlap.data)
+		return overlap.row, overlap.col, scores
+
+	# This method runs personalized PageRank from the given seed rows, by power iteration. A walk follows a
+	# random outgoing edge w/ probability pagerankDamping, and otherwise jumps back to a random seed (as it
+	# does from an artist w/o any outgoing edges); it returns each artist's score, which add up to 1
+	def personalizedPagerank(self, seedRows, damping=pagerankDamping, tolerance=pagerankTolerance, maxIterations=pagerankMaxIterations):
+		nodeCt = len(self.nodeIDs)
+		if (self.transition is None):
+			outDegrees = np.diff(self.follows.indptr).astype(np.float64)
+			self.dangling = outDegrees == 0
+			self.transition = (sparse.diags(1.0 / np.maximum(outDegrees, 1)) @ self.follows).T.tocsr()
+		restart = np.zeros(nodeCt)
+		restart[list(seedRows)] = 1.0 / len(seedRows)
+		scores = restart.copy()
+		for iteration in range(maxIterations):
+			newScores = damping * (self.transition @ scores) + (damping * scores[self.dangling].sum() + 1.0 - damping) * restart
+			change = np.abs(newScores - scores).sum()
+			scores = newScores
+			if (change < tolerance):
+				break
+		return scores
+
+	# This method returns the top-n artists related to the given artist as a DataFrame (w/ their ID, username,
+	# follower count and score), best first. The artist themselves are left out, as are the artists they
+	# already follow, unless includeFollowed is True
+	def recommend(self, artist, n=20, method="jaccard", basis="followers", includeFollowed=False):
+		return self.recommendForSeeds([artist], n, method, basis, includeFollowed)
+
+	# This method is recommend() for several artists at once: similarities are summed over the seeds, and
+	# personalized PageRank restarts at any of them
+	def recommendForSeeds(self, artists, n=20, method="jaccard", basis="followers", includeFollowed=False):
+		seedRows = sorted(set(self.graph.rowOf(artist) for artist in artists))
+		if (method == "pagerank"):
+			scores = self.personalizedPagerank(seedRows)
+		else:
+			blockRows, otherRows, blockScores = self.similarityBlock(seedRows, method, basis)
+			scores = np.bincount(otherRows, weights=blockScores, minlength=len(self.nodeIDs))
+
+		# Drop the seeds, (usually) the artists they follow, and anyone w/ no score at all
+		excluded = np.zeros(len(self.nodeIDs), dtype=bool)
+		excluded[seedRows] = True
+		if (not includeFollowed):
+			excluded[self.follows[seedRows].indices] = True
+		candidates = np.flatnonzero(~excluded & (scores > 0))
+		topRows = candidates[np.argsort(-scores[candidates], kind="stable")[:n]]
+		return self.describeRows(topRows, scores[topRows])
+
+	# This method returns the top-n recommendations for every artist (or only the explored ones) as a
+	# DataFrame w/ a row per (artist, recommendation); it only works w/ the similarity methods, and
+	# computes similarityBlockRows artists at a time
+	def recommendAll(self, n=20, method="jaccard", basis="followers", includeFollowed=False, exploredOnly=False):
+		if (method not in similarityMethods):
+			raise ValueError("Recommendations for every artist only work w/ %s" % " or ".join(similarityMethods))
+		allRows = np.arange(len(self.nodeIDs))
+		if (exploredOnly):
+			allRows = allRows[self.graph.explored.values() == 1]
+
+		frameList = []
+		for startIdx in range(0, len(allRows), similarityBlockRows):
+			rows = allRows[startIdx:startIdx+similarityBlockRows]
+			blockRows, otherRows, scores = self.similarityBlock(rows, method, basis)
+
+			# Leave out each artist's similarity to themselves, and (usually) to the artists they follow
+			keep = rows[blockRows] != otherRows
+			if (not includeFollowed):
+				followed = self.follows[rows].tocoo()
+				keep &= ~np.isin(blockRows * len(self.nodeIDs) + otherRows, followed.row * len(self.nodeIDs) + followed.col)
+			blockRows, otherRows, scores = blockRows[keep], otherRows[keep], scores[keep]
+
+			# The pairs come grouped by artist, so narrow each artist's pairs down to their n best (plus any ties
+			# w/ the nth) w/ a partial sort; then, sort what's left by artist and score, and keep the first n
+			bounds = np.searchsorted(blockRows, np.arange(len(rows) + 1))
+			keep = np.ones(len(scores), dtype=bool)
+			for rowIdx in np.flatnonzero(np.diff(bounds) > n):
+				rowScores = scores[bounds[rowIdx]:bounds[rowIdx+1]]
+				keep[bounds[rowIdx]:bounds[rowIdx+1]] = rowScores >= np.partition(rowScores, len(rowScores) - n)[len(rowScores) - n]
+			blockRows, otherRows, scores = blockRows[keep], otherRows[keep], scores[keep]
+			order = np.lexsort((otherRows, -scores, blockRows))
+			blockRows, otherRows, scores = blockRows[order], otherRows[order], scores[order]
+			ranks = np.arange(len(blockRows)) - np.searchsorted(blockRows, blockRows)
+			top = ranks < n
+			frame = self.describeRows(otherRows[top], scores[top])
+			frame.insert(0, "rank", ranks[top] + 1)
+			frame.insert(0, "artistUsername", self.usernames(rows[blockRows[top]]))
+			frame.insert(0, "artistID", self.nodeIDs[rows[blockRows[top]]])
+			frameList.append(frame)
+		if (not frameList):
+			return pd.DataFrame(columns=["artistID", "artistUsername", "rank", "id", "username", "followerCt", "score"])
+		return pd.concat(frameList, ignore_index=True)
+
+	# These helper methods look up the IDs, usernames and follower counts of the given rows
+	def usernames(self, rows):
+		return self.usernameArray[rows]
+
+	def describeRows(self, rows, scores):
+		followerCts = self.graph.counts["followerCt"].values()
+		return pd.DataFrame({
+			"id": self.nodeIDs[rows],
+			"username": self.usernames(rows),
+			"followerCt": pd.arrays.IntegerArray(followerCts[rows].copy(), followerCts[rows] == missingCount),
+			"score": scores,
+		})
+
+# =========================
+#           MAIN
+# =========================
+
+if (__name__ == "__main__"):
+
+	parser = argparse.ArgumentParser(description="Find related artists in a crawl graph.")
+	parser.add_argument("graph", help="the .graphml file of the crawl (its snapshot is used if it has one)")
+	parser.add_argument("--artist", action="append", default=[], help="the SoundCloud ID or username of an artist to find related artists for (can be given more than once)")
+	parser.add_argument("--all", action="store_true", help="find related artists for every artist in the graph (needs --output)")
+	parser.add_argument("--method", choices=recommendMethods, default="jaccard", help="how artists are compared")
+	parser.add_argument("--basis", choices=["followers", "following"], default="followers", help="compare artists by who follows them, or by who they follow")
+	parser.add_argument("--combine", action="store_true", help="rank artists related to all of the --artist artists together, rather than to each of them")
+	parser.add_argument("--top", type=int, default=20, help="the number of related artists to list for each artist")
+	parser.add_argument("--include-followed", action="store_true", help="don't leave out the artists an artist already follows")
+	parser.add_argument("--explored-only", action="store_true", help="w/ --all, only list related artists for explored artists")
+	parser.add_argument("--output", help="a .csv file to write the results to")
+	args = parser.parse_args()
+	if (not graphExists(args.graph)):
+		parser.error("there's no graph at %s" % args.graph)
+	if (not args.all and not args.artist):
+		parser.error("either --artist or --all is needed")
+	if (args.all and (args.method == "pagerank" or not args.output)):
+		parser.error("--all needs --output, and one of the methods %s" % ", ".join(similarityMethods))
+
+	curTime = time.time()
+	analytics = GraphAnalytics(loadJournaledGraph(args.graph))
+	print("Loaded %d artists and %d follows in %.3f seconds" % (len(analytics.nodeIDs), analytics.follows.nnz, time.time() - curTime), file=sys.stderr)
+
+	# Find the related artists
+	curTime = time.time()
+	try:
+		if (args.all):
+			results = analytics.recommendAll(args.top, args.method, args.basis, args.include_followed, args.explored_only)
+		elif (args.combine):
+			results = analytics.recommendForSeeds(args.artist, args.top, args.method, args.basis, args.include_followed)
+		else:
+			frameList = []
+			for artist in args.artist:
+				frame = analytics.recommend(artist, args.top, args.method, args.basis, args.include_followed)
+				frame.insert(0, "rank", np.arange(1, len(frame) + 1))
+				frame.insert(0, "artist", artist)
+				frameList.append(frame)
+			results = pd.concat(frameList, ignore_index=True)
+	except KeyError as e:
+		parser.error(e.args[0])
+	print("Found %d related artists in %.3f seconds" % (len(results), time.time() - curTime), file=sys.stderr)
+
+	if (args.output):
+		results.to_csv(args.output, index=False)
+		print("Wrote them to %s" % args.output, file=sys.stderr)
+	else:
+		print(results.to_string(index=False))
@@ -0,0 +1,124 @@
+
+# This module is part of the SoundCloud social network generator; it holds the parsed-graph cache. Parsing
+# a big .graphml file takes a while, so once one has been parsed, its compact graph is saved as a Feather
+# snapshot in the cache directory, under the hash of the file's contents. The next time the same file
+# (or a copy of it) is loaded, the snapshot is read instead, which is many times faster; a file that's
+# changed since has a different hash, so it's parsed again. The cache is kept under a size limit by
+# deleting the least recently used graphs
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import hashlib, os, time
+from pathlib import Path
+from graphmlStream import loadCompactGraph
+from graphSnapshot import snapshotPathsFor, writeSnapshot, loadSnapshot
+
+# This is the format of the snapshots in the cache (Feather, since it's the fastest to read)
+cacheFormat = "feather"
+
+# Snapshots are written to the tmp subdirectory of the cache first. Files in there that are older than
+# staleTempSeconds, or whose process isn't running anymore, were left by a run that crashed, and are
+# deleted the next time the cache is evicted
+tempDirName = "tmp"
+staleTempSeconds = 60 * 60
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the SHA-256 hash of a file's contents, reading it a chunk at a time
+def fileDigest(path, chunkSize=1024*1024):
+	digest = hashlib.sha256()
+	with open(path, "rb") as hashedFile:
+		for chunk in iter(lambda: hashedFile.read(chunkSize), b""):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+# This method checks whether a process is running (it can only tell on POSIX systems; elsewhere, it assumes it is)
+def processRunning(pid):
+	if (os.name != "posix"):
+		return True
+	try:
+		os.kill(pid, 0)
+	except ProcessLookupError:
+		return False
+	except PermissionError:
+		return True
+	return True
+
+# This class is the parsed-graph cache. Each graph is stored as [cacheDir]/[hash].nodes.feather and
+# [hash].edges.feather; the time they were last used is their modification time
+class ParsedGraphCache:
+
+	def __init__(self, cacheDir, maxBytes=1024*1024*1024):
+		self.cacheDir = Path(cacheDir)
+		self.maxBytes = maxBytes
+
+	# This method returns the paths of the (node table, edge table) of the given hash
+	def entryPaths(self, digest):
+		return snapshotPathsFor(self.cacheDir / digest, cacheFormat)
+
+	# This method loads a .graphml file into a compact graph, from the cache if it's there; otherwise, it's
+	# parsed, and then saved to the cache. The snapshot is written to the tmp directory first, under a name
+	# that includes the process ID (since the same file can be loaded by several processes at once), and
+	# then moved into place, edge table first
+	def load(self, graphPath):
+		digest = fileDigest(graphPath)
+		entryPaths = self.entryPaths(digest)
+		if (all(path.exists() for path in entryPaths)):
+			for path in entryPaths:
+				os.utime(path)
+			return loadSnapshot(self.cacheDir / digest, cacheFormat)
+		graph = loadCompactGraph(graphPath)
+		tempDir = self.cacheDir / tempDirName
+		tempDir.mkdir(parents=True, exist_ok=True)
+		tempBase = tempDir / ("%s.%d" % (digest, os.getpid()))
+		writeSnapshot(graph, tempBase, cacheFormat)
+		tempNodePath, tempEdgePath = snapshotPathsFor(tempBase, cacheFormat)
+		os.replace(tempEdgePath, entryPaths[1])
+		os.replace(tempNodePath, entryPaths[0])
+		return graph
+
+	# This method deletes the temporary files left by runs that crashed while writing to the cache; it returns
+	# the number of files it deleted
+	def removeStaleTemps(self):
+		removedCt = 0
+		tempDir = self.cacheDir / tempDirName
+		if (not tempDir.exists()):
+			return removedCt
+		for path in tempDir.iterdir():
+			pid = path.name.split(".")[1] if path.name.count(".") else ""
+			try:
+				if (time.time() - path.stat().st_mtime > staleTempSeconds or not (pid.isdigit() and processRunning(int(pid)))):
+					path.unlink()
+					removedCt += 1
+			except FileNotFoundError:
+				continue
+		return removedCt
+
+	# This method deletes the least recently used graphs until the cache takes up at most maxBytes (the most
+	# recently used graph is always kept), after clearing out any stale temporary files; it returns the number
+	# of graphs it deleted
+	def evict(self):
+		if (not self.cacheDir.exists()):
+			return 0
+		self.removeStaleTemps()
+		entryDict = {}
+		for path in self.cacheDir.glob("*." + cacheFormat):
+			stat = path.stat()
+			lastUsed, size = entryDict.get(path.name.split(".")[0], (0.0, 0))
+			entryDict[path.name.split(".")[0]] = (max(lastUsed, stat.st_mtime), size + stat.st_size)
+		totalBytes = sum(size for lastUsed, size in entryDict.values())
+		evictedCt = 0
+		for digest, (lastUsed, size) in sorted(entryDict.items(), key=lambda entry: entry[1][0])[:-1]:
+			if (totalBytes <= self.maxBytes):
+				break
+			for path in self.entryPaths(digest):
+				if (path.exists()):
+					path.unlink()
+			totalBytes -= size
+			evictedCt += 1
+		return evictedCt
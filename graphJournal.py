@@ -0,0 +1,123 @@
+
+# This module is part of the SoundCloud social network generator; it keeps an append-only journal
+# of the nodes and edges added to a graph, so that saving the crawl after each seed only costs as
+# much as the new data, rather than rewriting the entire graph
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import json, os, sys
+from pathlib import Path
+from graphStore import CompactGraph
+from graphmlStream import writeCompactGraph
+from graphSnapshot import loadGraph, graphExists, writeSnapshot, defaultSnapshotFormat
+from crawlLog import log
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the path of the journal that belongs to a given .graphml file
+def journalPathFor(graphPath):
+	return Path(str(graphPath) + ".journal")
+
+# This method applies every event in a journal file to the given graph, and returns how many it applied.
+# A half-written last line (from a crash or CTRL+C mid-write) is skipped
+def replayJournal(journalPath, graph):
+	eventCt = 0
+	if (not Path(journalPath).exists()):
+		return eventCt
+	with open(journalPath, "r", encoding="utf-8") as journalFile:
+		for line in journalFile:
+			try:
+				event = json.loads(line)
+			except ValueError:
+				log.error("*** ERROR: SKIPPING A TRUNCATED JOURNAL ENTRY ***")
+				continue
+			if (event[0] == "n"):
+				graph.add_node(event[1], **event[2])
+			elif (event[0] == "e"):
+				graph.add_edge(event[1], event[2])
+			elif (event[0] == "r"):
+				graph.remove_edges_from(event[1])
+			eventCt += 1
+	return eventCt
+
+# This method loads a graph from its snapshot (or .graphml), plus anything in its journal that hasn't been folded
+# into it yet; a graph that hasn't been saved yet starts out empty
+def loadJournaledGraph(graphPath):
+	graph = loadGraph(graphPath) if graphExists(graphPath) else CompactGraph()
+	replayJournal(journalPathFor(graphPath), graph)
+	return graph
+
+# This class records add_node / add_edge events (and batches of removed edges) for a graph. Events are buffered in memory, and flush()
+# appends them to the journal file and syncs it to disk; compact() folds the journal into the graph's
+# snapshot (and, if exportGraphml is True, its .graphml file). Passing fresh=True throws away any
+# journal left over from an earlier graph w/ the same path
+class GraphJournal:
+
+	def __init__(self, graphPath, fresh=False, snapshotFormat=defaultSnapshotFormat, exportGraphml=True):
+		self.graphPath = Path(graphPath)
+		self.snapshotFormat = snapshotFormat
+		self.exportGraphml = exportGraphml
+		self.journalPath = journalPathFor(graphPath)
+		self.pending = []
+		self.journalFile = open(self.journalPath, "w" if fresh else "a", encoding="utf-8")
+
+		# If the last run died mid-write, end its half-written line so new events start on their own line
+		if (self.journalFile.tell() > 0):
+			with open(self.journalPath, "rb") as journalFile:
+				journalFile.seek(-1, os.SEEK_END)
+				if (journalFile.read(1) != b"\n"):
+					self.journalFile.write("\n")
+
+	def recordNode(self, node, attributes):
+		self.pending.append(json.dumps(["n", node, attributes]))
+
+	def recordEdge(self, source, target):
+		self.pending.append(json.dumps(["e", source, target]))
+
+	# Removing edges rewrites the graph's edge arrays, so they're removed (and recorded) in batches
+	def recordEdgeRemovals(self, edgeList):
+		self.pending.append(json.dumps(["r", [list(edge) for edge in edgeList]]))
+
+	# This method appends the buffered events to the journal, and returns how many were written
+	def flush(self):
+		eventCt = len(self.pending)
+		if (eventCt):
+			self.journalFile.write("\n".join(self.pending) + "\n")
+			self.pending = []
+		self.journalFile.flush()
+		os.fsync(self.journalFile.fileno())
+		return eventCt
+
+	# This method writes the full graph to disk, and then empties the journal. The snapshot is written
+	# after the .graphml, so it's the newer of the two (see graphSnapshot.loadGraph())
+	def compact(self, graph):
+		self.flush()
+		if (self.exportGraphml):
+			writeCompactGraph(graph, self.graphPath)
+		writeSnapshot(graph, self.graphPath, self.snapshotFormat)
+		self.journalFile.close()
+		self.journalFile = open(self.journalPath, "w", encoding="utf-8")
+
+	def close(self):
+		self.flush()
+		self.journalFile.close()
+
+# =========================
+#           MAIN
+# =========================
+
+# Running this file directly compacts the journal of the given .graphml file(s) on demand, e.g.
+# python graphJournal.py "Some Artist.graphml"
+if (__name__ == "__main__"):
+	for graphPath in sys.argv[1:]:
+		graph = loadGraph(graphPath) if graphExists(graphPath) else CompactGraph()
+		eventCt = replayJournal(journalPathFor(graphPath), graph)
+		writeCompactGraph(graph, graphPath)
+		writeSnapshot(graph, graphPath)
+		open(journalPathFor(graphPath), "w").close()
+		print("Folded %d journal entries into %s" % (eventCt, graphPath))
@@ -0,0 +1,121 @@
+
+# This module is part of the SoundCloud social network generator; it saves and loads crawl graphs as
+# columnar snapshots (a node table and an edge table, in Parquet or Feather files), which are much
+# smaller and faster to write and read than .graphml. GraphML is still written for Gephi, as an export
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from graphStore import CompactGraph, StringTable, countColumns, stringColumns, missingCount
+from graphmlStream import loadCompactGraph
+
+# These are the snapshot formats, and the one used when none is given
+snapshotFormats = ["parquet", "feather"]
+defaultSnapshotFormat = "parquet"
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the paths of the node table and edge table of a graph's snapshot, i.e.
+# "Some Artist.graphml.nodes.parquet" and "Some Artist.graphml.edges.parquet"
+def snapshotPathsFor(graphPath, snapshotFormat=defaultSnapshotFormat):
+	return (Path("%s.nodes.%s" % (graphPath, snapshotFormat)), Path("%s.edges.%s" % (graphPath, snapshotFormat)))
+
+# This method returns the format of a graph's newest snapshot, or None if it doesn't have one
+def findSnapshot(graphPath):
+	foundList = [(snapshotPathsFor(graphPath, snapshotFormat)[0].stat().st_mtime, snapshotFormat) for snapshotFormat in snapshotFormats if all(path.exists() for path in snapshotPathsFor(graphPath, snapshotFormat))]
+	return max(foundList)[1] if foundList else None
+
+# This method turns a compact graph into two DataFrames: a node table w/ a row per node (the counts are
+# nullable ints, and the strings are categoricals, so each distinct string is stored once), and an edge
+# table of (source, target) ID pairs w/ a row per distinct edge
+def graphToFrames(graph):
+	nodeFrame = nodeFrameOf(graph)
+	nodeIDs = nodeFrame["id"].to_numpy()
+	sourceRows, targetRows = graph.distinctEdgeRows()
+	edgeFrame = pd.DataFrame({"source": nodeIDs[sourceRows], "target": nodeIDs[targetRows]})
+	return nodeFrame, edgeFrame
+
+# This helper method returns the node table of a compact graph
+def nodeFrameOf(graph):
+	nodeFrame = pd.DataFrame({"id": graph.nodeIDs.values()})
+	strings = pd.Index(graph.strings.strings)
+	for column in stringColumns:
+		nodeFrame[column] = pd.Categorical.from_codes(graph.stringRows[column].values(), categories=strings)
+	for column in countColumns:
+		values = graph.counts[column].values()
+		nodeFrame[column] = pd.arrays.IntegerArray(values.copy(), values == missingCount)
+	nodeFrame["explored"] = graph.explored.values().copy()
+	return nodeFrame[["id", "username", "trackCt", "followerCt", "favoriteCt", "url", "city", "country", "explored"]]
+
+# This method builds a compact graph from a node table and an edge table (like the ones graphToFrames() makes);
+# edges to IDs that aren't in the node table are dropped
+def graphFromFrames(nodeFrame, edgeFrame):
+	nodeIDs = nodeFrame["id"].to_numpy(dtype=np.int64)
+
+	# Missing counts come back as -1; the strings of every column share one string table
+	counts = {column: nodeFrame[column].astype("Int64").fillna(missingCount).to_numpy(dtype=np.int64) for column in countColumns}
+	strings = StringTable()
+	stringRows = {}
+	for column in stringColumns:
+		categorical = pd.Categorical(nodeFrame[column].astype(object).fillna("n/a"))
+		codeMap = np.array([strings.intern(string) for string in categorical.categories], dtype=np.int32)
+		stringRows[column] = codeMap[categorical.codes] if len(codeMap) else np.zeros(len(nodeIDs), dtype=np.int32)
+	explored = nodeFrame["explored"].to_numpy() != 0
+
+	# Edges are stored as pairs of row indices
+	nodeIndex = pd.Index(nodeIDs)
+	sourceRows = nodeIndex.get_indexer(edgeFrame["source"].to_numpy(dtype=np.int64))
+	targetRows = nodeIndex.get_indexer(edgeFrame["target"].to_numpy(dtype=np.int64))
+	keep = (sourceRows >= 0) & (targetRows >= 0)
+	return CompactGraph.fromColumns(nodeIDs, counts, stringRows, explored, strings, sourceRows[keep], targetRows[keep])
+
+# This method writes a compact graph's snapshot next to graphPath. Each table is written to a temporary
+# file first, and the edge table replaces the old one before the node table does
+def writeSnapshot(graph, graphPath, snapshotFormat=defaultSnapshotFormat):
+	nodeFrame, edgeFrame = graphToFrames(graph)
+	nodePath, edgePath = snapshotPathsFor(graphPath, snapshotFormat)
+	for frame, path in [(edgeFrame, edgePath), (nodeFrame, nodePath)]:
+		tempPath = path.with_name(path.name + ".tmp")
+		if (snapshotFormat == "feather"):
+			frame.to_feather(tempPath)
+		else:
+			frame.to_parquet(tempPath, index=False)
+		os.replace(tempPath, path)
+
+# This method loads a graph's snapshot (in the given format, or whichever is newest) into a compact graph
+def loadSnapshot(graphPath, snapshotFormat=None):
+	snapshotFormat = snapshotFormat or findSnapshot(graphPath)
+	nodePath, edgePath = snapshotPathsFor(graphPath, snapshotFormat)
+	if (snapshotFormat == "feather"):
+		return graphFromFrames(pd.read_feather(nodePath), pd.read_feather(edgePath))
+	return graphFromFrames(pd.read_parquet(nodePath), pd.read_parquet(edgePath))
+
+# This method returns the format of a graph's snapshot if it's at least as new as the .graphml file (or there
+# isn't a .graphml file), and None otherwise
+def currentSnapshot(graphPath):
+	snapshotFormat = findSnapshot(graphPath)
+	if (snapshotFormat is not None):
+		snapshotTime = snapshotPathsFor(graphPath, snapshotFormat)[0].stat().st_mtime
+		if (not Path(graphPath).exists() or Path(graphPath).stat().st_mtime <= snapshotTime):
+			return snapshotFormat
+	return None
+
+# This method loads a crawl graph from whichever is newer: its snapshot, or the .graphml file itself
+# (i.e., one written by an older version of the crawler, or by another tool)
+def loadGraph(graphPath):
+	snapshotFormat = currentSnapshot(graphPath)
+	if (snapshotFormat is not None):
+		return loadSnapshot(graphPath, snapshotFormat)
+	return loadCompactGraph(graphPath)
+
+# This method checks whether a graph has anything saved on disk (a snapshot or a .graphml file)
+def graphExists(graphPath):
+	return Path(graphPath).exists() or findSnapshot(graphPath) is not None
@@ -0,0 +1,357 @@
+
+# This module is part of the SoundCloud social network generator; it holds a compact graph store
+# keyed by SoundCloud ID, which is what the crawler builds the graph in. It only turns into a networkx
+# graph (or a .graphml file for Gephi) when it's exported
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import numpy as np
+
+# These are the node attributes the crawler stores; the counts are kept as 64-bit ints (w/ -1 standing
+# in for "n/a"), and the strings are kept as indices into a table where each distinct string is stored once
+countColumns = ["trackCt", "followerCt", "favoriteCt"]
+stringColumns = ["username", "url", "city", "country"]
+missingCount = -1
+
+# =========================
+#          METHODS
+# =========================
+
+# This class stores each distinct string once, and hands out an integer index for it
+class StringTable:
+
+	def __init__(self):
+		self.strings = ["n/a"]
+		self.index = {"n/a": 0}
+
+	# This method returns the index of a string, adding it to the table if it's new
+	def intern(self, string):
+		string = "n/a" if string is None else str(string)
+		idx = self.index.get(string)
+		if (idx is None):
+			idx = len(self.strings)
+			self.strings.append(string)
+			self.index[string] = idx
+		return idx
+
+	def __getitem__(self, idx):
+		return self.strings[idx]
+
+	def __len__(self):
+		return len(self.strings)
+
+# This class is a growable NumPy column: a NumPy array w/ spare room at the end, which doubles in size when
+# it fills up, so appending one value at a time takes amortized O(1). values() is a view of the filled part;
+# single values come back as Python ints (rather than NumPy scalars), so they can go straight into JSON
+class Column:
+
+	def __init__(self, dtype, values=()):
+		values = np.asarray(values, dtype=dtype)
+		self.data = np.empty(max(16, len(values)), dtype=dtype)
+		self.data[:len(values)] = values
+		self.size = len(values)
+
+	def values(self):
+		return self.data[:self.size]
+
+	def append(self, value):
+		if (self.size == len(self.data)):
+			self.reserve(2 * self.size)
+		self.data[self.size] = value
+		self.size += 1
+
+	def extend(self, values):
+		values = np.asarray(values, dtype=self.data.dtype)
+		if (self.size + len(values) > len(self.data)):
+			self.reserve(max(2 * len(self.data), self.size + len(values)))
+		self.data[self.size:self.size+len(values)] = values
+		self.size += len(values)
+
+	# This helper method moves the column into a bigger array
+	def reserve(self, capacity):
+		newData = np.empty(capacity, dtype=self.data.dtype)
+		newData[:self.size] = self.data[:self.size]
+		self.data = newData
+
+	def __len__(self):
+		return self.size
+
+	def __getitem__(self, idx):
+		return self.data[idx].item()
+
+	def __setitem__(self, idx, value):
+		self.data[idx] = value
+
+	def __iter__(self):
+		return iter(self.values().tolist())
+
+	# Only the filled part of the column is pickled (i.e., when a graph is sent between processes)
+	def __getstate__(self):
+		return self.values().copy()
+
+	def __setstate__(self, state):
+		self.__init__(state.dtype, state)
+
+# This class is the compact graph store. Nodes are SoundCloud IDs; each node gets a row index, and its
+# attributes are stored column by column in growable NumPy columns. Edges are stored as two parallel
+# columns of row indices, along w/ a CSR adjacency (an offsets array and a targets array) of the distinct
+# edges. New edges that aren't in the CSR yet are kept in a small dict of {source row: set of target rows},
+# and folded into the CSR (w/ NumPy) once that holds a sizeable fraction of the edges, so adding an edge,
+# counting the edges and looking up a node's neighbors don't rebuild anything. The add_node / add_edge
+# methods behave like networkx's, so graph journals can be replayed straight into it
+class CompactGraph:
+
+	def __init__(self):
+		self.rowIndex = {}
+		self.nodeIDs = Column(np.int64)
+		self.counts = {column: Column(np.int64) for column in countColumns}
+		self.stringRows = {column: Column(np.int32) for column in stringColumns}
+		self.explored = Column(np.uint8)
+		self.strings = StringTable()
+		self.edgeSources = Column(np.int32)
+		self.edgeTargets = Column(np.int32)
+		self.adjacency = None
+		self.pendingEdges = {}
+		self.pendingCt = 0
+
+	# This method builds a compact graph straight from its columns (NumPy arrays, or anything that can be
+	# turned into one): the node IDs, a dict of each count column, a dict of each string column (as indices
+	# into the given string table), the explored flags, and the source and target rows of the edges
+	@classmethod
+	def fromColumns(cls, nodeIDs, counts, stringRows, explored, strings, edgeSources, edgeTargets):
+		graph = cls()
+		graph.nodeIDs = Column(np.int64, nodeIDs)
+		graph.rowIndex = dict(zip(graph.nodeIDs.values().tolist(), range(len(graph.nodeIDs))))
+		graph.counts = {column: Column(np.int64, counts[column]) for column in countColumns}
+		graph.stringRows = {column: Column(np.int32, stringRows[column]) for column in stringColumns}
+		graph.explored = Column(np.uint8, explored)
+		graph.strings = strings
+		graph.edgeSources = Column(np.int32, edgeSources)
+		graph.edgeTargets = Column(np.int32, edgeTargets)
+		return graph
+
+	def __contains__(self, nodeID):
+		return nodeID in self.rowIndex
+
+	def __len__(self):
+		return len(self.nodeIDs)
+
+	def has_node(self, nodeID):
+		return nodeID in self.rowIndex
+
+	def number_of_nodes(self):
+		return len(self.nodeIDs)
+
+	def number_of_edges(self):
+		return len(self.baseAdjacency()[1]) + self.pendingCt
+
+	# This method returns the row index of a node, adding an empty row if the node is new
+	def row(self, nodeID):
+		rowIdx = self.rowIndex.get(nodeID)
+		if (rowIdx is None):
+			rowIdx = len(self.nodeIDs)
+			self.rowIndex[nodeID] = rowIdx
+			self.nodeIDs.append(nodeID)
+			for column in countColumns:
+				self.counts[column].append(missingCount)
+			for column in stringColumns:
+				self.stringRows[column].append(0)
+			self.explored.append(0)
+		return rowIdx
+
+	# This method adds a node (or updates the attributes of an existing one); attributes that
+	# aren't stored by the graph (like "id", which is the node itself) are ignored
+	def add_node(self, nodeID, **attributes):
+		rowIdx = self.row(nodeID)
+		for column, value in attributes.items():
+			if (column in self.counts):
+				self.counts[column][rowIdx] = value if isinstance(value, int) else missingCount
+			elif (column in self.stringRows):
+				self.stringRows[column][rowIdx] = self.strings.intern(value)
+			elif (column == "explored"):
+				self.explored[rowIdx] = 1 if int(value) else 0
+
+	# This method adds an edge between two nodes (adding the nodes too, if they're new); an edge that's
+	# already in the graph isn't added again
+	def add_edge(self, sourceID, targetID):
+		sourceRow = self.row(sourceID)
+		targetRow = self.row(targetID)
+		if (self.hasEdgeRows(sourceRow, targetRow)):
+			return
+		self.edgeSources.append(sourceRow)
+		self.edgeTargets.append(targetRow)
+		self.pendingEdges.setdefault(sourceRow, set()).add(targetRow)
+		self.pendingCt += 1
+		if (self.pendingCt > max(4096, len(self.adjacency[1]) // 4)):
+			self.adjacency = None
+
+	# This method removes the given (source ID, target ID) edges (and any duplicates of them) from the graph,
+	# in a single pass over the edge columns; edges that aren't in the graph are ignored
+	def remove_edges_from(self, edgeList):
+		nodeCt = len(self.nodeIDs)
+		removed = np.array([self.rowIndex[sourceID] * nodeCt + self.rowIndex[targetID] for sourceID, targetID in edgeList if sourceID in self.rowIndex and targetID in self.rowIndex], dtype=np.int64)
+		if (not len(removed)):
+			return
+		sources, targets = self.distinctEdgeRows()
+		keep = ~np.isin(sources.astype(np.int64) * nodeCt + targets, removed)
+		self.edgeSources = Column(np.int32, sources[keep])
+		self.edgeTargets = Column(np.int32, targets[keep])
+		self.adjacency = None
+
+	# This method merges another compact graph into this one, in a single pass over its rows and edges.
+	# A node is explored if it was explored in either graph, and a missing attribute gets filled in from
+	# the other graph (when both graphs have a value, this graph's is kept)
+	def merge(self, other):
+		rowMap = np.array([self.row(nodeID) for nodeID in other.nodeIDs], dtype=np.int64)
+		stringMap = np.array([self.strings.intern(string) for string in other.strings.strings], dtype=np.int32)
+		for column in countColumns:
+			values = self.counts[column].values()
+			missing = values[rowMap] == missingCount
+			values[rowMap[missing]] = other.counts[column].values()[missing]
+		for column in stringColumns:
+			values = self.stringRows[column].values()
+			missing = values[rowMap] == 0
+			values[rowMap[missing]] = stringMap[other.stringRows[column].values()[missing]]
+		explored = self.explored.values()
+		explored[rowMap] |= other.explored.values()
+		otherSources, otherTargets = other.distinctEdgeRows()
+		self.edgeSources.extend(rowMap[otherSources])
+		self.edgeTargets.extend(rowMap[otherTargets])
+		self.adjacency = None
+
+	# This method returns the row of an artist, who can be given by their SoundCloud ID or their username (if
+	# several artists share a username, the one that was added to the graph first)
+	def rowOf(self, artist):
+		if (isinstance(artist, str) and not artist.isdigit()):
+			usernameRow = self.strings.index.get(artist)
+			if (usernameRow is not None):
+				rows = np.flatnonzero(self.stringRows["username"].values() == usernameRow)
+				if (len(rows)):
+					return int(rows[0])
+			raise KeyError("There's no artist named %s in the graph" % artist)
+		if (int(artist) not in self.rowIndex):
+			raise KeyError("There's no artist w/ the ID %s in the graph" % artist)
+		return self.rowIndex[int(artist)]
+
+	def isExplored(self, nodeID):
+		return self.explored[self.rowIndex[nodeID]] == 1
+
+	# This method returns a dict of a node's attributes, w/ "n/a" for any that are missing
+	def nodeData(self, nodeID):
+		return self.rowData(self.rowIndex[nodeID])
+
+	# This helper method returns a dict of the attributes in a given row
+	def rowData(self, rowIdx):
+		data = {"id": self.nodeIDs[rowIdx]}
+		for column in countColumns:
+			value = self.counts[column][rowIdx]
+			data[column] = "n/a" if value == missingCount else value
+		for column in stringColumns:
+			data[column] = self.strings[self.stringRows[column][rowIdx]]
+		data["explored"] = self.explored[rowIdx]
+		return data
+
+	# This method yields (ID, attribute dict) for every node
+	def iterNodes(self):
+		for rowIdx in range(len(self.nodeIDs)):
+			yield self.nodeIDs[rowIdx], self.rowData(rowIdx)
+
+	# This method yields (source ID, target ID) for every distinct edge
+	def iterEdges(self):
+		nodeIDs = self.nodeIDs.values()
+		sources, targets = self.distinctEdgeRows()
+		for sourceID, targetID in zip(nodeIDs[sources].tolist(), nodeIDs[targets].tolist()):
+			yield sourceID, targetID
+
+	# This helper method returns the CSR adjacency (offsets, targets) of the edges that have been folded into it,
+	# which is every edge but the pending ones; it's rebuilt if something made it stale
+	def baseAdjacency(self):
+		if (self.adjacency is None):
+			self.rebuildAdjacency()
+		return self.adjacency
+
+	# This helper method rebuilds the CSR adjacency from the edge columns w/ NumPy. Each (source, target) pair
+	# of rows is packed into one int, and they're sorted to drop the duplicates; the edge columns are then
+	# replaced by the distinct edges, in CSR order
+	def rebuildAdjacency(self):
+		nodeCt = len(self.nodeIDs)
+		packedEdges = np.unique(self.edgeSources.values().astype(np.int64) * max(1, nodeCt) + self.edgeTargets.values())
+		sources, targets = np.divmod(packedEdges, max(1, nodeCt))
+		offsets = np.zeros(nodeCt + 1, dtype=np.int64)
+		np.cumsum(np.bincount(sources, minlength=nodeCt), out=offsets[1:])
+		self.edgeSources = Column(np.int32, sources)
+		self.edgeTargets = Column(np.int32, targets)
+		self.adjacency = (offsets, targets.astype(np.int32))
+		self.pendingEdges = {}
+		self.pendingCt = 0
+
+	# This method returns the CSR adjacency (offsets, targets) over row indices: the successors of row r are
+	# targets[offsets[r]:offsets[r+1]], sorted and w/o duplicates. Any pending edges are folded in first
+	def csr(self):
+		if (self.pendingCt):
+			self.adjacency = None
+		return self.baseAdjacency()
+
+	# This method returns the (source rows, target rows) of every distinct edge, as NumPy arrays sorted by
+	# source and then target
+	def distinctEdgeRows(self):
+		offsets, targets = self.csr()
+		return np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets)), targets
+
+	# This helper method checks whether there's an edge between two rows, in the CSR or among the pending edges
+	def hasEdgeRows(self, sourceRow, targetRow):
+		offsets, targets = self.baseAdjacency()
+		if (sourceRow + 1 < len(offsets)):
+			startIdx, endIdx = offsets[sourceRow], offsets[sourceRow + 1]
+			if (endIdx > startIdx):
+				edgeIdx = startIdx + np.searchsorted(targets[startIdx:endIdx], targetRow)
+				if (edgeIdx < endIdx and targets[edgeIdx] == targetRow):
+					return True
+		return targetRow in self.pendingEdges.get(sourceRow, ())
+
+	# This method returns the IDs of the nodes a given node has edges to
+	def successors(self, nodeID):
+		offsets, targets = self.baseAdjacency()
+		rowIdx = self.rowIndex[nodeID]
+		targetRows = targets[offsets[rowIdx]:offsets[rowIdx + 1]].tolist() if rowIdx + 1 < len(offsets) else []
+		targetRows += sorted(self.pendingEdges.get(rowIdx, ()))
+		nodeIDs = self.nodeIDs.values()
+		return nodeIDs[targetRows].tolist()
+
+	def has_edge(self, sourceID, targetID):
+		if (sourceID not in self.rowIndex or targetID not in self.rowIndex):
+			return False
+		return self.hasEdgeRows(self.rowIndex[sourceID], self.rowIndex[targetID])
+
+	# This method exports the graph as a networkx DiGraph. Nodes are labeled w/ their SoundCloud IDs and
+	# carry a "username" attribute, and are marked "relabled" - the same layout mergeGraphs.py produces
+	def toNetworkx(self):
+		import networkx as nx
+		nxGraph = nx.DiGraph()
+		for nodeID, data in self.iterNodes():
+			data["relabled"] = 1
+			nxGraph.add_node(nodeID, **data)
+		nxGraph.add_edges_from(self.iterEdges())
+		return nxGraph
+
+	# This method builds a compact graph from a networkx graph; it handles graphs labeled by username
+	# (like the ones older versions of the crawler wrote) as well as ones labeled by ID
+	@classmethod
+	def fromNetworkx(cls, nxGraph):
+		graph = cls()
+		labelToID = {}
+		for label, data in nxGraph.nodes(data=True):
+			if ("id" not in data):
+				continue
+			nodeID = int(data["id"])
+			labelToID[label] = nodeID
+			attributes = dict(data)
+			attributes.setdefault("username", label)
+			graph.add_node(nodeID, **attributes)
+		for source, target in nxGraph.edges():
+			if (source in labelToID and target in labelToID):
+				graph.add_edge(labelToID[source], labelToID[target])
+		return graph
@@ -0,0 +1,165 @@
+
+# This module is part of the SoundCloud social network generator; it reads and writes .graphml files
+# one node / edge at a time, so that neither the XML document nor an extra copy of the graph ever
+# has to be held in memory all at once
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import os
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+from graphStore import CompactGraph
+
+graphmlNamespace = "{http://graphml.graphdrawing.org/xmlns}"
+
+# These are the node attributes (and their GraphML types) of a crawl graph; any other attribute
+# a graph has gets written as a string
+crawlNodeSchema = [
+	("id", "long"),
+	("username", "string"),
+	("trackCt", "long"),
+	("followerCt", "long"),
+	("favoriteCt", "long"),
+	("url", "string"),
+	("city", "string"),
+	("country", "string"),
+	("explored", "int"),
+	("relabled", "int"),
+]
+
+# These methods convert the text of a <data> element into a Python value, based on its GraphML type
+graphmlParsers = {
+	"boolean": lambda text: text.strip().lower() in ("true", "1"),
+	"int": int,
+	"long": int,
+	"float": float,
+	"double": float,
+	"string": str,
+}
+
+# =========================
+#          METHODS
+# =========================
+
+# This method streams through a .graphml file, yielding ("node", label, attributes) and
+# ("edge", source label, target label, attributes) records as it goes. Each element is
+# cleared as soon as it's been read, so memory use doesn't grow w/ the size of the file
+def iterGraphml(path):
+
+	keys = {}
+	defaults = {}
+	graphElement = None
+	for event, element in ET.iterparse(str(path), events=("start", "end")):
+		tag = element.tag.replace(graphmlNamespace, "")
+		if (event == "start"):
+			if (tag == "graph"):
+				graphElement = element
+			continue
+
+		# Remember each attribute's name and type (and its default, if there is one)
+		if (tag == "key"):
+			keyType = element.get("attr.type", "string")
+			defaultElement = element.find(graphmlNamespace + "default")
+			default = None if defaultElement is None else graphmlParsers.get(keyType, str)(defaultElement.text or "")
+			keys[element.get("id")] = (element.get("attr.name", element.get("id")), keyType, element.get("for", "all"), default)
+			defaults = {}
+
+		elif (tag == "node" or tag == "edge"):
+			if (tag not in defaults):
+				defaults[tag] = {name: default for name, keyType, scope, default in keys.values() if default is not None and scope in (tag, "all")}
+			attributes = dict(defaults[tag])
+			for dataElement in element.findall(graphmlNamespace + "data"):
+				name, keyType, scope, default = keys.get(dataElement.get("key"), (dataElement.get("key"), "string", "all", None))
+				try:
+					attributes[name] = graphmlParsers.get(keyType, str)(dataElement.text or "")
+				except ValueError:
+					attributes[name] = dataElement.text
+			if (tag == "node"):
+				yield ("node", element.get("id"), attributes)
+			else:
+				yield ("edge", element.get("source"), element.get("target"), attributes)
+
+			# Free up the element (and the <graph> element's reference to it)
+			element.clear()
+			if (graphElement is not None):
+				graphElement.clear()
+
+# This method loads a .graphml crawl graph into a graphStore.CompactGraph. Both the ID-labeled graphs
+# the crawler writes and the username-labeled ones older versions wrote are handled
+def loadCompactGraph(path):
+	graph = CompactGraph()
+	labelToID = {}
+	pendingEdges = []
+	for record in iterGraphml(path):
+		if (record[0] == "node"):
+			label, attributes = record[1], record[2]
+			if ("id" not in attributes):
+				continue
+			nodeID = int(attributes["id"])
+			labelToID[label] = nodeID
+			attributes.setdefault("username", label)
+			graph.add_node(nodeID, **attributes)
+		else:
+			source, target = record[1], record[2]
+			if (source in labelToID and target in labelToID):
+				graph.add_edge(labelToID[source], labelToID[target])
+			else:
+				pendingEdges.append((source, target))
+
+	# Edges are usually written after all of the nodes, but GraphML doesn't require it
+	for source, target in pendingEdges:
+		if (source in labelToID and target in labelToID):
+			graph.add_edge(labelToID[source], labelToID[target])
+	return graph
+
+# This class writes a .graphml file incrementally: the attribute keys go in the header, and then each
+# node and edge is written out as soon as it's handed over. It writes to a temporary file, which only
+# replaces the real one once close() is called
+class GraphmlWriter:
+
+	def __init__(self, path, nodeSchema=crawlNodeSchema):
+		self.path = str(path)
+		self.tempPath = self.path + ".tmp"
+		self.nodeKeys = {name: ("d%d" % idx, keyType) for idx, (name, keyType) in enumerate(nodeSchema)}
+		self.graphmlFile = open(self.tempPath, "w", encoding="utf-8")
+		self.graphmlFile.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+		self.graphmlFile.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd">\n')
+		for name, (keyID, keyType) in self.nodeKeys.items():
+			self.graphmlFile.write('<key id="%s" for="node" attr.name=%s attr.type="%s" />\n' % (keyID, quoteattr(name), keyType))
+		self.graphmlFile.write('<graph edgedefault="directed">\n')
+
+	# This method writes a node; attributes that don't fit their type (like "n/a" for a count) are left out
+	def writeNode(self, label, attributes):
+		dataList = []
+		for name, value in attributes.items():
+			if (name not in self.nodeKeys or value is None):
+				continue
+			keyID, keyType = self.nodeKeys[name]
+			if (keyType in ("int", "long") and not isinstance(value, int)):
+				continue
+			dataList.append('<data key="%s">%s</data>' % (keyID, escape(str(value))))
+		self.graphmlFile.write('<node id=%s>%s</node>\n' % (quoteattr(str(label)), "".join(dataList)))
+
+	def writeEdge(self, source, target):
+		self.graphmlFile.write('<edge source=%s target=%s />\n' % (quoteattr(str(source)), quoteattr(str(target))))
+
+	def close(self):
+		self.graphmlFile.write('</graph>\n</graphml>\n')
+		self.graphmlFile.flush()
+		os.fsync(self.graphmlFile.fileno())
+		self.graphmlFile.close()
+		os.replace(self.tempPath, self.path)
+
+# This method writes a graphStore.CompactGraph to a .graphml file, one node / edge at a time. Nodes are
+# labeled w/ their SoundCloud IDs and marked "relabled", the same as CompactGraph.toNetworkx()
+def writeCompactGraph(graph, path):
+	writer = GraphmlWriter(path)
+	for nodeID, data in graph.iterNodes():
+		data["relabled"] = 1
+		writer.writeNode(nodeID, data)
+	for sourceID, targetID in graph.iterEdges():
+		writer.writeEdge(sourceID, targetID)
+	writer.close()
@@ -8,104 +8,82 @@
 # =========================
 
 # Here are various import statements
-import networkx as nx
+import os, time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from graphStore import CompactGraph
+from graphmlStream import writeCompactGraph
+from graphSnapshot import loadGraph, writeSnapshot, currentSnapshot
+from graphCache import ParsedGraphCache
+
+# This is the most processes that'll be used to load the graphs at the same time
+maxLoadWorkers = os.cpu_count() or 1
+
+# Graphs that have to be parsed from their .graphml (i.e., ones w/o an up-to-date snapshot) are cached in
+# graphCacheDir, keyed by the hash of the file, so re-running a merge w/ the same files doesn't parse them
+# again; the least recently used ones are deleted once the cache is over graphCacheMaxBytes (0 turns it off)
+graphCacheDir = Path("parsedGraphCache")
+graphCacheMaxBytes = 1024 * 1024 * 1024
 
 
 # =========================
 #          METHODS
 # =========================
 
-# This method will merge together two networkx graphs
-def mergeGraphPair(G1, G2):
-
-	# Here, you check if the graph has been relabeled; if not, convert the IDs of the nodes to their SoundCloud IDs, 
-	# and store their names in another parameter. You can also mark G1's explored tracks
-	graphArray = [G1, G2]
-	G1_exploredDict = {}
-	hasBeenRelabled = [False, False]
-	for graphIdx, curGraph in enumerate(graphArray):
-
-		# In this inner for loop, you'll want to create a dict of (username, ID) pairs,
-		# so you can then run the nx.relabel_nodes() method to change the graph's IDs
-		labelMapping = {}
-		for curLabel, data in curGraph.nodes(data=True):
-
-			# Skip any bad nodes
-			if (not data):
-				continue
-
-			# If the current graph is G1, then mark any explored users in G1_exploredDict
-			if (graphIdx == 0):
-				
-				if (data['explored'] == 1):
-					G1_exploredDict[data['id']] = 1
-
-			# Check if the graph has been relabeled or not
-			if ('relabled' not in data):
-				labelMapping[curLabel] = data['id']
-				data['username'] = curLabel
-				data['relabled'] = 1
-			else:
-				hasBeenRelabled[graphIdx] = True
-
-		# Relabel the graphs if they haven't been already
-		if (not hasBeenRelabled[graphIdx]):
-			print("G%s has not been relabled! Relabeling it now..." % str(graphIdx+1))
-			graphArray[graphIdx] = nx.relabel_nodes(curGraph, labelMapping)
-
-	# Update the graphs to point to their relabeled counterparts
-	G1 = graphArray[0]
-	G2 = graphArray[1]
-
-	# Create the composed graph, and then fix all of the "explored" tags
-	G_composed = nx.compose(G1, G2)
-	for node, data in G_composed.nodes(data=True):
-
-		# Skip any bad nodes
-		if (not data):
-			continue
-		
-		if (data['explored'] == 0 and node in G1_exploredDict):
-			data['explored'] = 1
-
-	# Return the newly composed graph
-	return G_composed
-	
-
-# This recursive method will merge together an array of graphs
+# This method loads each graph into a compact graph (keyed by SoundCloud ID), from its snapshot if it has
+# one, and from the .graphml file (through the parsed-graph cache in cacheDir, if there is one) otherwise;
+# the files are read in parallel w/ a pool of processes, and the graphs come back in the same order as the
+# paths. Afterwards, the cache is trimmed down to cacheMaxBytes
+def loadGraphArray(graphPathArray, cacheDir=None, cacheMaxBytes=graphCacheMaxBytes):
+	loadMethod = partial(loadInputGraph, cacheDir=cacheDir if cacheMaxBytes else None)
+	workerCt = max(1, min(maxLoadWorkers, len(graphPathArray)))
+	if (workerCt == 1):
+		graphArray = [loadMethod(graphPath) for graphPath in graphPathArray]
+	else:
+		with ProcessPoolExecutor(max_workers=workerCt) as executor:
+			graphArray = list(executor.map(loadMethod, graphPathArray))
+	if (cacheDir is not None and cacheMaxBytes):
+		ParsedGraphCache(cacheDir, cacheMaxBytes).evict()
+	return graphArray
+
+# This helper method loads one graph, from its snapshot if it's up to date, and otherwise from the parsed-graph
+# cache in cacheDir (if one's given)
+def loadInputGraph(graphPath, cacheDir=None):
+	if (cacheDir is None or currentSnapshot(graphPath) is not None):
+		return loadGraph(graphPath)
+	return ParsedGraphCache(cacheDir).load(graphPath)
+
+
+# This method merges together an array of graphs in a single pass. Since every graph is keyed by
+# SoundCloud ID, there's no relabeling to do; each graph's nodes and edges are added to the result
+# once, and a node is marked as explored if it was explored in *any* of the graphs
 def mergeGraphArray(graphArray):
 
-	# Break statement for the recursion
-	if (len(graphArray) == 1):
-		return graphArray[0]
+	mergedGraph = CompactGraph()
+	for graphIdx, curGraph in enumerate(graphArray):
+		print("Merging in G%d (%d nodes)..." % (graphIdx+1, len(curGraph)))
+		mergedGraph.merge(curGraph)
 
-	# Recursive portion of the method; merge together the first two graphs, and then 
-	# return the array containing the merged graph and graphArray[2:]
-	else:
-		newGraphArray_p1 = [mergeGraphPair(graphArray[0], graphArray[1])]
-		newGraphArray_p2 = graphArray[2:]
-		print((newGraphArray_p1))
-		print((newGraphArray_p2))
-		newGraphArray = newGraphArray_p1 + newGraphArray_p2
-		print(newGraphArray)
-		if (len(newGraphArray_p2) == 0):
-			newGraphArray = [newGraphArray[0]]
-		return mergeGraphArray(newGraphArray)
+	# Return the newly merged graph
+	return mergedGraph
 
 
 # =========================
-#           MAIN 
+#           MAIN
 # =========================
 
-# First, I'll prompt the user to enter the paths as a comma separated list, and load them into networkx graphs
-graphPathArray = [Path(x) for x in input("Enter a comma-separated list of paths for the graphs you're merging: ").split(",")]
-graphArray = []
-for graphPath in graphPathArray:
-	graphArray.append(nx.read_graphml(graphPath))
-
-# Now, I'll run mergeGraphArray on the graphs, ask the user for a resultPath, and write the graph! 
-print(len(graphArray))
-mergedGraph = mergeGraphArray(graphArray)
-savePath = Path(input("Enter a title for the merged .graphml: ") + ".graphml")
-nx.write_graphml(mergedGraph, savePath)
\ No newline at end of file
+if (__name__ == "__main__"):
+
+	# First, I'll prompt the user to enter the paths as a comma separated list, and load them into graphs
+	graphPathArray = [Path(x.strip()) for x in input("Enter a comma-separated list of paths for the graphs you're merging: ").split(",")]
+	curTime = time.time()
+	graphArray = loadGraphArray(graphPathArray, graphCacheDir)
+	print("It took %.3f seconds to load %d graphs" % (time.time() - curTime, len(graphArray)))
+
+	# Now, I'll run mergeGraphArray on the graphs, ask the user for a resultPath, and write the graph!
+	mergedGraph = mergeGraphArray(graphArray)
+	print("The merged graph has %d nodes and %d edges" % (mergedGraph.number_of_nodes(), mergedGraph.number_of_edges()))
+	savePath = Path(input("Enter a title for the merged .graphml: ") + ".graphml")
+	writeCompactGraph(mergedGraph, savePath)
+	writeSnapshot(mergedGraph, savePath)
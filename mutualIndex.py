@@ -0,0 +1,61 @@
+
+# This module is part of the SoundCloud social network generator; it keeps track of which artists
+# mutually follow the artists the crawler has already explored, using only data it has already fetched
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+from followingCache import SortedIDs
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is the reciprocity index. For every explored artist, it stores the IDs of their mutual
+# follows as a sorted array; it also counts, for every other artist, how many explored artists they
+# mutually follow. That answers "is this artist mutually connected to any explored artist?" in O(1),
+# and "do these two artists follow each other?" in O(log(# of mutuals)), w/o any API calls
+class ReciprocityIndex:
+
+	def __init__(self):
+		self.mutuals = {}
+		self.connectedCt = {}
+
+	# This method records the mutual follows of an artist who was just explored
+	def addExplored(self, artistID, mutualIDs):
+		newMutuals = SortedIDs(mutualIDs)
+		oldMutuals = self.mutuals.get(artistID, ())
+		for mutualID in newMutuals:
+			if (mutualID not in oldMutuals):
+				self.connectedCt[mutualID] = self.connectedCt.get(mutualID, 0) + 1
+		self.mutuals[artistID] = newMutuals
+
+	# This method checks whether an artist mutually follows at least one explored artist
+	def isConnected(self, artistID):
+		return artistID in self.connectedCt
+
+	# This method checks whether two artists follow each other (as far as the index knows)
+	def areMutual(self, artistID, otherID):
+		if (artistID in self.mutuals and otherID in self.mutuals[artistID]):
+			return True
+		return otherID in self.mutuals and artistID in self.mutuals[otherID]
+
+	def __len__(self):
+		return len(self.mutuals)
+
+# This method rebuilds a reciprocity index from a crawl graph (a graphStore.CompactGraph). The crawler only
+# adds an edge from an explored artist to an unexplored one if they follow each other; an edge between two
+# explored artists only means the first follows the second, so those count as mutual when it goes both ways
+def buildIndexFromGraph(graph):
+	index = ReciprocityIndex()
+	for nodeID, data in graph.iterNodes():
+		if (data["explored"] != 1):
+			continue
+		mutualIDs = []
+		for neighborID in graph.successors(nodeID):
+			if (not graph.isExplored(neighborID) or graph.has_edge(neighborID, nodeID)):
+				mutualIDs.append(neighborID)
+		index.addExplored(nodeID, mutualIDs)
+	return index
@@ -7,42 +7,172 @@
 # =========================
 
 # Here are various import statements
-import soundcloud, requests, json, time, itertools, heapq, traceback
+import requests, json, time, logging, atexit, threading
 import pandas as pd
-import networkx as nx
+from collections import OrderedDict
 from pathlib import Path
-
-# Here, I'm declaring the "client" variable, which I'll use throughout the rest of the application
-userClientID = input("\nEnter your SoundCloud client ID: ")
-client = soundcloud.Client(client_id=userClientID)
-
-# Setting up the priority queue for the crawling fronteir; I got this code # from the Python
-# docs @ https://docs.python.org/3.5/library/heapq.html#priority-queue-implementation-notes
-pq = []                         
-entry_finder = {}               
-REMOVED = '<removed-item>'      
-counter = itertools.count()
-graph = nx.DiGraph()
-
-# Checking if the user already has a graph they want to work on 
-graphPath = ""
-userInput = int(input("\nAre you working on a new graph, or adding to an existing one?\n\n1) New Graph\n2) Existing Graph\n\nPlease enter the number corresponding with your choice: "))
-if (userInput == 2):
-	graphPath = input("\nPlease enter the path to the .graphml file you're trying to expand: ")
-
-# Declaring the cache
-cache = {}
-
-# These dictionaries are essential data structures
-artistNameDict = {}
-artistEncounterDict = {}
+from pooledClient import PooledClient
+from requestScheduler import RequestScheduler, retryableStatuses
+from crawlMetrics import CrawlMetrics, SeedProfiler, metricsPathFor, endpointFor
+from apiTransport import ResponseStore, RecordingTransport, ReplayTransport
+from compactBookkeeping import CompactCounter, NameStore
+from followBackPool import fetchMany
+from followingCache import FollowingCache, SortedIDs
+from graphJournal import GraphJournal, replayJournal, journalPathFor
+from crawlCheckpoint import saveCheckpoint, loadCheckpoint, checkpointPathFor
+from frontier import IndexedHeap
+from mutualIndex import ReciprocityIndex, buildIndexFromGraph
+from graphStore import CompactGraph
+from graphSnapshot import loadGraph, graphExists
+from profileStore import ProfileStore, infoFromUser
+from crawlLog import log, progress, recentEvents, configureLogging, logPathFor
+
+# These settings control the concurrent follow-back checks; followBackWorkers is the number of
+# artists whose following lists are fetched at the same time (set it to 1 to go one at a time).
+# Pointing apiHost at something like "localhost:8000" w/ apiUseSSL = False lets you run against a mock server
+followBackWorkers = 8
+apiHost = "api.soundcloud.com"
+apiUseSSL = True
+
+# These settings control the following-list cache, which is kept on disk so it survives between runs;
+# lists older than followingCacheTTL seconds are re-fetched, and only the followingCacheSize most recently
+# used lists are kept
+followingCachePath = "followingCache.sqlite"
+followingCacheTTL = 7 * 24 * 60 * 60
+followingCacheSize = 50000
+
+# A checkpoint of the crawler's state (the priority queue, encounter counts, etc.) is saved every
+# checkpointInterval seeds, so that resuming an existing graph continues exactly where it stopped
+checkpointInterval = 5
+
+# When a seed's profile or following list can't be fetched (even after the request scheduler's retries), the
+# seed goes back into the queue w/ half of its priority, and the next one is explored instead. After
+# maxSeedFailures failures, or right away if the API says the request can't succeed (i.e., a 404), it's dropped.
+# The crawlWorkers.py workers and batchCrawl.py do the same w/ their frontiers (w/ failedSeedFactor)
+maxSeedFailures = 3
+failedSeedFactor = 0.5
+
+# These settings control how fast requests are sent to the API: the request rate starts at requestRate
+# (per second), creeps up toward maxRequestRate while requests succeed, and is cut in half whenever the
+# API pushes back. Failed requests are retried w/ exponential backoff, up to maxRequestAttempts times
+requestRate = 5.0
+maxRequestRate = 50.0
+maxRequestAttempts = 6
+
+# These settings let a crawl be recorded and replayed offline. With transportMode = "record", every API
+# response is saved to transportStorePath as the crawl runs; w/ "replay", the saved responses are served
+# back instead of calling the API (and aren't paced by the request rate above), so the same crawl can be
+# re-run in seconds. replayLatency (plus up to replayLatencyJitter) seconds are added to each replayed
+# response, and replayErrorRate of them fail w/ a 503; replaySeed makes those the same on every replay
+transportMode = "live"
+transportStorePath = "apiResponses.sqlite"
+replayLatency = 0.0
+replayLatencyJitter = 0.0
+replayErrorRate = 0.0
+replaySeed = 0
+
+# When the crawl stops, the graph is saved as a columnar snapshot ([graph].nodes.parquet and [graph].edges.parquet,
+# or .feather files if snapshotFormat is "feather"), which is what resuming a crawl and mergeGraphs.py load
+# from. If exportGraphml is True, it's also exported to a .graphml file, for Gephi
+snapshotFormat = "parquet"
+exportGraphml = True
+
+# Metrics about the crawl (API latencies, cache hit ratio, time spent writing the graph, etc.) are written
+# to [graph].metrics.json (or [graph].metrics.prom, if metricsFormat is "prometheus") every metricsInterval
+# seconds; set it to 0 to turn that off. If profileEverySeeds isn't 0, every Nth seed is profiled w/
+# cProfile, and the profile is saved to [graph].seed[N].prof
+metricsFormat = "json"
+metricsInterval = 60
+profileEverySeeds = 0
+
+# When compactBookkeeping is True, the encounter counts and artist names are kept in compact structures
+# w/ a fixed memory budget, instead of dicts that grow w/ every artist the crawl sees (which matters on
+# multi-day crawls). The first compactExactCounts artists are counted exactly; after that, counts can be
+# slightly too high (see compactBookkeeping.py). Only the compactNamesInMemory most recently used names
+# are kept in memory; the rest are spilled to a temporary file on disk
+compactBookkeeping = False
+compactExactCounts = 1000000
+compactNamesInMemory = 100000
+
+# When several artists' profiles are needed at once (i.e., when refreshing a graph), they're requested
+# profileBatchSize at a time, w/ a single /users?ids=... request per batch
+profileBatchSize = 50
+
+# The profiles that come w/ every page of followings and followers are kept in the profile store, so the
+# follower counts of the artists who come up as seeds (and their node attributes) are usually known w/o
+# asking the API; the profileStoreSize most recently used profiles are kept in memory
+profileStoreSize = 100000
+
+# Messages are logged at logLevel: "debug" adds a few lines for every artist that's checked (and the top of the
+# priority queue every 10 artists), which slows down fast crawls, and "warning" only shows problems. The
+# recentLogSize most recent messages are also kept in memory, and written to [graph].log when the crawl stops.
+# The crawl's progress is shown on one line, which is redrawn at most progressUpdatesPerSecond times per second
+logLevel = "info"
+recentLogSize = 1000
+progressUpdatesPerSecond = 4
+
+# When this is True, the mutual follows of each seed are found by intersecting its following list
+# w/ its followers list (whenever that takes fewer requests than checking each followed artist)
+useFollowersIntersection = True
+
+# Here, I'm declaring the "client" variable, which I'll use throughout the rest of the application; it's
+# set up once the user enters their client ID below (or by crawlWorkers.py, when this file is imported)
+client = None
+
+# This object collects the crawl's metrics; the client records each request's latency in it
+metrics = CrawlMetrics()
+
+# Setting up the priority queue for the crawling fronteir; it's an indexed heap, so re-adding
+# an artist w/ a new priority updates them in place
+frontier = IndexedHeap()
+graph = CompactGraph()
+
+# Declaring the cache (which is opened by makeClient(), so importing this file doesn't create its database),
+# as well as the dicts that hold data fetched ahead of time by prefetchFollowBack() (whether each target
+# follows the seed back, and the favorites of the ones who do)
+followingCache = None
+prefetchedFollowing = {}
+prefetchedFavorites = {}
+profileStore = ProfileStore(maxEntries=profileStoreSize)
+
+# These hold the following lists that probeFollowing() stopped fetching partway through
+partialFollowingSize = 5000
+partialFollowing = OrderedDict()
+partialFollowingLock = threading.Lock()
+
+# These dictionaries are essential data structures; the reciprocity index tracks who mutually
+# follows the artists we've explored
+mutualIndex = ReciprocityIndex()
+if (compactBookkeeping):
+	artistNameDict = NameStore(memoryEntries=compactNamesInMemory)
+	artistEncounterDict = CompactCounter(exactLimit=compactExactCounts)
+else:
+	artistNameDict = {}
+	artistEncounterDict = {}
 artistExploredDict = {}
 fullyExplored = {}
+seedFailures = {}
 
 # =========================
 #          METHODS
 # =========================
 
+# This method sets up an API client w/ the given client ID, using the transport and request rate settings above;
+# it also opens the following cache, if it isn't open yet
+def makeClient(clientID):
+	global followingCache
+	if (followingCache is None):
+		followingCache = FollowingCache(followingCachePath, ttl=followingCacheTTL, maxEntries=followingCacheSize)
+	transport = None
+	scheduler = RequestScheduler(rate=requestRate, maxRate=maxRequestRate, maxAttempts=maxRequestAttempts)
+	if (transportMode == "replay"):
+		transport = ReplayTransport(ResponseStore(transportStorePath), latency=replayLatency, latencyJitter=replayLatencyJitter, errorRate=replayErrorRate, randomSeed=replaySeed)
+		scheduler = RequestScheduler(rate=1e6, maxRate=1e6, maxAttempts=maxRequestAttempts)
+	newClient = PooledClient(client_id=clientID, host=apiHost, useSSL=apiUseSSL, poolSize=followBackWorkers, scheduler=scheduler, metrics=metrics, transport=transport)
+	if (transportMode == "record"):
+		newClient.transport = RecordingTransport(newClient.transport, ResponseStore(transportStorePath))
+	return newClient
+
 # This method will extract a page cursor from a SoundCloud URI
 def extractCursor(uri):
 
@@ -52,120 +182,199 @@ def extractCursor(uri):
 		if (curChar == '='):
 			return int(uri[curIdx:])
 
-# This method will clear out any items in the cache that haven't been accessed
+# This method will clear out any expired or least recently used items in the cache
 def clearCache():
-	toDelete = []
-	for key in cache.keys():
-		accessCt = cache[key][0]
-		if (accessCt == 0):
-			toDelete.append(key)
-			
-	for key in toDelete:
-		del cache[key]
-
-# When given a user's ID, this method will return a list of (username, ID) pairs
-# that the given user follows
+	followingCache.evict()
+	cacheStats = followingCache.stats()
+	log.info("Cache hits: %d, misses: %d (%.1f%% hit ratio)", cacheStats["hits"], cacheStats["misses"], cacheStats["hitRatio"] * 100)
+	profileStats = profileStore.stats()
+	log.info("Profile store hits: %d, misses: %d (%.1f%% hit ratio)", profileStats["hits"], profileStats["misses"], profileStats["hitRatio"] * 100)
+	requestStats = client.scheduler.stats()
+	log.info("API requests: %d, retries: %d, throttled: %d, failed: %d (now sending %.1f requests/second)", requestStats["requests"], requestStats["retries"], requestStats["throttled"], requestStats["failures"], requestStats["rate"])
+
+# This method updates the metrics that are read from elsewhere (the cache, the request scheduler, the frontier
+# and the graph), and then writes all of the metrics to the given path. The frontier's tombstone ratio is the
+# fraction of its entries that have been removed, but still take up memory (or disk space)
+def exportMetrics(path, curGraph, frontierSize, tombstoneRatio):
+	cacheStats = followingCache.stats()
+	requestStats = client.scheduler.stats()
+	exploredCt = metrics.snapshot()["counters"].get("seedsExplored", 0)
+	metrics.setGauge("followingCacheHitRatio", cacheStats["hitRatio"])
+	metrics.setGauge("profileStoreHitRatio", profileStore.stats()["hitRatio"])
+	metrics.setGauge("apiRequests", requestStats["requests"])
+	metrics.setGauge("apiRetries", requestStats["retries"])
+	metrics.setGauge("apiThrottled", requestStats["throttled"])
+	metrics.setGauge("apiFailures", requestStats["failures"])
+	metrics.setGauge("requestRate", requestStats["rate"])
+	metrics.setGauge("apiCallsPerExploredArtist", requestStats["requests"] / exploredCt if exploredCt else 0.0)
+	metrics.setGauge("frontierSize", frontierSize)
+	metrics.setGauge("frontierTombstoneRatio", tombstoneRatio)
+	metrics.setGauge("graphNodes", curGraph.number_of_nodes())
+	metrics.setGauge("graphEdges", curGraph.number_of_edges())
+	with metrics.timer("metricsExport"):
+		metrics.export(path)
+
+# This generator requests the pages of a paginated API listing one at a time, and yields (collection, nextCursor)
+# for each of them; nextCursor is None on the last page. Since it only requests a page once the caller asks
+# for it, a caller that stops early skips the rest of the listing. Passing a cursor resumes partway through
+def iterPages(getRequest, cursor=None, firstLimit=100):
+	pageCt = 0
+	try:
+		while (True):
+			if (cursor is None):
+				apiResponse = client.get(getRequest, limit=firstLimit, linked_partitioning=1)
+			else:
+				apiResponse = client.get(getRequest, limit=200, linked_partitioning=1, cursor=cursor)
+			pageCt += 1
+
+			# If there aren't any more pages, this is the last one
+			fields = apiResponse.fields()
+			nextHref = fields.get("next_href")
+			cursor = None if nextHref is None else extractCursor(nextHref)
+			yield fields["collection"], cursor
+			if (cursor is None):
+				return
+	finally:
+		metrics.countCall(endpointFor(getRequest), pageCt)
+
+# When given a user's ID, this method will return a list of (username, ID, info) tuples for the users
+# that the given user follows; the info is the same list getInfoFromID() returns
 def getFollowingFromID(userID):
-	
-	# Set up some of the variables needed for the impending search
-	getRequest = '/users/' + str(userID) + '/followings'
-	apiResponse = client.get(getRequest, limit=100, linked_partitioning=1)
 	userList = []
-	hasMore = True
-
-	# Run the loop to pull the names of the users
-	while (hasMore):
-		followingList = apiResponse.fields()['collection']
-		for user in followingList:
-			
-			attributesToGrab = ["track_count", "followers_count", "public_favorites_count", "permalink_url", "city", "country"]
-			infoList = []
-			for attribute in attributesToGrab:
-				info = user[attribute]
-				if (info is None):
-					infoList.append("n/a")
-				else:
-					infoList.append(info)
-
-			userList.append((user['username'], user['id'], infoList))
-
-
-		# If there aren't any more pages, change hasMore to False. Otherwise, continue
-		if (apiResponse.fields()['next_href'] is None):
-			hasMore = False
-		else:
-			nextCursor = extractCursor(apiResponse.fields()['next_href'])
-			apiResponse = client.get(getRequest, limit=200, linked_partitioning=1, cursor=nextCursor)
-
-	# Return the results
+	for followingList, nextCursor in iterPages('/users/' + str(userID) + '/followings'):
+		profileStore.remember(followingList)
+		userList += [(user['username'], user['id'], infoFromUser(user)) for user in followingList]
 	return userList
 
-# This is a more lightweight version of the above method
+# This is a more lightweight version of the above method; it returns the IDs of the
+# users that the given user follows (as a SortedIDs), reading through the cache
 def getFollowingFromID_light(userID):
-	
-	# Set up some of the variables needed for the impending search
-	getRequest = '/users/' + str(userID) + '/followings'
-	apiResponse = client.get(getRequest, limit=100, linked_partitioning=1)
-	userList = {}
-	hasMore = True
-
-	# Run the loop to pull the names of the users
-	while (hasMore):
-		followingList = apiResponse.fields()['collection']
-		for user in followingList:
-			userList[user['id']] = 1
-
-		# If there aren't any more pages, change hasMore to False. Otherwise, continue
-		if (apiResponse.fields()['next_href'] is None):
-			hasMore = False
-		else:
-			nextCursor = extractCursor(apiResponse.fields()['next_href'])
-			apiResponse = client.get(getRequest, limit=200, linked_partitioning=1, cursor=nextCursor)
+	cachedFollowing = followingCache.get(userID)
+	if (cachedFollowing is not None):
+		return cachedFollowing
+	return followingCache.put(userID, fetchFollowingFromID_light(userID))
+
+# This method requests the IDs of the users that the given user follows from the API; if a probe
+# already fetched the first few pages, it picks up where the probe stopped
+def fetchFollowingFromID_light(userID):
+	userIDs, cursor = takePartialFollowing(userID)
+	if (userIDs is None or cursor is not None):
+		userIDs = userIDs or set()
+		for followingList, nextCursor in iterPages('/users/' + str(userID) + '/followings', cursor):
+			profileStore.remember(followingList)
+			userIDs.update(user['id'] for user in followingList)
+	return SortedIDs(userIDs)
+
+# This method checks whether a user follows targetID, without necessarily fetching the user's whole following
+# list: it stops paginating as soon as targetID turns up. The pages it did fetch are kept (see partialFollowing),
+# so a later probe or fetch for the same user continues from there; if it reaches the end of the list, the
+# full list goes into the cache. It's meant for users whose full list isn't in the cache already, and it
+# returns (whether they follow targetID, whether this is the first time their list has been requested)
+def probeFollowing(userID, targetID):
+	userIDs, cursor = takePartialFollowing(userID)
+	firstProbe = userIDs is None
+	if (userIDs is not None and targetID in userIDs):
+		rememberPartialFollowing(userID, userIDs, cursor)
+		return (True, firstProbe)
+
+	userIDs = userIDs or set()
+	for followingList, cursor in iterPages('/users/' + str(userID) + '/followings', cursor):
+		profileStore.remember(followingList)
+		pageIDs = [user['id'] for user in followingList]
+		userIDs.update(pageIDs)
+		if (targetID in pageIDs):
+			break
+	if (cursor is None):
+		followingCache.put(userID, userIDs)
+	else:
+		rememberPartialFollowing(userID, userIDs, cursor)
+	return (targetID in userIDs, firstProbe)
+
+# These helper methods hold the partially fetched following lists; each entry is (set of IDs, cursor of the
+# next page), and only the partialFollowingSize most recently used ones are kept. They're thread-safe, since
+# prefetchFollowBack() probes from several threads at once
+def takePartialFollowing(userID):
+	with partialFollowingLock:
+		return partialFollowing.pop(userID, (None, None))
+
+def rememberPartialFollowing(userID, userIDs, cursor):
+	with partialFollowingLock:
+		partialFollowing[userID] = (userIDs, cursor)
+		while (len(partialFollowing) > partialFollowingSize):
+			partialFollowing.popitem(last=False)
+
+# This method requests the IDs of the given user's followers from the API
+def getFollowersFromID_light(userID):
+	userIDs = []
+	for followerList, nextCursor in iterPages('/users/' + str(userID) + '/followers', firstLimit=200):
+		profileStore.remember(followerList)
+		userIDs += [user['id'] for user in followerList]
+	return SortedIDs(userIDs)
+
+# This method finds which of the given IDs (the artists a user follows) follow the user back, by
+# intersecting them w/ the user's own followers list. That takes followerCt / 200 requests, so
+# it's only done when that's fewer requests than checking each uncached artist one by one would be;
+# otherwise (or if the request fails) it returns None, and the caller falls back to followBack()
+def getMutualsFromID(userID, followingIDs, followerCt):
+
+	if (not useFollowersIntersection or not isinstance(followerCt, int)):
+		return None
+	uncachedCt = sum(1 for followingID in followingIDs if followingID not in followingCache)
+	if (followerCt / 200 > uncachedCt):
+		return None
 
-	# Return the results
-	return userList
+	# Surrounding the API call with a try/except in case it fails
+	try:
+		followers = getFollowersFromID_light(userID)
+	except Exception:
+		log.error("*** ERROR: FAILED TO GRAB THE SEED ARTIST'S FOLLOWERS; CHECKING EACH ARTIST INSTEAD ***")
+		return None
+	return set(followingID for followingID in followingIDs if followingID in followers)
+
+# This generator yields a (userID, username) pair for the artist of each song the given user has favorited,
+# requesting the pages of their favorites as it goes (the artists' profiles go into the profile store, if
+# the page holds them)
+def iterFavoritesFromID(userID):
+	for favoritesList, nextCursor in iterPages('/users/' + str(userID) + '/favorites'):
+		profileStore.remember(song["user"] for song in favoritesList)
+		for song in favoritesList:
+			yield (song["user_id"], song["user"]["username"])
+
+# This method returns a list of (userID, username) pairs - one for the artist of each song
+# the given user has favorited
+def getFavoritesFromID(userID):
+	return list(iterFavoritesFromID(userID))
 
-# This is a more lightweight version of the above method
+# This method boosts the encounter count of the artists that the given user has favorited
 def updateFavoritesFromID(userID, boostThreshold):
-	
-	# Set up some of the variables needed for the impending search
-	getRequest = '/users/' + str(userID) + '/favorites'
-	apiResponse = client.get(getRequest, limit=100, linked_partitioning=1)
-	hasMore = True
+
+	# Use the favorites list if it was prefetched; otherwise, stream it from the API
+	if (userID in prefetchedFavorites):
+		artistList = prefetchedFavorites.pop(userID)
+	else:
+		artistList = iterFavoritesFromID(userID)
 
 	# Some data structures that'll limit the growth of the favoritesList
 	favoriteCtDict = {}
 
-	# Run the loop to pull the names of the users
-	while (hasMore):
-		favoritesList = apiResponse.fields()['collection']
-		for song in favoritesList:
+	for newUserID, newUserName in artistList:
 
-			# Skip artists that favorite themselves
-			newUserID = song["user_id"]
-			if (newUserID == userID): 
-				continue
-			newUserName = song["user"]["username"]
+		# Skip artists that favorite themselves
+		if (newUserID == userID): 
+			continue
 
-			# Check to see if you've already saturated the artistEncounterDict w/ this artist
-			if (newUserID not in favoriteCtDict):
-				favoriteCtDict[newUserID] = 0
-			favoriteCtDict[newUserID] += 1
-			if (favoriteCtDict[newUserID] > boostThreshold):
-				continue
+		# Check to see if you've already saturated the artistEncounterDict w/ this artist
+		if (newUserID not in favoriteCtDict):
+			favoriteCtDict[newUserID] = 0
+		favoriteCtDict[newUserID] += 1
+		if (favoriteCtDict[newUserID] > boostThreshold):
+			continue
 
-			# Update the encounter count
-			if (newUserID not in artistEncounterDict):
-				artistEncounterDict[newUserID] = 0
-				artistNameDict[newUserID] = newUserName
-			artistEncounterDict[newUserID] += 1
-
-		# If there aren't any more pages, change hasMore to False. Otherwise, continue
-		if ("next_href" not in apiResponse.fields() or apiResponse.fields()['next_href'] is None):
-			hasMore = False
-		else:
-			nextCursor = extractCursor(apiResponse.fields()['next_href'])
-			apiResponse = client.get(getRequest, limit=200, linked_partitioning=1, cursor=nextCursor)
+		# Update the encounter count
+		if (newUserID not in artistEncounterDict):
+			artistEncounterDict[newUserID] = 0
+			artistNameDict[newUserID] = newUserName
+		artistEncounterDict[newUserID] += 1
 
 # This method returns the following attributes for a given userID: 
 # (# of tracks, # of followers, # of favorites, public URL, city, country)
@@ -174,15 +383,64 @@ def getInfoFromID(userID):
 	# Create the get request and pull the info from the API
 	getRequest = '/users/' + str(userID)
 	apiResponse = client.get(getRequest)
-	attributesToGrab = ["track_count", "followers_count", "public_favorites_count", "permalink_url", "city", "country"]
-	infoList = []
-	for attribute in attributesToGrab:
-		info = apiResponse.fields()[attribute]
-		if (info is None):
-			infoList.append("n/a")
+	metrics.countCall("users", 1)
+	profileStore.remember([apiResponse.fields()])
+	return infoFromUser(apiResponse.fields())
+
+# This method returns the same info as getInfoFromID(), but reads it from the profile store if it's there
+def getCachedInfo(userID):
+	profile = profileStore.get(userID)
+	if (profile is not None):
+		return profile[1]
+	return getInfoFromID(userID)
+
+# This method makes sure the profile store holds the profiles of the given IDs: the ones it doesn't hold are
+# requested w/ getInfoFromIDs() (i.e., in batches of profileBatchSize). It returns how many were requested
+def prefetchProfiles(userIDs):
+	missingIDs = [userID for userID in dict.fromkeys(userIDs) if userID not in profileStore]
+	if (missingIDs):
+		getInfoFromIDs(missingIDs)
+	return len(missingIDs)
+
+# This method prefetches the profiles the seed selection below is about to need, if the given candidate's
+# isn't in the profile store: theirs, and those of the next connected artists in the priority queue, in
+# one batch (rather than one request per candidate)
+def prefetchCandidateProfiles(candidateID):
+	if (candidateID in profileStore):
+		return
+	upcomingIDs = [artistID for artistID, priority in frontier.topK(profileBatchSize * 4) if mutualIndex.isConnected(artistID)]
+	prefetchProfiles([candidateID] + upcomingIDs[:profileBatchSize - 1])
+
+# This method returns {ID: (username, info)} for each of the given IDs, where info is the same list getInfoFromID()
+# returns. The profiles are requested profileBatchSize at a time (several batches at once); if a batch fails, its
+# artists are requested one by one instead. Artists the API doesn't return (i.e., deleted accounts) are left out
+def getInfoFromIDs(userIDs):
+	userIDs = list(userIDs)
+	batchList = [tuple(userIDs[startIdx:startIdx+profileBatchSize]) for startIdx in range(0, len(userIDs), profileBatchSize)]
+	fetchedBatches = fetchMany(batchList, getProfileBatch, followBackWorkers)
+
+	profileDict = {}
+	for batch in batchList:
+		if (batch in fetchedBatches):
+			userList = fetchedBatches[batch]
 		else:
-			infoList.append(info)
-	return infoList
+			userList = []
+			for userID in batch:
+				try:
+					userList.append(client.get('/users/' + str(userID)).fields())
+					metrics.countCall("users", 1)
+				except Exception:
+					log.error("*** ERROR: FAILED TO GRAB THE INFO OF THE ARTIST W/ THE ID %s ***", userID)
+		profileStore.remember(userList)
+		for user in userList:
+			profileDict[user["id"]] = (user["username"], infoFromUser(user))
+	return profileDict
+
+# This method requests the profiles of a batch of IDs from the API in one request, and returns their JSON
+def getProfileBatch(userIDs):
+	apiResponse = client.get('/users', ids=",".join(str(userID) for userID in userIDs), limit=len(userIDs))
+	metrics.countCall("users", 1)
+	return [response.fields() for response in apiResponse]
 
 # When given the URL of a soundcloud user, this method will return that user's ID
 def getArtistID(url):
@@ -209,362 +467,485 @@ def getArtistID(url):
 # This method checks if the target follows the source back
 def followBack(source, target):
 
-	print("Checking to see if %s is following %s..." % (target[1], source[1]))
+	log.debug("Checking to see if %s is following %s...", target[1], source[1])
 
 	# First, check to see if the target has been cached
-	if (target[0] in cache):
+	followingList = followingCache.get(target[0])
+	if (followingList is not None):
 
-		# Grab the list of following from the cache
-		print("We found %s in the cache! Continuing to check..." % target[1])
-		followingList = cache[target[0]][1]
+		# Check the cached list of following
+		log.debug("We found %s in the cache! Continuing to check...", target[1])
 
-		# If the source *is* in the query list, return True and delete from cache
+		# If the source *is* in the query list, return True
 		if (source[0] in followingList):
-			del cache[target[0]]
-			print("YES")
+			log.debug("YES")
 			return True
 
-		# Otherwise, update accessCt and then return False
+		# Otherwise, return False
 		else:
-			cache[target[0]][0] += 1
-			print("NO")
+			log.debug("NO")
 			return False
 
-	# If the target hasn't been cached, request the API and add it to the cache
+	# If the target hasn't been cached, probe their following list on the API (which stops as soon as the
+	# source turns up), unless that was already done by prefetchFollowBack()
 	else:
 		# Surrounding the API call with a try/except in case it fails
 		try:
-			targetFollowing = getFollowingFromID_light(target[0])
-		except Exception as e:
-			if isinstance(e, KeyboardInterrupt):
-				sys.exit()
-			print("*** ERROR: FAILED TO GRAB TARGET ARTIST'S FOLLOWING; TRYING AGAIN ***")
-			return followBack(source, target)
-		cache[target[0]] = [0, targetFollowing]
-		if (source[0] in targetFollowing):
-			print("YES\n")
-			# Surrounding the API call with a try/except in case it fails
-			try:
-				updateFavoritesFromID(target[0], 3)
-			except Exception as e:
-				print("*** ERROR: SOMETHING FAILED WHEN UPDATING PRIORITY RE: FAVORITES ***")
-				traceback.print_exc()
+			if (target[0] in prefetchedFollowing):
+				isFollowingBack, firstProbe = prefetchedFollowing.pop(target[0])
+			else:
+				isFollowingBack, firstProbe = probeFollowing(target[0], source[0])
+		except Exception:
+			log.error("*** ERROR: GAVE UP ON GRABBING %s'S FOLLOWING; TREATING THEM AS NOT FOLLOWING BACK ***", target[1])
+			return False
+		if (isFollowingBack):
+			log.debug("YES\n")
+			# Boost the artists they've favorited, but only the first time their list is requested (as before,
+			# when their full list went straight into the cache, and later checks were cache hits)
+			if (firstProbe):
+				# Surrounding the API call with a try/except in case it fails
+				try:
+					updateFavoritesFromID(target[0], 3)
+				except Exception:
+					log.exception("*** ERROR: SOMETHING FAILED WHEN UPDATING PRIORITY RE: FAVORITES ***")
 			return True
 		else:
-			print("NO\n") 
+			log.debug("NO\n")
 			return False
 
-# This is a priority queue method to add an item to the queue
+# This method fetches (concurrently) everything the upcoming followBack(source, target) calls
+# will need: whether each target that isn't cached yet follows the source, and then the favorites of
+# each target that turned out to follow the source back. The graph, artistEncounterDict, etc.
+# aren't touched here; followBack() still applies the results one target at a time, in order
+def prefetchFollowBack(sourceID, targetIDs):
+
+	# Only prefetch for the targets that followBack() would otherwise request from the API
+	toFetch = [targetID for targetID in targetIDs if targetID not in followingCache and targetID not in prefetchedFollowing]
+	prefetchedFollowing.update(fetchMany(toFetch, lambda targetID: probeFollowing(targetID, sourceID), followBackWorkers))
+
+	# Grab the favorites of the targets who follow the source back (the first time their list is requested)
+	followingBack = [targetID for targetID in toFetch if all(prefetchedFollowing.get(targetID, (False, False)))]
+	prefetchedFavorites.update(fetchMany(followingBack, getFavoritesFromID, followBackWorkers))
+
+# This method adds a node (keyed by the artist's SoundCloud ID) to the graph, and records it in the journal
+def addNode(nodeID, **attributes):
+	graph.add_node(nodeID, **attributes)
+	graphJournal.recordNode(nodeID, attributes)
+
+# This method adds an edge to the graph, and records it in the journal; the graph
+# drops any duplicate edges itself
+def addEdge(sourceID, targetID):
+	graph.add_edge(sourceID, targetID)
+	graphJournal.recordEdge(sourceID, targetID)
+
+# This method folds the journal into the .graphml file, and writes out the recent log messages; it runs when
+# the script exits (including on CTRL+C)
+def compactGraph():
+	progress.finish()
+	log.info("\nWriting the full graph to %s...", graphPath)
+	curTime = time.time()
+	with metrics.timer("graphCompact"):
+		graphJournal.compact(graph)
+	log.info("It took %.3f seconds to write that to disk\n", time.time() - curTime)
+	if (metricsInterval):
+		exportMetrics(metricsPath, graph, len(frontier), frontier.tombstoneRatio())
+	recentEvents.dump(logPathFor(graphPath))
+
+# This method adds artists that were passed over as seeds back into the queue w/ a lower priority
+def addBack(toAddBack):
+	for pair in toAddBack:
+		newPriority = int(pair[1] * -0.2)
+		if (newPriority == 0):
+			newPriority += 1
+		pqAdd(pair[0], newPriority)
+		log.debug("Added back %s w/ the priority %s", pair[0], newPriority)
+		if (pair[0] in artistNameDict):
+			log.debug("(The artist's name was %s", artistNameDict[pair[0]])
+
+# This method counts a failed attempt to fetch a seed's profile or following list, and returns whether the
+# seed should be dropped: once it's failed maxSeedFailures times, or right away if the error isn't worth
+# retrying. crawlWorkers.py and batchCrawl.py use it too, w/ their own frontiers
+def dropFailedSeed(seedID, error, seedName=None):
+	seedFailures[seedID] = seedFailures.get(seedID, 0) + 1
+	status = getattr(getattr(error, "response", None), "status_code", None)
+	if (seedFailures[seedID] >= maxSeedFailures or (status is not None and status not in retryableStatuses)):
+		log.error("Dropping %s (ID: %s) after %d failed attempt(s); the last error was: %s", seedName or seedID, seedID, seedFailures[seedID], error)
+		metrics.increment("seedsDropped")
+		return True
+	return False
+
+# This method handles a seed whose profile or following list couldn't be fetched: it's put back into the
+# queue w/ half of its priority, unless dropFailedSeed() says to drop it
+def seedFailed(seedID, priority, error):
+	if (dropFailedSeed(seedID, error, artistNameDict.get(seedID))):
+		return
+	newPriority = max(1, int(priority * -failedSeedFactor))
+	pqAdd(seedID, newPriority)
+	log.debug("Added back %s w/ the priority %s", seedID, newPriority)
+
+# This method saves a checkpoint of the crawler's state; if the names are in a NameStore, the ones it's spilled
+# to disk are saved next to the checkpoint, in [graph].checkpoint.names
+def writeCheckpoint():
+	if (isinstance(artistNameDict, NameStore)):
+		artistNameDict.backupPath = str(checkpointPathFor(graphPath)) + ".names"
+	saveCheckpoint(checkpointPathFor(graphPath), {
+		"frontier": frontier,
+		"artistNameDict": artistNameDict,
+		"artistEncounterDict": artistEncounterDict,
+		"artistExploredDict": artistExploredDict,
+		"oldSeeds": oldSeeds,
+		"mutualIndex": mutualIndex,
+		"followerThreshold": followerThreshold,
+		"curSeed": curSeed,
+		"curPriority": curPriority,
+		"followingCachePath": followingCachePath,
+	})
+
+# This method catches the state restored from a checkpoint up w/ the graph. Checkpoints are only written every
+# checkpointInterval seeds, but every seed's nodes and edges are journaled, so the graph can hold a few seeds
+# that the checkpoint doesn't know were explored. Those are marked as explored (and taken out of the priority
+# queue), and their mutual follows are indexed and queued, the way the crawl loop would have done it (w/o the
+# favorites boosts). It returns the IDs of those seeds
+def catchUpWithGraph():
+	laggingSeeds = [nodeID for nodeID, explored in zip(graph.nodeIDs, graph.explored) if explored and nodeID not in artistExploredDict]
+	for seedID in laggingSeeds:
+		artistExploredDict[seedID] = 1
+		oldSeeds.append(seedID)
+		if (seedID in frontier):
+			pqRemove(seedID)
+	for seedID in laggingSeeds:
+		mutualIDs = []
+		for neighborID in graph.successors(seedID):
+			if (graph.isExplored(neighborID)):
+				if (graph.has_edge(neighborID, seedID)):
+					mutualIDs.append(neighborID)
+				continue
+			mutualIDs.append(neighborID)
+			artistNameDict[neighborID] = graph.nodeData(neighborID)["username"]
+			if (neighborID not in artistEncounterDict):
+				artistEncounterDict[neighborID] = 0
+			artistEncounterDict[neighborID] += 1
+			pqAdd(neighborID, artistEncounterDict[neighborID])
+		mutualIndex.addExplored(seedID, mutualIDs)
+	return laggingSeeds
+
+# This is a priority queue method to add an item to the queue (or update its priority)
 def pqAdd(item, priority):
-	priority = priority * -1
-	if item in entry_finder:
-		pqRemove(item)
-	count = next(counter)
-	entry = [priority, count, item]
-	entry_finder[item] = entry
-	heapq.heappush(pq, entry)
+	frontier.push(item, priority * -1)
 
 # This is a priority queue method; it'll pop an item from the queue
 def pqPop():
-	while pq:
-		priority, count, item = heapq.heappop(pq)
-		# If the item hasn't already been removed...
-		if item is not REMOVED:
-			del entry_finder[item]
-			return (item, priority)
+	popped = frontier.pop()
 	# Return False if the queue is empty
-	return False
+	if (popped is None):
+		return False
+	return popped
 
 # This is a priority queue helper method; it removes an item from the queue 
 def pqRemove(item):
-	entry = entry_finder.pop(item)
-	entry[-1] = REMOVED
+	frontier.remove(item)
 
-# This is a priority queue method; it'll print out the top 10 items in the priority queue
+# This is a priority queue method; it'll log the top 50 items in the priority queue (at the debug level)
 def pqPrintTop():
-
-	# Creating a dictionary w/ priorties as keys and items as indices
-	priorityDict = {}
-	for item in pq:
-		curPriority = item[0]
-		curID = item[2]
-		if (curID is not REMOVED):
-			if (curPriority not in priorityDict):
-				priorityDict[curPriority] = []
-			priorityDict[curPriority].append((item[1], curID))
-
-	# Create the sorted list of the top ten
-	remaining = 50
-	sortedList = []
-	for curPriority, curList in sorted(priorityDict.items()):
-		done = False
-		for curItem in curList:
-			sortedList.append((curPriority, curItem[1]))
-			remaining -= 1
-			if (remaining == 0):
-				done = True
-				break
-		if (done): break
-
-	# Print the list
-	for item in sortedList:
-		print("- %s (ID: %s; Priority: %s)" % (artistNameDict[item[1]], item[1], item[0]))
-	print("\n")
+	for curID, curPriority in frontier.topK(50):
+		log.debug("- %s (ID: %s; Priority: %s)", artistNameDict[curID], curID, curPriority)
+	log.debug("\n")
 
 
 # =========================
 #           MAIN 
 # =========================
 
-# These declarations help to setup the data collection loop by adding a starting point to the priority queue
-leftTillWrite = 2
-leftTillCacheClear = 3
-backupCt = 0
-oldSeeds = []
-newGraph = True
-
-# Here, we read through the graph in the file to load its information
-if (graphPath != ""):
-
-	# Update the graph to be the one we've already created
-	newGraph = False
-	graph = nx.read_graphml(graphPath)
-	print("Updating data structures from graph...")
-
-	# Iterate through each node currently in the graph
-	for node, data in graph.nodes(data=True):
-
-		if ('id' not in data):
-			continue
-
-		# Add the artist's information to the artistNameDict
-		artistNameDict[data['id']] = node
-
-		# If a node has the explored tag, mark it as explored
-		if (data["explored"] == 1):
-			artistExploredDict[data['id']] = 1
-			oldSeeds.append(data['id'])
-		
-	print(artistEncounterDict)
-	curSeedIdx = 0
-	while(not artistEncounterDict):
-		updateFavoritesFromID(oldSeeds[curSeedIdx], 100)
-		curSeedIdx += 1
-	print()
-	print(artistEncounterDict)
-	for curArtist in artistEncounterDict.keys():
-		if (curArtist in oldSeeds):
-			continue
-		pqAdd(curArtist, artistEncounterDict[curArtist])
+# The main crawl only runs when this file is run directly; crawlWorkers.py imports its methods
+if (__name__ == "__main__"):
+
+	# Here, I'm setting up the logging, and the "client" variable w/ the user's client ID
+	configureLogging(logLevel, recentLogSize, progressUpdatesPerSecond)
+	userClientID = input("\nEnter your SoundCloud client ID: ")
+	client = makeClient(userClientID)
+
+	# Checking if the user already has a graph they want to work on 
+	graphPath = ""
+	userInput = int(input("\nAre you working on a new graph, or adding to an existing one?\n\n1) New Graph\n2) Existing Graph\n\nPlease enter the number corresponding with your choice: "))
+	if (userInput == 2):
+		graphPath = input("\nPlease enter the path to the .graphml file you're trying to expand: ")
+
+	# These declarations help to setup the data collection loop by adding a starting point to the priority queue
+	leftTillCacheClear = 3
+	leftTillCheckpoint = checkpointInterval
+	oldSeeds = []
+	newGraph = True
+	checkpoint = None
+
+	# Here, we read through the graph in the file to load its information
+	if (graphPath != ""):
+
+		# Update the graph to be the one we've already created, and then apply anything from
+		# the journal that didn't make it into the .graphml (i.e., if the last run crashed)
+		newGraph = False
+		if (graphExists(graphPath)):
+			graph = loadGraph(graphPath)
+		replayedCt = replayJournal(journalPathFor(graphPath), graph)
+		if (replayedCt):
+			log.info("Recovered %d nodes and edges from the journal", replayedCt)
+
+		# If there's a checkpoint for this graph, restore the crawler's state from it
+		checkpoint = loadCheckpoint(checkpointPathFor(graphPath))
+		if (checkpoint is not None):
+			log.info("Restoring the crawl from its checkpoint...")
+			frontier = checkpoint["frontier"]
+			artistNameDict = checkpoint["artistNameDict"]
+			artistEncounterDict = checkpoint["artistEncounterDict"]
+			artistExploredDict = checkpoint["artistExploredDict"]
+			oldSeeds = checkpoint["oldSeeds"]
+			mutualIndex = checkpoint["mutualIndex"]
+			caughtUpCt = len(catchUpWithGraph())
+			if (caughtUpCt):
+				log.info("Caught the checkpoint up w/ %d artists that were explored after it was saved", caughtUpCt)
+
+		# Otherwise, rebuild what we can from the graph itself
+		else:
+			log.info("Updating data structures from graph...")
 
-# Otherwise, if the graph is empty, start this way: 
-else:
-	startingPoint = getArtistID(input("\nEnter the SoundCloud URL of your starting point: ").strip()) 
-	graphPath = startingPoint[0] + ".graphml"
-	artistNameDict[startingPoint[1]] = startingPoint[0]
-	artistEncounterDict[startingPoint[1]] = 1
-	pqAdd(startingPoint[1], 1)
+			# Iterate through each node currently in the graph
+			for nodeID, data in graph.iterNodes():
 
-# Here, we check if there are any backups
-if (Path("backups").exists()):
-	for child in Path("backups").iterdir():
-		backupCt += 1
+				# Add the artist's information to the artistNameDict
+				artistNameDict[data['id']] = data['username']
 
-# Grab the first artist seed
-curSeed, curPriority = pqPop()
-firstRun = True
-followerThreshold = 0
+				# If a node has the explored tag, mark it as explored
+				if (data["explored"] == 1):
+					artistExploredDict[data['id']] = 1
+					oldSeeds.append(data['id'])
+			
+			mutualIndex = buildIndexFromGraph(graph)
+			log.debug("%s", artistEncounterDict)
+			curSeedIdx = 0
+			while(not artistEncounterDict):
+				updateFavoritesFromID(oldSeeds[curSeedIdx], 100)
+				curSeedIdx += 1
+			log.debug("\n%s", artistEncounterDict)
+			for curArtist in artistEncounterDict.keys():
+				if (curArtist in oldSeeds):
+					continue
+				pqAdd(curArtist, artistEncounterDict[curArtist])
+
+	# Otherwise, if the graph is empty, start this way: 
+	else:
+		startingPoint = getArtistID(input("\nEnter the SoundCloud URL of your starting point: ").strip()) 
+		graphPath = startingPoint[0] + ".graphml"
+		artistNameDict[startingPoint[1]] = startingPoint[0]
+		artistEncounterDict[startingPoint[1]] = 1
+		pqAdd(startingPoint[1], 1)
+
+	# Open the graph's journal (starting a new one for a new graph), and make sure the full graph
+	# gets written out when the script stops
+	graphJournal = GraphJournal(graphPath, fresh=newGraph, snapshotFormat=snapshotFormat, exportGraphml=exportGraphml)
+	atexit.register(compactGraph)
+
+	# Set up the metrics export, and the seed profiler
+	metricsPath = metricsPathFor(graphPath, metricsFormat)
+	lastMetricsExport = time.time()
+	seedProfiler = SeedProfiler(graphPath, every=profileEverySeeds)
+
+	# Grab the first artist seed (or, if we restored a checkpoint, the seed it was about to explore, unless
+	# they've been explored since)
+	if (checkpoint is not None):
+		curSeed, curPriority = checkpoint["curSeed"], checkpoint["curPriority"]
+		if (curSeed in artistExploredDict):
+			curSeed, curPriority = pqPop() or (False, 0)
+		followerThreshold = checkpoint["followerThreshold"]
+		firstRun = False
+	else:
+		curSeed, curPriority = pqPop()
+		firstRun = True
+		followerThreshold = 0
 
-# While the priority queue isn't empty, continue the data collection
-while (not isinstance(curSeed, bool)):
+	# While the priority queue isn't empty, continue the data collection
+	while (not isinstance(curSeed, bool)):
 
-	shuffledArtists = {}
+		shuffledArtists = {}
 
-	# Surrounding the API call with a try/except in case it fails
-	try:
-		seedArtistInfo = getInfoFromID(curSeed)
-	except:
-		print("*** ERROR: FAILED TO GRAB SEED ARTIST INFO; TRYING AGAIN ***")
-		continue
+		# Surrounding the API call with a try/except in case it fails
+		try:
+			seedArtistInfo = getCachedInfo(curSeed)
+		except Exception as e:
+			log.error("*** ERROR: FAILED TO GRAB SEED ARTIST INFO; MOVING ONTO THE NEXT SEED ***")
+			seedFailed(curSeed, curPriority, e)
+			curSeed, curPriority = pqPop() or (False, 0)
+			continue
 
-	if (firstRun):
-		firstRun = False
-		if (newGraph):
-			followerThreshold = int(seedArtistInfo[1])
-		else:
-			# Surrounding the API call with a try/except in case it fails
-			try:
-				firstArtistInfo = getInfoFromID(oldSeeds[0])
-				followerThreshold = int(firstArtistInfo[1])
-			except:
-				print("*** ERROR: FAILED TO GRAB THE SEED ARTIST INFO FROM THE FIRST ARTIST; USING THE NEW ONE ***")
+		if (firstRun):
+			firstRun = False
+			if (newGraph):
 				followerThreshold = int(seedArtistInfo[1])
+			else:
+				# Surrounding the API call with a try/except in case it fails
+				try:
+					firstArtistInfo = getCachedInfo(oldSeeds[0])
+					followerThreshold = int(firstArtistInfo[1])
+				except Exception:
+					log.error("*** ERROR: FAILED TO GRAB THE SEED ARTIST INFO FROM THE FIRST ARTIST; USING THE NEW ONE ***")
+					followerThreshold = int(seedArtistInfo[1])
+
+			# Move onto a new seed if this one is not up to scuff
+			if (seedArtistInfo[1] > followerThreshold and curSeed not in shuffledArtists):
+				log.info("%s is above the followerThreshold, so moving onto a new seed", artistNameDict[curSeed])
+				shuffledArtists[curSeed] = 1
+				pqAdd(curSeed, curPriority * -.02)
+				curSeed, curPriority = pqPop() or (False, 0)
+				continue
 
-		# Move onto a new seed if this one is not up to scuff
-		if (seedArtistInfo[1] > followerThreshold and curSeed not in shuffledArtists):
-			print("%s is above the followerThreshold, so moving onto a new seed" % artistNameDict[curSeed])
-			shuffledArtists[curSeed] = 1
-			pqAdd(curSeed, curPriority * -.02)
-			curSeed, curPriority = pqPop()
+		# Surrounding the API call with a try/except in case it fails
+		try:
+			# Grab the current seed artist's following list, and iterate through it
+			following = getFollowingFromID(curSeed)
+		except Exception as e:
+			log.error("*** ERROR: FAILED TO GRAB SEED ARTIST'S FOLLOWING LIST; MOVING ONTO THE NEXT SEED ***")
+			seedFailed(curSeed, curPriority, e)
+			curSeed, curPriority = pqPop() or (False, 0)
 			continue
 
-	# Surrounding the API call with a try/except in case it fails
-	try:
-		# Grab the current seed artist's following list, and iterate through it
-		following = getFollowingFromID(curSeed)
-	except:
-		print("*** ERROR: FAILED TO GRAB SEED ARTIST'S FOLLOWING LIST; TRYING AGAIN ***")
-		continue
-
-	# Marked the current seed artist as explored, and add a node in the graph for it
-	artistExploredDict[curSeed] = 1
-	seedArtistName = artistNameDict[curSeed]
-	oldSeeds.append(curSeed)
-
-	graph.add_node(seedArtistName, id=curSeed, trackCt=seedArtistInfo[0], followerCt=seedArtistInfo[1], favoriteCt=seedArtistInfo[2], url=seedArtistInfo[3], city=seedArtistInfo[4], country=seedArtistInfo[5], explored=1)
-
-	# Print some information so that you know it's been explored
-	print("\n\n\nExploring %s (ID: %s)" % (seedArtistName, curSeed))
-	leftTillPriorityPrint = 1
+		# Marked the current seed artist as explored, and add a node in the graph for it
+		artistExploredDict[curSeed] = 1
+		seedArtistName = artistNameDict[curSeed]
+		oldSeeds.append(curSeed)
+
+		addNode(curSeed, username=seedArtistName, trackCt=seedArtistInfo[0], followerCt=seedArtistInfo[1], favoriteCt=seedArtistInfo[2], url=seedArtistInfo[3], city=seedArtistInfo[4], country=seedArtistInfo[5], explored=1)
+
+		# Print some information so that you know it's been explored
+		log.info("\n\n\nExploring %s (ID: %s)", seedArtistName, curSeed)
+		seedProfiler.start()
+		leftTillPriorityPrint = 1
+		curMutuals = []
+
+		# Find the seed's mutual follows in bulk if we can; then, fetch the data for all of the
+		# follow-back checks (or the mutuals' favorites) below at once
+		targetIDs = [newID for newArtist, newID, newInfo in following if newID not in artistExploredDict]
+		seedMutuals = getMutualsFromID(curSeed, targetIDs, seedArtistInfo[1])
+		if (seedMutuals is not None):
+			log.info("Found %d mutual follows by checking %s's followers", len(seedMutuals), seedArtistName)
+			prefetchedFavorites.update(fetchMany(list(seedMutuals), getFavoritesFromID, followBackWorkers))
+		elif (followBackWorkers > 1):
+			prefetchFollowBack(curSeed, targetIDs)
 	
-	for idx, toUnpack in enumerate(following):
-
-		# Printing the priority queue every 10 artists
-		leftTillPriorityPrint -= 1
-		if (leftTillPriorityPrint == 0):
-			print("\nThe priority queue looks like:\n")
-			pqPrintTop()
-			leftTillPriorityPrint = 10
-
-		newArtist, newID, newInfo = toUnpack
-
-		print("We found %s (ID: %s) (%d/%d)" % (newArtist, newID, idx, len(following)))
-
-		# Add an edge back to the artist if you've already seen them
-		if (newID in artistExploredDict): 
-			graph.add_edge(seedArtistName, newArtist)
-			continue
+		for idx, toUnpack in enumerate(following):
+
+			# Logging the priority queue every 10 artists (only if the debug messages are on, since it takes a while)
+			leftTillPriorityPrint -= 1
+			if (leftTillPriorityPrint == 0):
+				if (log.isEnabledFor(logging.DEBUG)):
+					log.debug("\nThe priority queue looks like:\n")
+					pqPrintTop()
+				leftTillPriorityPrint = 10
+
+			newArtist, newID, newInfo = toUnpack
+
+			log.debug("We found %s (ID: %s) (%d/%d)", newArtist, newID, idx, len(following))
+			progress.update("Exploring %s: checked %d/%d artists, found %d mutuals (%d seeds explored)", seedArtistName, idx + 1, len(following), len(curMutuals), len(oldSeeds))
+
+			# Add an edge back to the artist if you've already seen them
+			if (newID in artistExploredDict): 
+				addEdge(curSeed, newID)
+				if (mutualIndex.areMutual(newID, curSeed)):
+					curMutuals.append(newID)
+				continue
 
-		# Skip an artist if they don't follow the seed artist back
-		if (not followBack((curSeed, seedArtistName), (newID, newArtist))): 
-			continue
+			# Skip an artist if they don't follow the seed artist back
+			if (seedMutuals is not None):
+				if (newID not in seedMutuals):
+					continue
+				try:
+					updateFavoritesFromID(newID, 3)
+				except Exception:
+					log.exception("*** ERROR: SOMETHING FAILED WHEN UPDATING PRIORITY RE: FAVORITES ***")
+			elif (not followBack((curSeed, seedArtistName), (newID, newArtist))): 
+				continue
 
-		# Add the new artist's name to the nameDict, update their encounter count, 
-		# and add them to the graph and priority queue
-		artistNameDict[newID] = newArtist 
-		if (newID not in artistEncounterDict):
-			artistEncounterDict[newID] = 0
-		artistEncounterDict[newID] += 1
-		pqAdd(newID, artistEncounterDict[newID])
-		graph.add_node(newArtist, id=newID, trackCt=newInfo[0], followerCt=newInfo[1], favoriteCt=newInfo[2], url=newInfo[3], city=newInfo[4], country=newInfo[5], explored=0)
-		graph.add_edge(seedArtistName, newArtist)
-
-	# Write to disk if 10 new artists have been processed
-	if (leftTillWrite == 0):
-		leftTillWrite = 1
-		print("\nWriting to disk!")
+			# Add the new artist's name to the nameDict, update their encounter count, 
+			# and add them to the graph and priority queue
+			artistNameDict[newID] = newArtist 
+			if (newID not in artistEncounterDict):
+				artistEncounterDict[newID] = 0
+			artistEncounterDict[newID] += 1
+			pqAdd(newID, artistEncounterDict[newID])
+			curMutuals.append(newID)
+			addNode(newID, username=newArtist, trackCt=newInfo[0], followerCt=newInfo[1], favoriteCt=newInfo[2], url=newInfo[3], city=newInfo[4], country=newInfo[5], explored=0)
+			addEdge(curSeed, newID)
+
+		# Record the seed's mutual follows in the reciprocity index
+		mutualIndex.addExplored(curSeed, curMutuals)
+
+		# Append this seed's new nodes and edges to the journal on disk
 		curTime = time.time()
-		nx.write_graphml(graph, graphPath)
+		with metrics.timer("journalFlush"):
+			journaledCt = graphJournal.flush()
 		timeToWrite = time.time() - curTime
-		print("It took %.3f seconds to write that to disk\n" % timeToWrite)
-
-	# Clear the cache if 3 new artists have been processed
-	if (leftTillCacheClear == 0):
-		print("Clearing cache...\n")
-		clearCache()
-
-	# Sleep to not overload the SoundCloud API
-	time.sleep(0.3)
-
-	# Update the current artist seed, and save the current graph
-	curSeed, curPriority = pqPop()
-	toAddBack = []
-	toDeleteFromSeeds = []
-	stillSearching = True
-	nextArtist = False
-
-	# Make sure that the artists you're choosing to follow actually follow you back
-	for seedIdx, oldSeed in enumerate(oldSeeds):
-		if (not stillSearching): break
-		while (stillSearching):
-			if (nextArtist):
-				nextArtist = False
-				break
-			curSeedPackage = (curSeed, artistNameDict[curSeed])
-			oldSeedPackage = (oldSeed, artistNameDict[oldSeed])
-			if (followBack(curSeedPackage, oldSeedPackage) and followBack(oldSeedPackage, curSeedPackage)):
-				print("Found a match: %s and %s were following each other" % (artistNameDict[curSeed], artistNameDict[oldSeed]))
-
-				# THIS IS WHERE I SHOULD ADD INFORMATION ABOUT RESHUFFLING
-				if (curSeed not in shuffledArtists):
-					# Check if their follower count is above the threshold
-					try:
-						seedArtistInfo = getInfoFromID(curSeed)
-						if (seedArtistInfo[1] > followerThreshold):
-							shuffledArtists[curSeed] = 1
-							toAddBack.append((curSeed, int(curPriority * -0.1)))
-							print("%s had %d followers, but the threshold was %d. Adding them back into the queue w/ the priority %d." % (artistNameDict[curSeed], seedArtistInfo[1], followerThreshold, int(curPriority * -0.5)))
-							for pair in toAddBack:
-								newPriority = int(pair[1] * -0.2)
-								if (newPriority == 0):
-									newPriority += 1
-								pqAdd(pair[0], newPriority)
-								print("Added back %s w/ the priority %s" % (str(pair[0]), str(newPriority)))
-								if (pair[0] in artistNameDict):
-									print("(The artist's name was %s" % artistNameDict[pair[0]])
-							toAddBack = []
-						else:
-							stillSearching = False
-							break
-					except:
-						print("*** ERROR: FAILED TO GRAB SEED ARTIST INFO; JUST ROLLING W/ THAT AS A SEED ***")
-						stillSearching = False
-						break
-						
-				else:
-					stillSearching = False
+		log.info("\nIt took %.3f seconds to journal %d new nodes and edges\n", timeToWrite, journaledCt)
+		metrics.increment("seedsExplored")
+		metrics.increment("nodesAndEdgesJournaled", journaledCt)
+		profilePath = seedProfiler.stop()
+		if (profilePath is not None):
+			log.info("Saved a profile of this seed to %s\n", profilePath)
+
+		# Clear the cache if 3 new artists have been processed
+		if (leftTillCacheClear == 0):
+			log.info("Clearing cache...\n")
+			clearCache()
+			leftTillCacheClear = 3
+
+		# Drop anything that was prefetched but never used
+		prefetchedFollowing.clear()
+		prefetchedFavorites.clear()
+
+		# Update the current artist seed. It has to be mutually connected to an artist we've already explored,
+		# which the reciprocity index can tell us w/o asking the API; anyone who isn't gets added back into the
+		# queue w/ a lower priority, as do artists above the followerThreshold (the first time we see them)
+		curSeed, curPriority = pqPop() or (False, 0)
+		toAddBack = []
+		while (not isinstance(curSeed, bool)):
+			if (mutualIndex.isConnected(curSeed)):
+				if (curSeed in shuffledArtists):
 					break
+
+				# Check if their follower count is above the threshold (their profile is usually in the profile
+				# store; if it isn't, the next few candidates' profiles are requested along w/ theirs)
+				try:
+					prefetchCandidateProfiles(curSeed)
+					seedArtistInfo = getCachedInfo(curSeed)
+					aboveThreshold = seedArtistInfo[1] > followerThreshold
+				except Exception:
+					log.error("*** ERROR: FAILED TO GRAB SEED ARTIST INFO; JUST ROLLING W/ THAT AS A SEED ***")
+					break
+				if (not aboveThreshold):
+					break
+				shuffledArtists[curSeed] = 1
+				toAddBack.append((curSeed, int(curPriority * -0.1)))
+				log.info("%s had %d followers, but the threshold was %d. Adding them back into the queue w/ the priority %d.", artistNameDict[curSeed], seedArtistInfo[1], followerThreshold, int(curPriority * -0.5))
 			else:
-				print("Didn't find a match; %s and %s weren't following eachother" % (artistNameDict[curSeed], artistNameDict[oldSeed]))
+				log.debug("Didn't find a match; %s isn't following any explored artists back", artistNameDict[curSeed])
 				toAddBack.append((curSeed, curPriority))
-			if (stillSearching):
-				popped = pqPop()
-				if (isinstance(popped, bool)):
-					print("\n\n\nADDING %s TO BE REMOVED FROM OLDSEEDS\n\n\n" % artistNameDict[oldSeed])
-					toDeleteFromSeeds.append(oldSeed)
-					nextArtist = True
-					if (seedIdx == len(oldSeeds)-1):
-						stillSearching = False
-					for pair in toAddBack:
-						newPriority = int(pair[1] * -0.2)
-						if (newPriority == 0):
-							newPriority += 1
-						pqAdd(pair[0], newPriority)
-						print("Added back %s w/ the priority %s" % (str(pair[0]), str(newPriority)))
-						if (pair[0] in artistNameDict):
-							print("(The artist's name was %s" % artistNameDict[pair[0]])
-					toAddBack = []
-					curSeed, curPriority = pqPop()
-					continue	
-				else:
-					curSeed, curPriority = popped
-		for pair in toAddBack:
-			newPriority = int(pair[1] * -0.2)
-			if (newPriority == 0):
-				newPriority += 1
-			pqAdd(pair[0], newPriority)
-			print("Added back %s w/ the priority %s" % (str(pair[0]), str(newPriority)))
-			if (pair[0] in artistNameDict):
-				print("(The artist's name was %s" % artistNameDict[pair[0]])
-		toAddBack = []
+			curSeed, curPriority = pqPop() or (False, 0)
 
-	# Clearing out any artists we've fully explored from the old seeds list
-	for seedToDelete in toDeleteFromSeeds:
-		print("\n\n\n\n**** REMOVING %s FROM OLDSEEDS****\n\n\n" % artistNameDict[seedToDelete])
-		oldSeeds.remove(seedToDelete)
+		# If nobody in the queue was connected, roll w/ the best of the artists we skipped
+		addBack(toAddBack)
+		if (isinstance(curSeed, bool) and toAddBack):
+			curSeed, curPriority = pqPop()
 
-	leftTillWrite -= 1
-	leftTillBackup -= 1
-	leftTillCacheClear -= 1
+		leftTillCacheClear -= 1
+
+		# Save a checkpoint of the crawl every checkpointInterval seeds
+		leftTillCheckpoint -= 1
+		if (leftTillCheckpoint == 0):
+			curTime = time.time()
+			with metrics.timer("checkpoint"):
+				writeCheckpoint()
+			log.info("It took %.3f seconds to save a checkpoint\n", time.time() - curTime)
+			leftTillCheckpoint = checkpointInterval
+
+		# Write out the metrics every metricsInterval seconds
+		if (metricsInterval and time.time() - lastMetricsExport >= metricsInterval):
+			exportMetrics(metricsPath, graph, len(frontier), frontier.tombstoneRatio())
+			lastMetricsExport = time.time()
 
 
@@ -0,0 +1,71 @@
+
+# This module is part of the SoundCloud social network generator; it holds a small stand-in
+# for soundcloud.Client that sends every request through one shared, pooled HTTP session
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from crawlMetrics import endpointFor
+from apiTransport import LiveTransport
+from requestScheduler import RequestScheduler
+
+# =========================
+#          METHODS
+# =========================
+
+# This class wraps a single JSON object from the API; it mimics soundcloud.resource.Resource,
+# so the rest of the crawler can keep calling .fields() on whatever client.get() returns
+class Resource:
+
+	def __init__(self, obj):
+		self.obj = obj
+
+	def fields(self):
+		return self.obj
+
+# This method turns a decoded JSON response into Resource objects (or a list of them)
+def wrapResponse(obj):
+	if (isinstance(obj, list)):
+		return [Resource(item) for item in obj]
+	return Resource(obj)
+
+# This class is a thread-safe client for the SoundCloud API. All of the worker threads share
+# its connection pool, so checking many artists at once doesn't open a new connection per call.
+# Setting host="localhost:8000" and useSSL=False points it at a local mock server instead. Every request
+# goes through a requestScheduler.RequestScheduler, which paces the requests and retries failures; if a
+# crawlMetrics.CrawlMetrics object is passed in, the latency of each request is recorded in it. Requests
+# are sent through the live API by default; see apiTransport.py for recording and replaying them instead
+class PooledClient:
+
+	def __init__(self, client_id, host="api.soundcloud.com", useSSL=True, poolSize=10, timeout=30, scheduler=None, metrics=None, transport=None):
+		self.client_id = client_id
+		self.metrics = metrics
+		self.baseURL = "%s://%s" % ("https" if useSSL else "http", host)
+		self.timeout = timeout
+		self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+		self.transport = transport if transport is not None else LiveTransport(self.session, self.baseURL, timeout)
+
+	# This method sends a GET request for the given path, and returns the decoded response
+	def get(self, path, **params):
+		params["client_id"] = self.client_id
+		endpoint = endpointFor(path)
+
+		def sendRequest():
+			startTime = time.perf_counter()
+			try:
+				return self.transport.send(path, params)
+			finally:
+				if (self.metrics is not None):
+					self.metrics.observeRequest(endpoint, time.perf_counter() - startTime)
+
+		response = self.scheduler.run(sendRequest)
+		return wrapResponse(response.json())
@@ -0,0 +1,80 @@
+
+# This module is part of the SoundCloud social network generator; it holds the profile store. Every page of
+# followings or followers the crawler fetches comes w/ the full profile of each user on it (their track,
+# follower and favorite counts, URL, city and country), so those are kept, and a seed's profile only has to
+# be requested from the API if it never turned up on one of those pages
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+
+# These are the fields of a user's JSON that make up their profile, in the order of the info list (which is
+# what getInfoFromID() returns)
+profileFields = ("track_count", "followers_count", "public_favorites_count", "permalink_url", "city", "country")
+grabInfo = itemgetter(*profileFields)
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the info list for a user's JSON; missing values become "n/a"
+def infoFromUser(user):
+	return ["n/a" if info is None else info for info in grabInfo(user)]
+
+# This class is the profile store: an in-memory LRU of {ID: (username, info)}, which holds the maxEntries most
+# recently used profiles. It's safe to use from the follow-back worker threads
+class ProfileStore:
+
+	def __init__(self, maxEntries=100000):
+		self.maxEntries = maxEntries
+		self.profiles = OrderedDict()
+		self.lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	# This method adds the profiles in a list of users' JSON (i.e., a page of followings); users whose JSON
+	# doesn't hold a full profile (like the artists on a page of favorites, which usually only have their
+	# ID and username) are skipped. It returns the number of profiles it added
+	def remember(self, userList):
+		addedCt = 0
+		with self.lock:
+			for user in userList:
+				if ("username" not in user or any(field not in user for field in profileFields)):
+					continue
+				self.profiles[user["id"]] = (user["username"], infoFromUser(user))
+				self.profiles.move_to_end(user["id"])
+				addedCt += 1
+			while (len(self.profiles) > self.maxEntries):
+				self.profiles.popitem(last=False)
+		return addedCt
+
+	# This method returns the (username, info) pair of the given user, or None if they're not in the store
+	def get(self, userID):
+		with self.lock:
+			if (userID not in self.profiles):
+				self.misses += 1
+				return None
+			self.profiles.move_to_end(userID)
+			self.hits += 1
+			return self.profiles[userID]
+
+	# This method checks whether the store holds the given user's profile, without counting a hit or miss
+	def __contains__(self, userID):
+		return userID in self.profiles
+
+	def __len__(self):
+		return len(self.profiles)
+
+	def clear(self):
+		with self.lock:
+			self.profiles.clear()
+
+	# This method returns the hit / miss counters, and the fraction of lookups that were hits
+	def stats(self):
+		lookups = self.hits + self.misses
+		return {"hits": self.hits, "misses": self.misses, "hitRatio": (self.hits / lookups) if lookups else 0.0}
@@ -0,0 +1,185 @@
+
+# This script is part of the SoundCloud social network generator; it brings an existing crawl graph up to
+# date w/o re-crawling it. The profiles of the explored artists are looked up in batches, and only the
+# artists whose track, follower or favorite counts changed since the graph was written have their
+# following lists fetched again; their edges are then patched in place. So, a refresh costs API calls
+# in proportion to how many artists changed, rather than to the size of the graph
+#
+# Example: python refreshGraph.py --client-id YOUR_ID --graph "Some Artist.graphml"
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import argparse, time
+import networkGenerator as ng
+from crawlWorkers import setupClient
+from followBackPool import fetchMany
+from followingCache import SortedIDs
+from graphJournal import GraphJournal, loadJournaledGraph
+from graphSnapshot import graphExists
+from crawlLog import log, progress, recentEvents, configureLogging, logPathFor
+
+# These are the node attributes that are compared to find the artists who changed, in the same order as the
+# first three items of the info getInfoFromID() returns
+comparedColumns = ["trackCt", "followerCt", "favoriteCt"]
+
+# =========================
+#          METHODS
+# =========================
+
+# This method returns the node attributes for an artist's (username, info) pair
+def nodeAttributes(username, info):
+	return {"username": username, "trackCt": info[0], "followerCt": info[1], "favoriteCt": info[2], "url": info[3], "city": info[4], "country": info[5]}
+
+# This method updates a node's attributes (if any of them changed), and records the update in the journal
+def updateNode(graph, journal, nodeID, attributes):
+	oldData = graph.nodeData(nodeID)
+	if (any(oldData[column] != value for column, value in attributes.items())):
+		graph.add_node(nodeID, **attributes)
+		journal.recordNode(nodeID, attributes)
+
+# This method looks up the profiles of the given artists, and updates their nodes; it returns (a dict of
+# {ID: new attributes} for the artists whose counts changed, the IDs the API didn't return). The nodes of
+# explored artists who changed are left alone, until their following list has been refreshed (so if that
+# fails, the next refresh still sees that they changed)
+def refreshProfiles(graph, journal, artistIDs):
+	profileDict = ng.getInfoFromIDs(artistIDs)
+	changedDict = {}
+	for artistID in artistIDs:
+		if (artistID not in profileDict):
+			continue
+		oldData = graph.nodeData(artistID)
+		attributes = nodeAttributes(*profileDict[artistID])
+		if (any(oldData[column] != attributes[column] for column in comparedColumns)):
+			changedDict[artistID] = attributes
+			if (graph.isExplored(artistID)):
+				continue
+		updateNode(graph, journal, artistID, attributes)
+	return changedDict, [artistID for artistID in artistIDs if artistID not in profileDict]
+
+# This method checks whether the given artist follows targetID, reading through the following cache
+def followsBack(artistID, targetID):
+	cachedFollowing = ng.followingCache.get(artistID)
+	if (cachedFollowing is not None):
+		return targetID in cachedFollowing
+	return ng.probeFollowing(artistID, targetID)[0]
+
+# This method patches an explored artist's edges to match their current following list, the way the crawler
+# would have added them: an edge to each artist they follow who's been explored, or who follows them back.
+# oldTargets is the set of artists they had edges to before the refresh started. Artists they no longer
+# follow lose their edge; artists who are still followed keep theirs (w/o checking whether they still
+# follow back). It returns (the edges it added, the edges to remove); the removals are
+# recorded in the journal right away, but they're left to the caller to apply, so every artist's can be
+# applied to the graph in one pass
+def refreshFollowing(graph, journal, artistID, oldTargets):
+	following = ng.getFollowingFromID(artistID)
+	ng.followingCache.put(artistID, SortedIDs(newID for newArtist, newID, newInfo in following))
+	newTargets = set(newID for newArtist, newID, newInfo in following)
+
+	# The following list comes w/ everyone's profile, so update the nodes that are already in the graph
+	for newArtist, newID, newInfo in following:
+		if (newID in graph and not graph.isExplored(newID)):
+			updateNode(graph, journal, newID, nodeAttributes(newArtist, newInfo))
+
+	# Check (concurrently) which of the newly followed artists who haven't been explored follow back
+	candidates = [(newArtist, newID, newInfo) for newArtist, newID, newInfo in following if newID not in oldTargets and newID != artistID]
+	toCheck = set(newID for newArtist, newID, newInfo in candidates if not (newID in graph and graph.isExplored(newID)))
+	followingBack = fetchMany(list(toCheck), lambda newID: followsBack(newID, artistID), ng.followBackWorkers)
+
+	addedEdges = []
+	for newArtist, newID, newInfo in candidates:
+		if (newID in toCheck and not followingBack.get(newID, False)):
+			continue
+		if (newID not in graph):
+			attributes = dict(nodeAttributes(newArtist, newInfo), explored=0)
+			graph.add_node(newID, **attributes)
+			journal.recordNode(newID, attributes)
+		graph.add_edge(artistID, newID)
+		journal.recordEdge(artistID, newID)
+		addedEdges.append((artistID, newID))
+	removedEdges = [(artistID, oldTarget) for oldTarget in oldTargets if oldTarget not in newTargets]
+	if (removedEdges):
+		journal.recordEdgeRemovals(removedEdges)
+	return addedEdges, removedEdges
+
+# This method refreshes a graph (in place): it looks up the profiles of its explored artists (or all of its
+# artists, if allArtists is True), and re-fetches the following lists of the explored artists who changed.
+# It returns a dict of what it did
+def refreshGraph(graph, journal, allArtists=False):
+	artistIDs = [nodeID for nodeID, data in graph.iterNodes() if allArtists or data["explored"] == 1]
+	with ng.metrics.timer("profileRefresh"):
+		changedDict, missingIDs = refreshProfiles(graph, journal, artistIDs)
+	log.info("Looked up %d artists; %d of them changed, and %d weren't found", len(artistIDs), len(changedDict), len(missingIDs))
+
+	addedEdges, removedEdges, failedIDs = [], [], []
+	changedExplored = [artistID for artistID in changedDict if graph.isExplored(artistID)]
+
+	# Take everyone's edges before any of them are patched, in one pass
+	oldTargetDict = {artistID: set(graph.successors(artistID)) for artistID in changedExplored}
+	try:
+		for idx, artistID in enumerate(changedExplored):
+			log.debug("Refreshing the following list of the artist w/ the ID %s", artistID)
+			progress.update("Refreshing following lists (%d/%d)", idx + 1, len(changedExplored))
+
+			# Surrounding the API calls with a try/except in case they fail
+			try:
+				artistAdded, artistRemoved = refreshFollowing(graph, journal, artistID, oldTargetDict[artistID])
+			except Exception:
+				log.exception("*** ERROR: FAILED TO REFRESH THE FOLLOWING LIST OF THE ARTIST W/ THE ID %s; LEAVING THEIR EDGES ALONE ***", artistID)
+				failedIDs.append(artistID)
+				continue
+			updateNode(graph, journal, artistID, changedDict[artistID])
+			addedEdges += artistAdded
+			removedEdges += artistRemoved
+			ng.metrics.increment("nodesAndEdgesJournaled", journal.flush())
+
+	# Remove the edges of everyone's unfollows in one pass (including when the refresh is stopped partway)
+	finally:
+		progress.finish()
+		graph.remove_edges_from(removedEdges)
+
+	return {
+		"lookedUp": len(artistIDs),
+		"changed": len(changedDict),
+		"missing": len(missingIDs),
+		"followingRefreshed": len(changedExplored) - len(failedIDs),
+		"failed": len(failedIDs),
+		"edgesAdded": len(addedEdges),
+		"edgesRemoved": len(removedEdges),
+	}
+
+# =========================
+#           MAIN
+# =========================
+
+if (__name__ == "__main__"):
+
+	parser = argparse.ArgumentParser(description="Bring a crawl graph up to date, re-fetching only the artists who changed.")
+	parser.add_argument("--client-id", required=True, help="your SoundCloud client ID")
+	parser.add_argument("--graph", required=True, help="the .graphml file of the crawl (its snapshot is used if it has one)")
+	parser.add_argument("--all-artists", action="store_true", help="update the profiles of the unexplored artists too (this costs an API request per %d of them)" % ng.profileBatchSize)
+	args = parser.parse_args()
+	if (not graphExists(args.graph)):
+		parser.error("there's no graph at %s" % args.graph)
+
+	# Load the graph, plus anything in its journal
+	configureLogging(ng.logLevel, ng.recentLogSize, ng.progressUpdatesPerSecond)
+	setupClient(args.client_id)
+	graph = loadJournaledGraph(args.graph)
+	journal = GraphJournal(args.graph, snapshotFormat=ng.snapshotFormat, exportGraphml=ng.exportGraphml)
+
+	# Refresh it, and then write it back out (whatever was refreshed is written, even on CTRL+C)
+	curTime = time.time()
+	try:
+		summary = refreshGraph(graph, journal, args.all_artists)
+		log.info("Refreshed %d following lists (%d failed): added %d edges and removed %d", summary["followingRefreshed"], summary["failed"], summary["edgesAdded"], summary["edgesRemoved"])
+	except KeyboardInterrupt:
+		log.info("\nStopping the refresh...")
+	finally:
+		log.info("It took %.3f seconds and %d API requests", time.time() - curTime, ng.client.scheduler.stats()["requests"])
+		log.info("Writing the full graph to %s...", args.graph)
+		with ng.metrics.timer("graphCompact"):
+			journal.compact(graph)
+		recentEvents.dump(logPathFor(args.graph))
@@ -0,0 +1,152 @@
+
+# This module is part of the SoundCloud social network generator; every request the crawler sends to
+# the SoundCloud API goes through the scheduler in here, which paces the requests and retries failures
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import random, threading, time
+import requests
+
+# These are the HTTP status codes worth retrying; 429 and 503 mean we're going too fast
+retryableStatuses = {429, 500, 502, 503, 504}
+throttleStatuses = {429, 503}
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is a thread-safe token bucket: acquire() blocks until the caller is allowed to send a
+# request. Tokens refill at `rate` per second, up to `burst` of them; pause() holds every request
+# until a given time (i.e., when the API sends a Retry-After header)
+class TokenBucket:
+
+	def __init__(self, rate, burst):
+		self.rate = rate
+		self.burst = burst
+		self.tokens = burst
+		self.updated = time.monotonic()
+		self.pausedUntil = 0.0
+		self.lock = threading.Lock()
+
+	def acquire(self):
+		with self.lock:
+			now = time.monotonic()
+			self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+			self.updated = now
+
+			# Reserve a token; if the bucket is empty, this puts it in debt, and the caller waits it out
+			self.tokens -= 1
+			wait = max(self.pausedUntil - now, -self.tokens / self.rate if self.tokens < 0 else 0.0)
+		if (wait > 0):
+			time.sleep(wait)
+
+	def pause(self, seconds):
+		with self.lock:
+			self.pausedUntil = max(self.pausedUntil, time.monotonic() + seconds)
+
+	def setRate(self, rate):
+		with self.lock:
+			now = time.monotonic()
+			self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+			self.updated = now
+			self.rate = rate
+
+# This class sends requests on behalf of the API client. It paces them w/ a token bucket whose rate adapts
+# to the API: every successful request nudges the rate up (by rateIncrease requests/second, up to maxRate),
+# and every failed one (a 429, a 5xx error, a connection error or a timeout) cuts it in half (down to
+# minRate). Failed requests are retried up to maxAttempts times, w/ exponential backoff and jitter.
+# Retries are also limited by a budget that fills up by retryRatio for each successful request, so an
+# outage can't turn into a flood of retries
+class RequestScheduler:
+
+	def __init__(self, rate=5.0, minRate=0.5, maxRate=50.0, rateIncrease=0.05, maxAttempts=6, baseBackoff=0.5, maxBackoff=60.0, retryRatio=0.2, maxRetryBudget=20.0):
+		self.bucket = TokenBucket(rate, burst=max(1.0, rate))
+		self.minRate = minRate
+		self.maxRate = maxRate
+		self.rateIncrease = rateIncrease
+		self.maxAttempts = maxAttempts
+		self.baseBackoff = baseBackoff
+		self.maxBackoff = maxBackoff
+		self.retryRatio = retryRatio
+		self.maxRetryBudget = maxRetryBudget
+		self.retryBudget = maxRetryBudget
+		self.lock = threading.Lock()
+		self.requestCt = 0
+		self.retryCt = 0
+		self.throttleCt = 0
+		self.failureCt = 0
+
+	# This method calls sendRequest() (which should return a requests.Response) until it succeeds or runs
+	# out of retries, and returns the response; if it gives up, it raises the last error
+	def run(self, sendRequest):
+		attempt = 0
+		while (True):
+			attempt += 1
+			self.bucket.acquire()
+			with self.lock:
+				self.requestCt += 1
+
+			# Send the request, and sort the result into success / retryable failure / permanent failure
+			retryAfter = None
+			try:
+				response = sendRequest()
+			except (requests.ConnectionError, requests.Timeout) as e:
+				error = e
+				self.onFailure(False)
+			else:
+				if (response.status_code not in retryableStatuses):
+					response.raise_for_status()
+					self.onSuccess()
+					return response
+				error = requests.HTTPError("%d error from the SoundCloud API" % response.status_code, response=response)
+				self.onFailure(response.status_code in throttleStatuses)
+				retryAfter = parseRetryAfter(response.headers.get("Retry-After"))
+				if (retryAfter is not None):
+					self.bucket.pause(retryAfter)
+
+			# Give up if this request is out of attempts, or the scheduler is out of retry budget
+			if (not self.takeRetry(attempt)):
+				with self.lock:
+					self.failureCt += 1
+				raise error
+
+			# Otherwise, back off for a random amount of time (up to an exponentially growing cap)
+			backoff = random.uniform(0, min(self.maxBackoff, self.baseBackoff * (2 ** (attempt - 1))))
+			time.sleep(max(backoff, retryAfter or 0.0))
+
+	# This helper method decides whether a failed request can be retried, and spends budget if so
+	def takeRetry(self, attempt):
+		with self.lock:
+			if (attempt >= self.maxAttempts or self.retryBudget < 1):
+				return False
+			self.retryBudget -= 1
+			self.retryCt += 1
+			return True
+
+	def onSuccess(self):
+		with self.lock:
+			self.retryBudget = min(self.maxRetryBudget, self.retryBudget + self.retryRatio)
+			newRate = min(self.maxRate, self.bucket.rate + self.rateIncrease)
+		self.bucket.setRate(newRate)
+
+	def onFailure(self, throttled):
+		with self.lock:
+			if (throttled):
+				self.throttleCt += 1
+			newRate = max(self.minRate, self.bucket.rate / 2)
+		self.bucket.setRate(newRate)
+
+	# This method returns the scheduler's counters, and the current request rate
+	def stats(self):
+		with self.lock:
+			return {"requests": self.requestCt, "retries": self.retryCt, "throttled": self.throttleCt, "failures": self.failureCt, "rate": self.bucket.rate, "retryBudget": self.retryBudget}
+
+# This method reads a Retry-After header (in seconds); dates and missing headers give None
+def parseRetryAfter(value):
+	try:
+		return max(0.0, float(value))
+	except (TypeError, ValueError):
+		return None
@@ -0,0 +1,93 @@
+
+# This module is part of the SoundCloud social network generator; it holds the crawl frontier that
+# several crawl worker processes share (see crawlWorkers.py). It lives in a SQLite file, so every
+# claim and update is atomic across processes
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import sqlite3
+
+# These are the states an artist can be in
+openState = 0
+claimedState = 1
+doneState = 2
+
+# =========================
+#          METHODS
+# =========================
+
+# This class is the shared frontier. Each artist has a row w/ their name, encounter count, and state;
+# artists are only handed out as seeds once they're "connected" (i.e., they mutually follow an artist
+# who's already been explored, or they're one of the starting seeds)
+class SharedFrontier:
+
+	def __init__(self, path):
+		self.connection = sqlite3.connect(str(path), timeout=60, isolation_level=None)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS artists (id INTEGER PRIMARY KEY, name TEXT, encounters REAL NOT NULL DEFAULT 0, connected INTEGER NOT NULL DEFAULT 0, shuffled INTEGER NOT NULL DEFAULT 0, state INTEGER NOT NULL DEFAULT 0, worker INTEGER)")
+		self.connection.execute("CREATE INDEX IF NOT EXISTS artistsByPriority ON artists (state, connected, encounters)")
+		self.connection.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value)")
+
+	# This method adds encounters for a batch of artists; it takes a list of (ID, name, encounter count, connected)
+	# tuples. Counts from different workers add up, and an artist stays connected once any worker connects them
+	def addEncounters(self, encounterList):
+		self.connection.execute("BEGIN IMMEDIATE")
+		self.connection.executemany("INSERT INTO artists (id, name, encounters, connected) VALUES (?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET encounters = encounters + excluded.encounters, connected = MAX(connected, excluded.connected), name = COALESCE(name, excluded.name)", encounterList)
+		self.connection.execute("COMMIT")
+
+	# This method atomically claims the connected, open artist w/ the most encounters for a worker, and
+	# returns (ID, name, shuffled); if there's nobody to claim right now, it returns None
+	def claim(self, workerIdx):
+		self.connection.execute("BEGIN IMMEDIATE")
+		row = self.connection.execute("SELECT id, name, shuffled FROM artists WHERE state = ? AND connected = 1 ORDER BY encounters DESC LIMIT 1", (openState,)).fetchone()
+		if (row is not None):
+			self.connection.execute("UPDATE artists SET state = ?, worker = ? WHERE id = ?", (claimedState, workerIdx, row[0]))
+		self.connection.execute("COMMIT")
+		return row
+
+	# This method marks a claimed artist as fully explored
+	def markDone(self, artistID):
+		self.connection.execute("UPDATE artists SET state = ? WHERE id = ?", (doneState, artistID))
+
+	# This method puts a claimed artist back into the frontier, multiplying their encounter count by the given
+	# factor; if shuffle is True, they're also marked as having been passed over once already
+	def release(self, artistID, factor=1.0, shuffle=False):
+		self.connection.execute("UPDATE artists SET state = ?, worker = NULL, encounters = encounters * ?, shuffled = MAX(shuffled, ?) WHERE id = ?", (openState, factor, int(shuffle), artistID))
+
+	# This method releases every claim (from workers that stopped before finishing their seed)
+	def releaseAllClaims(self):
+		self.connection.execute("UPDATE artists SET state = ?, worker = NULL WHERE state = ?", (openState, claimedState))
+
+	# This method returns the subset of the given IDs that have been claimed or explored by any worker
+	def exploredAmong(self, artistIDs):
+		artistIDs = list(artistIDs)
+		explored = set()
+		for startIdx in range(0, len(artistIDs), 500):
+			batch = artistIDs[startIdx:startIdx+500]
+			query = "SELECT id FROM artists WHERE state != %d AND id IN (%s)" % (openState, ",".join("?" * len(batch)))
+			explored.update(row[0] for row in self.connection.execute(query, batch))
+		return explored
+
+	# This method returns how many artists are in each state, as a dict
+	def counts(self):
+		countDict = {openState: 0, claimedState: 0, doneState: 0}
+		for state, count in self.connection.execute("SELECT state, COUNT(*) FROM artists GROUP BY state"):
+			countDict[state] = count
+		return {"open": countDict[openState], "claimed": countDict[claimedState], "done": countDict[doneState]}
+
+	# These methods store and read small settings that every worker needs to agree on (like the followerThreshold);
+	# setDefault() only stores the value if nobody has stored one yet, and returns whichever value won
+	def setDefault(self, name, value):
+		self.connection.execute("INSERT OR IGNORE INTO settings VALUES (?, ?)", (name, value))
+		return self.get(name)
+
+	def get(self, name):
+		row = self.connection.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()
+		return None if row is None else row[0]
+
+	def close(self):
+		self.connection.close()
@@ -0,0 +1,46 @@
+
+# These tests are part of the SoundCloud social network generator; they check the compact graph store.
+# Run them from the repo's root directory w/: python -m pytest tests
+
+# =========================
+#         SETUP
+# =========================
+
+# Here are various import statements
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from graphStore import CompactGraph
+
+# =========================
+#          TESTS
+# =========================
+
+# Removing edges packs each (source row, target row) pair into one int, which has to fit in 64 bits even when
+# the graph has more nodes than a 32-bit key can handle (i.e., more than 2^16)
+def test_remove_edges_from_large_graph():
+	nodeCt = 2**16 + 5000
+	graph = CompactGraph()
+	for nodeID in range(nodeCt):
+		graph.add_node(nodeID)
+	edgeList = [(nodeID, (nodeID * 7919) % nodeCt) for nodeID in range(0, nodeCt, 3)]
+	for sourceID, targetID in edgeList:
+		graph.add_edge(sourceID, targetID)
+	removedList = [edge for edge in edgeList if edge[0] > 50000][:200]
+	graph.remove_edges_from(removedList)
+	assert graph.number_of_edges() == len(set(edgeList)) - len(set(removedList))
+	for sourceID, targetID in removedList:
+		assert not graph.has_edge(sourceID, targetID)
+	assert set(graph.iterEdges()) == set(edgeList) - set(removedList)
+
+# Edges added after a removal (which rebuilds the adjacency) are still found, and counted once
+def test_add_after_remove():
+	graph = CompactGraph()
+	graph.add_edge(1, 2)
+	graph.add_edge(1, 3)
+	graph.remove_edges_from([(1, 2), (5, 6)])
+	graph.add_edge(1, 2)
+	graph.add_edge(1, 2)
+	assert graph.number_of_edges() == 2
+	assert sorted(graph.successors(1)) == [2, 3]